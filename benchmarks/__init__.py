@@ -0,0 +1,8 @@
+"""Benchmark suite of the task management API.
+
+Generates a seeded SQLite dataset (benchmarks.datagen), runs request scenarios (benchmarks.scenarios)
+through an in-process or HTTP driver (benchmarks.drivers) and saves results as JSON:
+
+    uv run python -m benchmarks.run --tasks 100000 --driver http --output results/100k.json
+    uv run python -m benchmarks.compare results/before.json results/after.json
+"""
@@ -0,0 +1,81 @@
+"""Compare hot-path reads of the task table before and after archiving its completed tasks.
+
+    uv run python benchmarks/bench_archive.py --tasks 100000 1000000 --completed-ratio 0.9
+
+Tasks generated as completed are backdated past --completed-days and moved to the archive by
+TaskService.archive_completed_tasks. Reads of active tasks should then cost as much as on a table holding only them,
+while include_archived reads keep the cost of the whole dataset.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event, text
+from sqlmodel import Session, create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datagen import DatasetSpec, generate  # noqa: E402
+from tmt.crud_sql import SQLProjectOperations, SQLTaskOperations  # noqa: E402
+from tmt.database import EngineProfile  # noqa: E402
+from tmt.services import TaskService  # noqa: E402
+
+REPEAT = 20
+
+
+def read_ms(session: Session, include_archived: bool = False) -> float:
+    """Milliseconds of a count, the last page of the listing and open deadlines, averaged over REPEAT runs."""
+    task_ops = SQLTaskOperations(session)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        count = task_ops.get_tasks_count(include_archived=include_archived)
+        task_ops.get_tasks(offset=max(count - 100, 0), limit=100, include_archived=include_archived)
+        task_ops.get_tasks_with_deadlines(completed=False, limit=100, include_archived=include_archived)
+        session.expunge_all()
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def measure(tasks: int, completed_ratio: float, completed_days: int, directory: str) -> dict:
+    engine = create_engine(f"sqlite:///{directory}/bench-{tasks}.sqlite")
+    profile = EngineProfile.from_env()
+    event.listen(engine, "connect", lambda dbapi_connection, _: profile.apply(dbapi_connection))
+    generate(engine, DatasetSpec(tasks=tasks, completed_ratio=completed_ratio))
+
+    with Session(engine) as session:
+        session.exec(text("UPDATE taskcompletion SET completed_on = date('now', :age)"),
+                     params={"age": f"-{completed_days + 1} days"})
+        session.commit()
+        before_ms = read_ms(session)
+
+        start = time.perf_counter()
+        archived = TaskService(SQLTaskOperations(session), SQLProjectOperations(session)).archive_completed_tasks(completed_days)
+        archive_s = time.perf_counter() - start
+
+        after_ms = read_ms(session)
+        all_ms = read_ms(session, include_archived=True)
+    engine.dispose()
+    return {"archived": archived, "archive s": archive_s, "before ms": before_ms, "after ms": after_ms,
+            "all ms": all_ms}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--completed-ratio", type=float, default=0.9)
+    parser.add_argument("--completed-days", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {tasks: measure(tasks, args.completed_ratio, args.completed_days, directory)
+                   for tasks in args.tasks}
+
+    print(f"{'tasks':>9}{'archived':>10}{'archive s':>11}{'before ms':>11}{'after ms':>10}{'all ms':>9}")
+    for tasks, result in results.items():
+        print(f"{tasks:>9}{result['archived']:>10}{result['archive s']:>11.2f}{result['before ms']:>11.2f}"
+              f"{result['after ms']:>10.2f}{result['all ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
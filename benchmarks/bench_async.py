@@ -0,0 +1,115 @@
+"""Compare sync (tmt.main:tmt) and async (tmt.main_async:app) backends under concurrent HTTP load.
+
+Each backend is started with uvicorn in its own temporary directory (so it gets its own SQLite file),
+seeded over HTTP and then hit by concurrent clients. Reports requests/s and p50/p99 latency per scenario.
+
+    uv run python benchmarks/bench_async.py --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BACKENDS = {
+    "sync": "tmt.main:tmt",
+    "async": "tmt.main_async:app",
+}
+
+
+def start_server(app: str, port: int, workdir: Path) -> subprocess.Popen:
+    (workdir / "db").mkdir()
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs")
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Server {app} did not start on port {port}.")
+
+
+async def seed(client: httpx.AsyncClient, projects: int, tasks_per_project: int) -> None:
+    for _ in range(projects):
+        project_id = (await client.post("/projects", json={"title": "Project", "deadline": "2999-12-31"})).json()["id"]
+        for i in range(tasks_per_project):
+            await client.post("/tasks", json={"title": f"Task {i}", "desc": "Description",
+                                              "deadline": "2999-01-01", "project_id": project_id})
+
+
+async def run_scenario(client: httpx.AsyncClient, method: str, path: str, body: dict | None,
+                       concurrency: int, total: int) -> dict:
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            res = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            res.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {"rps": total / elapsed, "p50_ms": quantiles[49] * 1000, "p99_ms": quantiles[98] * 1000}
+
+
+async def bench_backend(base_url: str, args: argparse.Namespace) -> dict[str, dict]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await seed(client, args.projects, args.tasks_per_project)
+        scenarios = {
+            "GET /tasks?limit=20": ("GET", "/tasks?limit=20", None),
+            "GET /projects?limit=5": ("GET", "/projects?limit=5", None),
+            "POST /tasks": ("POST", "/tasks", {"title": "Bench", "desc": "Bench", "project_id": 1}),
+        }
+        return {name: await run_scenario(client, method, path, body, args.concurrency, args.requests)
+                for name, (method, path, body) in scenarios.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--tasks-per-project", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    results = {}
+    for offset, (name, app) in enumerate(BACKENDS.items()):
+        with tempfile.TemporaryDirectory() as workdir:
+            port = args.port + offset
+            server = start_server(app, port, Path(workdir))
+            try:
+                results[name] = asyncio.run(bench_backend(f"http://127.0.0.1:{port}", args))
+            finally:
+                server.terminate()
+                server.wait()
+
+    print(f"{'scenario':<24}{'backend':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for scenario in results["sync"]:
+        for name in BACKENDS:
+            result = results[name][scenario]
+            print(f"{scenario:<24}{name:<8}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
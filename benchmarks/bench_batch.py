@@ -0,0 +1,78 @@
+"""Compare batch endpoints with looping over single-item endpoints, through HTTP on file-backed SQLite.
+
+    uv run python benchmarks/bench_batch.py --tasks 2000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tmt.database import EngineProfile, get_sqlite_db, get_sqlite_read_db  # noqa: E402
+from tmt.main import tmt  # noqa: E402
+
+
+def timed(fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.sqlite", connect_args={"check_same_thread": False})
+        profile = EngineProfile.from_env()
+        event.listen(engine, "connect", lambda dbapi_connection, _: profile.apply(dbapi_connection))
+        SQLModel.metadata.create_all(engine)
+
+        def get_session():
+            with Session(engine) as session:
+                yield session
+
+        tmt.dependency_overrides[get_sqlite_db] = get_session
+        tmt.dependency_overrides[get_sqlite_read_db] = get_session
+        client = TestClient(tmt)
+
+        project_id = client.post("/projects", json={"title": "Project", "deadline": "2999-01-01"}).json()["id"]
+        tasks = [{"title": f"Task {i}", "desc": "Description", "deadline": "2998-01-01", "project_id": project_id}
+                 for i in range(args.tasks)]
+        single_ids, batch_ids = [], []
+
+        def create_single():
+            single_ids.extend(client.post("/tasks", json=task).json()["id"] for task in tasks)
+
+        def create_batch():
+            batch_ids.extend(result["id"] for result in client.post("/tasks/batch", json=tasks).json())
+
+        results = {
+            "create": (timed(create_single), timed(create_batch)),
+            "update": (
+                timed(lambda: [client.put(f"/tasks/{_id}", json={"completed": True}) for _id in single_ids]),
+                timed(lambda: client.patch("/tasks/batch", json=[{"id": _id, "completed": True} for _id in batch_ids])),
+            ),
+            "delete": (
+                timed(lambda: [client.delete(f"/tasks/{_id}") for _id in single_ids]),
+                timed(lambda: client.request("DELETE", "/tasks/batch", json=batch_ids)),
+            ),
+        }
+        engine.dispose()
+
+    print(f"{args.tasks} tasks")
+    print(f"{'operation':<12}{'single s':>10}{'batch s':>10}{'speedup':>10}")
+    for name, (single, batch) in results.items():
+        print(f"{name:<12}{single:>10.3f}{batch:>10.3f}{single / batch:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare catching up with changes through the change log with downloading every task, at several table sizes.
+
+    uv run python benchmarks/bench_changes.py --tasks 10000 100000 1000000 --changes 100
+
+After the dataset is generated the change log is compacted, then --changes tasks are updated and read back
+by a client following the log since the compacted seq, page by page. Catching up should cost the same
+at every table size, while the full download grows with the table.
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datagen import DatasetSpec, generate  # noqa: E402
+from tmt.crud_sql import SQLChangeOperations, SQLProjectOperations, SQLTaskOperations  # noqa: E402
+from tmt.database import EngineProfile  # noqa: E402
+from tmt.services import ChangeService, TaskService  # noqa: E402
+
+PAGE_SIZE = 100
+
+
+def catch_up(service: ChangeService, since: int) -> tuple[int, int]:
+    """Read every change after since as a client would. Return (changes, JSON bytes)."""
+    changes = size = 0
+    cursor = str(since)
+    while cursor is not None:
+        page = service.get_changes(since=int(cursor), limit=PAGE_SIZE)
+        changes += len(page.items)
+        size += sum(len(change.model_dump_json()) for change in page.items)
+        cursor = page.next_cursor
+    return changes, size
+
+
+def measure(tasks: int, changes: int, directory: str) -> dict:
+    engine = create_engine(f"sqlite:///{directory}/bench-{tasks}.sqlite")
+    profile = EngineProfile.from_env()
+    event.listen(engine, "connect", lambda dbapi_connection, _: profile.apply(dbapi_connection))
+    generate(engine, DatasetSpec(tasks=tasks))
+
+    with Session(engine) as session:
+        change_service = ChangeService(SQLChangeOperations(session))
+        change_service.compact_changes(keep=0)
+        since = change_service.get_last_seq()
+        task_ops = SQLTaskOperations(session)
+        task_ids = random.Random(0).sample(range(1, tasks + 1), changes)
+        task_ops.update_tasks([{"id": task_id, "completed": True} for task_id in task_ids])
+
+        start = time.perf_counter()
+        changed, changes_size = catch_up(change_service, since)
+        changes_ms = (time.perf_counter() - start) * 1000
+        session.expunge_all()
+
+        start = time.perf_counter()
+        task_service = TaskService(task_ops, SQLProjectOperations(session))
+        export_size = sum(len(json.dumps(row, default=str)) for row in task_service.export_tasks())
+        export_ms = (time.perf_counter() - start) * 1000
+    engine.dispose()
+    return {"changed": changed, "changes ms": changes_ms, "changes KB": changes_size / 1024,
+            "export ms": export_ms, "export KB": export_size / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--changes", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {tasks: measure(tasks, args.changes, directory) for tasks in args.tasks}
+
+    print(f"{'tasks':>9}{'changed':>9}{'changes ms':>12}{'changes KB':>12}{'export ms':>11}{'export KB':>11}")
+    for tasks, result in results.items():
+        print(f"{tasks:>9}{result['changed']:>9}{result['changes ms']:>12.2f}{result['changes KB']:>12.1f}"
+              f"{result['export ms']:>11.1f}{result['export KB']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare full listed pages with narrow views limited by fields=, on file-backed SQLite.
+
+    uv run python benchmarks/bench_fields.py --pages 200
+
+Full pages hold tasks with their nested project and projects with their tasks, narrow ones only the columns
+a list view needs, without relationships. Reported are CPU time, SQL statements and JSON size of one page.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import tmt.main  # noqa: E402
+from benchmarks.datagen import DatasetSpec, generate  # noqa: E402
+from tmt.database import EngineProfile, QueryCounter, get_sqlite_db, get_sqlite_read_db  # noqa: E402
+
+PAGES = {
+    "tasks": ("/tasks", {"limit": 100}, "title,completed"),
+    "task deadlines": ("/tasks/deadlines", {"limit": 100}, "title,completed,deadline"),
+    "projects": ("/projects", {"limit": 100}, "title"),
+}
+
+
+def measure(client: TestClient, engine, path: str, params: dict, pages: int) -> dict:
+    res = client.get(path, params=params)  # warm up
+    with QueryCounter(engine) as counter:
+        client.get(path, params=params)
+    start = time.process_time()
+    for _ in range(pages):
+        client.get(path, params=params)
+    return {"ms": (time.process_time() - start) / pages * 1000, "statements": counter.count,
+            "KB": len(res.content) / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.sqlite", connect_args={"check_same_thread": False})
+        profile = EngineProfile.from_env()
+        event.listen(engine, "connect", lambda dbapi_connection, _: profile.apply(dbapi_connection))
+        generate(engine, DatasetSpec(projects=args.projects, tasks=args.tasks))
+
+        def get_session():
+            with Session(engine) as session:
+                yield session
+
+        tmt.main.tmt.dependency_overrides[get_sqlite_db] = get_session
+        tmt.main.tmt.dependency_overrides[get_sqlite_read_db] = get_session
+        client = TestClient(tmt.main.tmt)
+
+        results = {}
+        for name, (path, params, fields) in PAGES.items():
+            results[name] = (measure(client, engine, path, params, args.pages),
+                             measure(client, engine, path, {**params, "fields": fields}, args.pages))
+        engine.dispose()
+
+    print(f"{args.pages} pages of 100 items, fast serialization {'on' if tmt.main.fast_serialization else 'off'}")
+    print(f"{'page':<16}{'full ms':>9}{'narrow ms':>11}{'full SQL':>10}{'narrow SQL':>12}{'full KB':>9}"
+          f"{'narrow KB':>11}")
+    for name, (full, narrow) in results.items():
+        print(f"{name:<16}{full['ms']:>9.2f}{narrow['ms']:>11.2f}{full['statements']:>10}{narrow['statements']:>12}"
+              f"{full['KB']:>9.1f}{narrow['KB']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
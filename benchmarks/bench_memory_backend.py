@@ -0,0 +1,90 @@
+"""Compare SQLite and in-memory storage backends at service level (no HTTP).
+
+    uv run python benchmarks/bench_memory_backend.py --tasks 20000
+"""
+import argparse
+import random
+import sys
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlmodel import Session, SQLModel, create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tmt.crud_memory import MemoryProjectOperations, MemoryStore, MemoryTaskOperations  # noqa: E402
+from tmt.crud_sql import SQLProjectOperations, SQLTaskOperations  # noqa: E402
+from tmt.models import ProjectBase, ProjectUpdate, TaskBase  # noqa: E402
+from tmt.services import ProjectService, TaskService  # noqa: E402
+
+
+def timed(fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(project_service: ProjectService, task_service: TaskService, args: argparse.Namespace) -> dict[str, float]:
+    rng = random.Random(args.seed)
+    today = date.today()
+
+    def create():
+        for _ in range(args.projects):
+            project_service.create_project(ProjectBase(title="Project", deadline=today + timedelta(days=400)))
+        for i in range(args.tasks):
+            deadline = today + timedelta(days=rng.randint(1, 365)) if rng.random() < 0.7 else None
+            task_service.create_task(TaskBase(title=f"Task {i}", desc="Description", deadline=deadline,
+                                              project_id=rng.randint(1, args.projects)))
+
+    def page_with_cursor():
+        page = task_service.get_paginated_tasks(limit=100, offset=0, order_by="deadline")
+        while page.next_cursor:
+            page = task_service.get_paginated_tasks(limit=100, offset=0, cursor=page.next_cursor, order_by="deadline")
+
+    def deep_offset_pages():
+        for offset in range(args.tasks - 1000, args.tasks, 100):
+            task_service.get_paginated_tasks(limit=100, offset=offset)
+
+    def deadlines():
+        for _ in range(10):
+            list(task_service.get_tasks_with_deadline())
+
+    def reassign():
+        for project_id in range(1, 11):
+            project_service.update_project(project_id, ProjectUpdate(tasks_ids=list(range(project_id, 500, 10))))
+
+    return {
+        "create": timed(create),
+        "page all with cursor": timed(page_with_cursor),
+        "10 deep offset pages": timed(deep_offset_pages),
+        "10x deadlines": timed(deadlines),
+        "10x reassign tasks": timed(reassign),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        project_ops, task_ops = SQLProjectOperations(session), SQLTaskOperations(session)
+        sqlite = run(ProjectService(project_ops, task_ops), TaskService(task_ops, project_ops), args)
+
+    store = MemoryStore()
+    project_ops, task_ops = MemoryProjectOperations(store), MemoryTaskOperations(store)
+    memory = run(ProjectService(project_ops, task_ops), TaskService(task_ops, project_ops), args)
+
+    print(f"{'operation':<24}{'sqlite s':>10}{'memory s':>10}{'speedup':>10}")
+    for name in sqlite:
+        print(f"{name:<24}{sqlite[name]:>10.3f}{memory[name]:>10.3f}{sqlite[name] / memory[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measure latency of full-text task search at service level on file-backed SQLite.
+
+    uv run python benchmarks/bench_search.py --tasks 1000000
+
+Generated tasks are titled "Task <i>", so a number matches one task, a number prefix a few and "task"
+matches every task, of which only the newest services.MAX_RANKED_MATCHES are ranked.
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datagen import DatasetSpec, generate  # noqa: E402
+from tmt.crud_sql import SQLProjectOperations, SQLTaskOperations  # noqa: E402
+from tmt.database import EngineProfile  # noqa: E402
+from tmt.services import TaskService  # noqa: E402
+
+
+def queries(tasks: int) -> dict[str, dict]:
+    number = tasks // 2
+    return {
+        "one word": {"q": str(number)},
+        "two words": {"q": f"task {number}"},
+        "prefix": {"q": f"{number // 100}*"},
+        "project filter": {"q": f"{number // 100}*", "project_id": 1},
+        "every task": {"q": "task"},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.sqlite")
+        profile = EngineProfile.from_env()
+        event.listen(engine, "connect", lambda dbapi_connection, _: profile.apply(dbapi_connection))
+        start = time.perf_counter()
+        generate(engine, DatasetSpec(tasks=args.tasks))
+        print(f"{args.tasks} tasks generated and indexed in {time.perf_counter() - start:.1f} s")
+
+        results = {}
+        with Session(engine) as session:
+            service = TaskService(SQLTaskOperations(session), SQLProjectOperations(session))
+            for name, params in queries(args.tasks).items():
+                latencies = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    page = service.search_tasks(limit=20, **params)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    session.expunge_all()
+                latencies.sort()
+                results[name] = (params["q"], len(page.items), statistics.median(latencies), latencies[-1])
+        engine.dispose()
+
+    print(f"{'query':<16}{'q':>12}{'found':>7}{'p50 ms':>9}{'max ms':>9}")
+    for name, (q, found, p50, worst) in results.items():
+        print(f"{name:<16}{q:>12}{found:>7}{p50:>9.2f}{worst:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
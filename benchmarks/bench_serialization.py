@@ -0,0 +1,80 @@
+"""Compare CPU time per listed page of the standard and the fast serialization path, on file-backed SQLite.
+
+    uv run python benchmarks/bench_serialization.py --pages 200
+
+Pages hold 100 items, tasks with their nested project and projects with their tasks. Both paths must
+return the same JSON, the benchmark fails otherwise.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import tmt.main  # noqa: E402
+from benchmarks.datagen import DatasetSpec, generate  # noqa: E402
+from tmt.database import EngineProfile, get_sqlite_db, get_sqlite_read_db  # noqa: E402
+from tmt.serialization import orjson  # noqa: E402
+
+PAGES = {
+    "tasks by id": ("/tasks", {"limit": 100}),
+    "tasks by deadline": ("/tasks", {"limit": 100, "order_by": "deadline"}),
+    "task deadlines": ("/tasks/deadlines", {"limit": 100}),
+    "projects": ("/projects", {"limit": 100}),
+}
+
+
+def cpu_ms_per_page(client: TestClient, path: str, params: dict, pages: int) -> float:
+    client.get(path, params=params)  # warm up
+    start = time.process_time()
+    for _ in range(pages):
+        client.get(path, params=params)
+    return (time.process_time() - start) / pages * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.sqlite", connect_args={"check_same_thread": False})
+        profile = EngineProfile.from_env()
+        event.listen(engine, "connect", lambda dbapi_connection, _: profile.apply(dbapi_connection))
+        generate(engine, DatasetSpec(projects=args.projects, tasks=args.tasks))
+
+        def get_session():
+            with Session(engine) as session:
+                yield session
+
+        tmt.main.tmt.dependency_overrides[get_sqlite_db] = get_session
+        tmt.main.tmt.dependency_overrides[get_sqlite_read_db] = get_session
+        client = TestClient(tmt.main.tmt)
+
+        results = {}
+        for name, (path, params) in PAGES.items():
+            tmt.main.fast_serialization = False
+            expected = client.get(path, params=params).json()
+            standard = cpu_ms_per_page(client, path, params, args.pages)
+            tmt.main.fast_serialization = True
+            if client.get(path, params=params).json() != expected:
+                raise AssertionError(f"Fast serialization of {name} differs from the standard path.")
+            results[name] = (standard, cpu_ms_per_page(client, path, params, args.pages))
+        engine.dispose()
+
+    print(f"{args.pages} pages of 100 items, JSON encoded by {'orjson' if orjson is not None else 'pydantic-core'}")
+    print(f"{'page':<20}{'standard ms':>13}{'fast ms':>10}{'reduction':>11}")
+    for name, (standard, fast) in results.items():
+        print(f"{name:<20}{standard:>13.2f}{fast:>10.2f}{1 - fast / standard:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compare two results files of benchmarks.run, exit with status 1 when a scenario regressed.
+
+    uv run python -m benchmarks.compare results/before.json results/after.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(before: dict, after: dict, threshold: float) -> list[str]:
+    """Print change of every metric per scenario and return names of scenarios that regressed beyond threshold."""
+    regressions = []
+    print(f"{'scenario':<32}{'req/s':>16}{'p99 ms':>16}{'sql/req':>14}")
+    for name, new in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            continue
+        throughput_change = new["throughput_rps"] / old["throughput_rps"] - 1
+        p99_change = new["p99_ms"] / old["p99_ms"] - 1 if old["p99_ms"] else 0.0
+        print(f"{name:<32}{new['throughput_rps']:>9.1f} {throughput_change:>+6.0%}"
+              f"{new['p99_ms']:>9.2f} {p99_change:>+6.0%}"
+              f"{old['sql_per_request']:>6.1f} -> {new['sql_per_request']:<4.1f}")
+        if (throughput_change < -threshold or p99_change > threshold
+                or new["sql_per_request"] > old["sql_per_request"]):
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    before, after = json.loads(args.before.read_text()), json.loads(args.after.read_text())
+    for key in ["dataset", "driver", "concurrency", "requests"]:
+        if before["meta"][key] != after["meta"][key]:
+            print(f"warning: results were measured with different {key}")
+    regressions = compare(before, after, args.threshold)
+    if regressions:
+        print(f"regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Seeded synthetic dataset of projects and tasks, written straight to SQLite with multi-row inserts."""
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import accumulate
+
+from sqlalchemy import Engine, func, insert, select
+
+from tmt.database import create_schema
+from tmt.models import Project, Task
+
+INSERT_CHUNK_SIZE = 10000
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    projects: int = 100
+    tasks: int = 10000
+    seed: int = 0
+    # project sizes follow weights 1 / rank ** skew, 0 spreads tasks evenly
+    skew: float = 1.0
+    unassigned_ratio: float = 0.1
+    deadline_ratio: float = 0.7
+    overdue_ratio: float = 0.05
+    completed_ratio: float = 0.3
+    # task deadlines are spread over today .. today + deadline_days, projects end after all their tasks
+    deadline_days: int = 365
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Id ranges of generated (or already existing) rows, used by scenarios to pick targets."""
+    projects: int
+    tasks: int
+
+
+def generate(engine: Engine, spec: DatasetSpec) -> Dataset:
+    """Create schema and insert spec.projects projects and spec.tasks tasks in one transaction."""
+    rng = random.Random(spec.seed)
+    today = date.today()
+    project_deadline = today + timedelta(days=spec.deadline_days + 1)
+    project_ids = range(1, spec.projects + 1)
+    cum_weights = list(accumulate(1 / rank ** spec.skew for rank in project_ids))
+
+    def task_row(i: int) -> dict:
+        deadline = None
+        if rng.random() < spec.deadline_ratio:
+            if rng.random() < spec.overdue_ratio:
+                deadline = today - timedelta(days=rng.randint(1, 30))
+            else:
+                deadline = today + timedelta(days=rng.randint(0, spec.deadline_days))
+        project_id = None
+        if spec.projects and rng.random() >= spec.unassigned_ratio:
+            project_id = rng.choices(project_ids, cum_weights=cum_weights)[0]
+        return {"title": f"Task {i}", "desc": "Generated task", "deadline": deadline,
+                "completed": rng.random() < spec.completed_ratio, "project_id": project_id}
+
+    with engine.begin() as connection:
+        create_schema(connection)
+        if spec.projects:
+            connection.execute(insert(Project.__table__), [
+                {"title": f"Project {i}", "deadline": project_deadline} for i in range(spec.projects)
+            ])
+        for start in range(0, spec.tasks, INSERT_CHUNK_SIZE):
+            connection.execute(insert(Task.__table__),
+                               [task_row(i) for i in range(start, min(start + INSERT_CHUNK_SIZE, spec.tasks))])
+    return describe(engine)
+
+
+def describe(engine: Engine) -> Dataset:
+    with engine.connect() as connection:
+        projects = connection.execute(select(func.coalesce(func.max(Project.id), 0))).scalar_one()
+        tasks = connection.execute(select(func.coalesce(func.max(Task.id), 0))).scalar_one()
+    return Dataset(projects=projects, tasks=tasks)
@@ -0,0 +1,128 @@
+"""Drivers sending scenario requests to the application and measuring them."""
+import random
+import resource
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine
+
+from tmt.database import QueryCounter
+
+from .datagen import Dataset
+from .scenarios import Request, Scenario
+
+
+@dataclass
+class ScenarioResult:
+    requests: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p99_ms: float
+    sql_per_request: float
+    peak_rss_mb: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class InProcessDriver:
+    """Calls the ASGI application in this process through TestClient, without network and server overhead."""
+    concurrency = 1
+
+    def __init__(self, app: FastAPI):
+        self._client = TestClient(app)
+
+    def send(self, request: Request) -> int:
+        return self._client.request(request.method, request.url, params=request.params, json=request.json).status_code
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class HttpDriver:
+    """Serves the application with uvicorn from a background thread and sends requests over TCP.
+
+    Server runs in this process, so SQL statements and peak RSS are measured the same way as in process.
+    """
+    def __init__(self, app: FastAPI, concurrency: int = 1):
+        self.concurrency = concurrency
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        # dataset schema is created by generator, application startup would create the default database
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError(f"Benchmark server did not start on port {port}.")
+            time.sleep(0.05)
+        self._client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120,
+                                    limits=httpx.Limits(max_connections=concurrency))
+
+    def send(self, request: Request) -> int:
+        return self._client.request(request.method, request.url, params=request.params, json=request.json).status_code
+
+    def close(self) -> None:
+        self._client.close()
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(sorted_values: list[float], q: int) -> float:
+    if len(sorted_values) < 2:
+        return sorted_values[0] if sorted_values else 0.0
+    return statistics.quantiles(sorted_values, n=100, method="inclusive")[q - 1]
+
+
+def measure(driver: InProcessDriver | HttpDriver, scenario: Scenario, dataset: Dataset, engine: Engine,
+            requests: int, seed: int = 0) -> ScenarioResult:
+    """Send requests of scenario (built upfront, so building them is not measured) from driver.concurrency threads."""
+    rng = random.Random(f"{seed}:{scenario.name}")
+    pending = [scenario.build(rng, dataset) for _ in range(requests)]
+    latencies = []
+    errors = 0
+
+    def send(request: Request) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        status_code = driver.send(request)
+        latencies.append(time.perf_counter() - start)
+        if status_code >= 400:
+            errors += 1
+
+    with QueryCounter(engine) as counter:
+        start = time.perf_counter()
+        if driver.concurrency == 1:
+            for request in pending:
+                send(request)
+        else:
+            with ThreadPoolExecutor(max_workers=driver.concurrency) as executor:
+                list(executor.map(send, pending))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return ScenarioResult(
+        requests=requests,
+        errors=errors,
+        throughput_rps=requests / elapsed,
+        p50_ms=percentile(latencies, 50) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+        sql_per_request=counter.count / requests,
+        peak_rss_mb=peak_rss_mb(),
+    )
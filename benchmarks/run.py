@@ -0,0 +1,111 @@
+"""Generate (or reuse) a dataset, run every scenario through selected driver and save results as JSON.
+
+    uv run python -m benchmarks.run --tasks 10000 --output results/10k.json
+    uv run python -m benchmarks.run --tasks 1000000 --db /tmp/1m.sqlite --driver http --concurrency 16
+"""
+import argparse
+import json
+import logging
+import platform
+import sqlite3
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, fields
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+from tmt.database import EngineProfile, get_sqlite_db, get_sqlite_read_db
+from tmt.main import tmt
+
+from .datagen import DatasetSpec, describe, generate
+from .drivers import HttpDriver, InProcessDriver, measure
+from .scenarios import SCENARIOS
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for spec_field in fields(DatasetSpec):
+        parser.add_argument(f"--{spec_field.name.replace('_', '-')}", type=spec_field.type, default=spec_field.default)
+    parser.add_argument("--db", type=Path, help="SQLite file, generated when it doesn't exist and reused otherwise")
+    parser.add_argument("--driver", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads of http driver")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--scenario", action="append", help="run only scenarios whose name contains this text")
+    parser.add_argument("--output", type=Path, help="JSON file for results")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.getLogger("tmt").setLevel(logging.ERROR)
+    spec = DatasetSpec(**{spec_field.name: getattr(args, spec_field.name) for spec_field in fields(DatasetSpec)})
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = args.db or Path(directory) / "benchmark.sqlite"
+        reused = db.exists()
+        engine = create_engine(f"sqlite:///{db}", connect_args={"check_same_thread": False},
+                               pool_size=max(args.concurrency, 5))
+        profile = EngineProfile.from_env()
+        event.listen(engine, "connect", lambda dbapi_connection, _: profile.apply(dbapi_connection))
+
+        start = time.perf_counter()
+        dataset = describe(engine) if reused else generate(engine, spec)
+        print(f"dataset: {dataset.projects} projects, {dataset.tasks} tasks "
+              f"({'reused' if reused else 'generated'} in {time.perf_counter() - start:.1f} s)")
+
+        def get_session():
+            with Session(engine) as session:
+                yield session
+
+        tmt.dependency_overrides[get_sqlite_db] = get_session
+        tmt.dependency_overrides[get_sqlite_read_db] = get_session
+        driver = HttpDriver(tmt, args.concurrency) if args.driver == "http" else InProcessDriver(tmt)
+
+        scenarios = [scenario for scenario in SCENARIOS
+                     if not args.scenario or any(text in scenario.name for text in args.scenario)]
+        results = {}
+        try:
+            # read scenarios see the generated dataset before writes change it
+            for scenario in sorted(scenarios, key=lambda scenario: scenario.writes):
+                results[scenario.name] = measure(driver, scenario, dataset, engine, args.requests, spec.seed).as_dict()
+        finally:
+            driver.close()
+            tmt.dependency_overrides.clear()
+            engine.dispose()
+
+    print(f"{'scenario':<32}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'sql/req':>9}{'rss MB':>9}{'errors':>8}")
+    for name, result in results.items():
+        print(f"{name:<32}{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{result['sql_per_request']:>9.1f}{result['peak_rss_mb']:>9.1f}{result['errors']:>8}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({
+            "meta": {
+                "commit": git_commit(),
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "driver": args.driver,
+                "concurrency": args.concurrency if args.driver == "http" else 1,
+                "requests": args.requests,
+                "dataset": {**asdict(spec), **asdict(dataset), "reused": reused},
+            },
+            "results": results,
+        }, indent=2))
+        print(f"results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
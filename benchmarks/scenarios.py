@@ -0,0 +1,52 @@
+"""Request scenarios run by both drivers, every scenario builds its next request from seeded random generator."""
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from .datagen import Dataset
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    params: dict = field(default_factory=dict)
+    json: dict | list | None = None
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    build: Callable[[random.Random, Dataset], Request]
+    writes: bool = False
+
+
+def _new_task(rng: random.Random, dataset: Dataset) -> dict:
+    deadline = date.today() + timedelta(days=rng.randint(0, 30))
+    return {"title": "Benchmark task", "desc": "Benchmark", "deadline": deadline.isoformat(),
+            "project_id": rng.randint(1, dataset.projects) if dataset.projects else None}
+
+
+def _random_offset(rng: random.Random, rows: int, limit: int) -> int:
+    return rng.randint(0, max(rows - limit, 0))
+
+
+SCENARIOS = [
+    Scenario("GET /tasks", lambda rng, dataset: Request(
+        "GET", "/tasks", {"limit": 100, "offset": _random_offset(rng, dataset.tasks, 100)})),
+    Scenario("GET /tasks?order_by=deadline", lambda rng, dataset: Request(
+        "GET", "/tasks", {"limit": 100, "order_by": "deadline"})),
+    Scenario("GET /projects", lambda rng, dataset: Request(
+        "GET", "/projects", {"limit": 20, "offset": _random_offset(rng, dataset.projects, 20)})),
+    Scenario("GET /tasks/deadlines", lambda rng, dataset: Request(
+        "GET", "/tasks/deadlines", {"within_days": 30, "completed": False, "limit": 100})),
+    Scenario("GET /tasks/upcoming", lambda rng, dataset: Request("GET", "/tasks/upcoming", {"n": 20})),
+    Scenario("GET /tasks/overdue", lambda rng, dataset: Request("GET", "/tasks/overdue", {"limit": 100})),
+    Scenario("PUT /projects/{id} tasks_ids", lambda rng, dataset: Request(
+        "PUT", f"/projects/{rng.randint(1, dataset.projects)}",
+        json={"tasks_ids": rng.sample(range(1, dataset.tasks + 1), min(20, dataset.tasks))}), writes=True),
+    Scenario("POST /tasks", lambda rng, dataset: Request("POST", "/tasks", json=_new_task(rng, dataset)), writes=True),
+    Scenario("POST /tasks/batch", lambda rng, dataset: Request(
+        "POST", "/tasks/batch", json=[_new_task(rng, dataset) for _ in range(100)]), writes=True),
+]
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from tmt.database import get_sqlite_async_db
+from tmt.main import tmt as sync_app
+from tmt.main_async import app, on_shutdown, on_startup
+
+
+# In-memory SQLite database shared by all sessions of async application
+test_async_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+async def override_get_sqlite_async_db():
+    async with AsyncSession(test_async_engine, expire_on_commit=False) as session:
+        yield session
+
+async def create_test_db():
+    async with test_async_engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+app.dependency_overrides[get_sqlite_async_db] = override_get_sqlite_async_db
+app.router.on_startup = [create_test_db]
+
+@pytest.fixture(scope="module")
+def test_client():
+    # single event loop for whole module, aiosqlite connection is bound to it
+    with TestClient(app) as client:
+        yield client
+
+
+def test_create_project(test_client):
+    res = test_client.post("/projects", json={"title": "Async Project", "deadline": "2999-01-02"})
+    assert res.status_code == 201
+    assert res.json()["tasks"] == []
+
+def test_create_task(test_client):
+    res = test_client.post("/tasks", json={"title": "Async Task", "desc": "Async Description",
+                                           "deadline": "2999-01-01", "project_id": 1})
+    assert res.status_code == 201
+    assert res.json()["project"]["title"] == "Async Project"
+
+def test_invalid_deadline_create_task(test_client):
+    res = test_client.post("/tasks", json={"title": "Async Task", "desc": "Async Description",
+                                           "deadline": "2999-01-03", "project_id": 1})
+    assert res.status_code == 400
+    assert "2999-01-02" in res.json()["detail"]
+
+def test_get_tasks_and_projects(test_client):
+    test_client.post("/tasks", json={"title": "Second Async Task", "desc": "Async Description"})
+    res = test_client.get("/tasks", params={"limit": 1})
+    assert res.status_code == 200
+    assert res.headers["X-Total-Count"] == "2"
+    res = test_client.get("/tasks", params={"limit": 1, "cursor": res.headers["X-Next-Cursor"]})
+    assert [task["title"] for task in res.json()] == ["Second Async Task"]
+
+    res = test_client.get("/projects")
+    assert [task["title"] for task in res.json()[0]["tasks"]] == ["Async Task"]
+
+def test_update_project_tasks_ids(test_client):
+    res = test_client.put("/projects/1", json={"tasks_ids": [2, 99]})
+    assert res.status_code == 200
+    assert [task["id"] for task in res.json()["tasks"]] == [2]
+
+def test_update_task(test_client):
+    res = test_client.put("/tasks/1", json={"completed": True})
+    assert res.status_code == 200
+    assert res.json()["completed"]
+
+def test_export_tasks(test_client):
+    res = test_client.get("/tasks/export")
+    assert [json.loads(line)["id"] for line in res.text.splitlines()] == [1, 2]
+
+def test_delete_task(test_client):
+    assert test_client.delete("/tasks/1").status_code == 204
+    assert test_client.get("/tasks").headers["X-Total-Count"] == "1"
+    assert test_client.delete("/tasks/1").status_code == 400
+    assert test_client.delete("/projects/99").status_code == 400
+
+def test_batch_tasks(test_client):
+    res = test_client.post("/tasks/batch", json=[{"title": "Batch Task", "desc": "Batch Description", "project_id": 1},
+                                                 {"title": "Batch Task", "desc": "Batch Description", "project_id": 99}])
+    assert res.status_code == 200
+    created, invalid = res.json()
+    assert created["error"] is None and "non-existent project" in invalid["error"]
+
+    res = test_client.patch("/tasks/batch", json=[{"id": created["id"], "completed": True}])
+    assert res.json()[0]["error"] is None
+
+    res = test_client.request("DELETE", "/tasks/batch", json=[created["id"]])
+    assert res.json() == [{"index": 0, "id": created["id"], "error": None}]
+
+def test_sync_app_hooks(monkeypatch):
+    calls = []
+
+    async def create_db_async():
+        calls.append("create_db_async")
+
+    monkeypatch.setattr("tmt.main_async.create_db_async", create_db_async)
+    monkeypatch.setattr(sync_app.router, "on_startup", [lambda: calls.append("sync startup")])
+    monkeypatch.setattr(sync_app.router, "on_shutdown", [lambda: calls.append("sync shutdown")])
+    asyncio.run(on_startup())
+    asyncio.run(on_shutdown())
+    assert calls == ["create_db_async", "sync startup", "sync shutdown"]
@@ -1,7 +1,18 @@
-from tmt.database import get_sqlite_db
+import json
+from datetime import date, timedelta
+
+from tmt.crud_base import ChangeOperations
+from tmt.crud_cache import CacheConfig, CachedProjectOperations, CachedTaskOperations, LRUTTLCache, OperationsCache
+from tmt.crud_sql import (ChangeVersions, RowCountCache, SQLChangeOperations, SQLProjectOperations,
+                          SQLTaskOperations, deadline_range_statement)
+from tmt.database import EngineProfile, QueryCounter, get_sqlite_db, get_sqlite_read_db
 from tmt.main import tmt
+from tmt.metrics import MetricsConfig, MetricsMiddleware, instrument_engine, render_metrics
+from tmt.models import FieldSet, Project, ProjectTaskStats, ProjectUpdate, Task, TaskBase, TaskRead
+from tmt.services import (MAX_BATCH_SIZE, MAX_REPORTED_TASKS, ChangeService, ChangesUnavailableError, TaskService,
+                          encode_cursor)
 from fastapi.testclient import TestClient
-from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel import SQLModel, create_engine, Session, update
 
 
 # In-memory SQLite database for tests
@@ -14,6 +25,7 @@ def override_get_sqlite_db():
         yield session
 
 tmt.dependency_overrides[get_sqlite_db] = override_get_sqlite_db
+tmt.dependency_overrides[get_sqlite_read_db] = override_get_sqlite_db
 
 test_client = TestClient(tmt)
 
@@ -49,6 +61,7 @@ def test_get_tasks():
     assert isinstance(res_data, list)
     assert any(task["title"] == "Basic Task" for task in res_data)
     assert len(res_data) == 2
+    assert res.headers["X-Total-Count"] == "2"
 
 def test_get_tasks_with_deadlines():
     res = test_client.get("/tasks/deadlines")
@@ -86,3 +99,649 @@ def test_invalid_project_id_update_task():
 def test_delete_task():
     res = test_client.delete("/tasks/1")
     assert res.status_code == 204
+
+def test_get_projects():
+    res = test_client.get("/projects")
+    assert res.status_code == 200
+    res_data = res.json()
+    assert len(res_data) == 1
+    assert res.headers["X-Total-Count"] == "1"
+
+def test_row_count_cache():
+    row_count_cache = RowCountCache()
+    with Session(bind=connection) as session:
+        task_ops = SQLTaskOperations(session, row_count_cache)
+        total = task_ops.get_tasks_count()
+        assert row_count_cache.get("task") == total
+        task = task_ops.create_task(SQLTaskOperations.create_db_task_object(TaskBase(title="Counted", desc="Counted")))
+        assert task_ops.get_tasks_count() == total + 1
+        task_ops.delete_task(task)
+        assert row_count_cache.get("task") == total
+
+def test_get_tasks_cursor_pagination():
+    for deadline in ["2999-01-01", None, "2998-06-01"]:
+        test_client.post("/tasks", json={"title": "Cursor Task", "desc": "Cursor Description", "deadline": deadline})
+
+    for order_by in ["id", "deadline"]:
+        expected_ids = [task["id"] for task in test_client.get("/tasks", params={"order_by": order_by}).json()]
+        res = test_client.get("/tasks", params={"order_by": order_by, "limit": 2})
+        listed_ids = [task["id"] for task in res.json()]
+        while "X-Next-Cursor" in res.headers:
+            res = test_client.get("/tasks", params={"order_by": order_by, "limit": 2,
+                                                    "cursor": res.headers["X-Next-Cursor"]})
+            assert res.status_code == 200
+            assert "X-Total-Count" not in res.headers
+            listed_ids += [task["id"] for task in res.json()]
+        assert listed_ids == expected_ids
+
+def test_get_tasks_invalid_cursor():
+    res = test_client.get("/tasks", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+    assert "cursor" in res.json()["detail"]
+
+def test_update_project_tasks_ids():
+    project_id = test_client.post("/projects", json={"title": "Reassign Project", "deadline": "2999-01-02"}).json()["id"]
+    task_ids = [test_client.post("/tasks", json={"title": "Reassign Task", "desc": "Reassign Description",
+                                                 "project_id": project_id}).json()["id"] for _ in range(3)]
+
+    res = test_client.put(f"/projects/{project_id}", json={"tasks_ids": [task_ids[0], 2, 9999]})
+    assert res.status_code == 200
+    assert sorted(task["id"] for task in res.json()["tasks"]) == [2, task_ids[0]]
+    assert test_client.get(f"/tasks/{task_ids[1]}").json()["project_id"] is None
+
+def test_export_tasks():
+    res = test_client.get("/tasks/export")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert len(rows) == int(test_client.get("/tasks").headers["X-Total-Count"])
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert {"id", "title", "desc", "deadline", "completed", "project_id"} == set(rows[0])
+
+def test_export_projects():
+    res = test_client.get("/projects/export")
+    assert res.status_code == 200
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert rows[0] == {"id": 1, "title": "Basic Project", "deadline": "2999-01-02"}
+
+def test_batch_tasks():
+    res = test_client.post("/tasks/batch", json=[
+        {"title": "Batch Task", "desc": "Batch Description", "project_id": 1, "deadline": "2999-01-01"},
+        {"title": "Batch Task", "desc": "Batch Description", "project_id": 1, "deadline": "3000-01-01"},
+        {"title": "", "desc": "Batch Description"},
+        {"title": "Batch Task", "desc": "Batch Description", "project_id": 9999},
+    ])
+    assert res.status_code == 200
+    results = res.json()
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert results[0]["error"] is None
+    assert "longer than projects deadline" in results[1]["error"]
+    assert "not null / empty" in results[2]["error"]
+    assert "non-existent project" in results[3]["error"]
+    created_id = results[0]["id"]
+    assert [result["id"] for result in results[1:]] == [None, None, None]
+
+    res = test_client.patch("/tasks/batch", json=[
+        {"id": created_id, "completed": True},
+        {"id": 9999, "completed": True},
+        {"id": created_id, "title": "Repeated"},
+    ])
+    assert res.status_code == 200
+    assert [result["error"] is None for result in res.json()] == [True, False, False]
+    task = test_client.get(f"/tasks/{created_id}").json()
+    assert task["completed"] and task["title"] == "Batch Task" and task["project_id"] == 1
+
+    res = test_client.request("DELETE", "/tasks/batch", json=[created_id, 9999])
+    assert res.status_code == 200
+    assert [result["error"] is None for result in res.json()] == [True, False]
+    assert test_client.get(f"/tasks/{created_id}").status_code == 400
+
+def test_batch_projects():
+    res = test_client.post("/projects/batch", json=[{"title": "Batch Project", "deadline": "2999-01-02"},
+                                                    {"title": "Batch Project", "deadline": "2000-01-01"}])
+    assert res.status_code == 200
+    created, invalid = res.json()
+    assert created["error"] is None and "in the past" in invalid["error"]
+
+    task_id = test_client.post("/tasks", json={"title": "Batch Task", "desc": "Batch Description",
+                                               "deadline": "2999-01-01", "project_id": created["id"]}).json()["id"]
+    res = test_client.patch("/projects/batch", json=[{"id": created["id"], "deadline": "2998-01-01"},
+                                                     {"id": created["id"] + 1, "title": "Missing"}])
+    assert "shorter than deadline for tasks" in res.json()[0]["error"]
+    assert "does not exist" in res.json()[1]["error"]
+
+    res = test_client.request("DELETE", "/projects/batch", json=[created["id"]])
+    assert res.json()[0]["error"] is None
+    assert test_client.get(f"/tasks/{task_id}").json()["project_id"] is None
+
+def test_project_deadline_lists_capped_offending_tasks():
+    project_id = test_client.post("/projects", json={"title": "Long Project", "deadline": "2999-12-31"}).json()["id"]
+    test_client.post("/tasks/batch", json=[{"title": f"Long Task {day}", "desc": "Long Description",
+                                            "deadline": f"2999-06-{day:02}", "project_id": project_id}
+                                           for day in range(1, 16)])
+
+    res = test_client.put(f"/projects/{project_id}", json={"deadline": "2999-06-10"})
+    assert res.status_code == 400
+    detail = res.json()["detail"]
+    assert detail.startswith("Provided deadline 2999-06-10 is shorter than deadline for tasks ['Long Task 15'")
+    assert detail.count("Long Task") == 5 and not detail.endswith("and more.")
+
+    res = test_client.patch("/projects/batch", json=[{"id": project_id, "deadline": "2999-05-01"}])
+    assert res.json()[0]["error"].count("Long Task") == MAX_REPORTED_TASKS
+    assert res.json()[0]["error"].endswith("and more.")
+    assert test_client.put(f"/projects/{project_id}", json={"deadline": "2999-06-15"}).status_code == 200
+
+def test_batch_size_limit():
+    res = test_client.request("DELETE", "/tasks/batch", json=list(range(MAX_BATCH_SIZE + 1)))
+    assert res.status_code == 400
+
+def test_deadline_range_queries():
+    project_id = test_client.post("/projects", json={"title": "Range Project", "deadline": "2999-12-31"}).json()["id"]
+    test_client.post("/tasks/batch", json=[
+        {"title": "Range Task", "desc": "Range Description", "deadline": deadline, "completed": completed,
+         "project_id": project_id}
+        for deadline, completed in [("2999-03-01", False), ("2999-01-01", False), ("2999-02-01", True), (None, False)]
+    ])
+
+    def deadlines(path: str, **params) -> list[str]:
+        res = test_client.get(path, params={"project_id": project_id, **params})
+        assert res.status_code == 200
+        return [task["deadline"] for task in res.json()]
+
+    assert deadlines("/tasks/deadlines") == ["2999-01-01", "2999-02-01", "2999-03-01"]
+    assert deadlines("/tasks/deadlines", after="2999-01-15") == ["2999-02-01", "2999-03-01"]
+    assert deadlines("/tasks/deadlines", completed=False) == ["2999-01-01", "2999-03-01"]
+    assert deadlines("/tasks/deadlines", before="2999-02-01", limit=1) == ["2999-01-01"]
+    assert deadlines("/tasks/deadlines", within_days=30) == []
+    assert deadlines("/tasks/upcoming", n=2) == ["2999-01-01", "2999-03-01"]
+    assert deadlines("/tasks/overdue") == []
+    assert test_client.get("/tasks/deadlines", params={"after": "2999-02-01", "before": "2999-01-01"}).status_code == 400
+
+def test_project_stats():
+    project_id = test_client.post("/projects", json={"title": "Stats Project", "deadline": "2999-12-31"}).json()["id"]
+    other_id = test_client.post("/projects", json={"title": "Other Stats", "deadline": "2999-12-31"}).json()["id"]
+
+    def stats(_id: int) -> tuple:
+        res = test_client.get(f"/projects/{_id}/stats").json()
+        return res["total"], res["completed"], res["open"], res["overdue"], res["earliest_open_deadline"]
+
+    task_ids = [test_client.post("/tasks", json={"title": "Stats Task", "desc": "Stats", "deadline": deadline,
+                                                 "project_id": project_id}).json()["id"]
+                for deadline in ["2999-03-01", "2999-01-01", None]]
+    test_client.post("/tasks/batch", json=[{"title": "Done Task", "desc": "Stats", "completed": True,
+                                            "project_id": project_id}])
+    assert stats(project_id) == (4, 1, 3, 0, "2999-01-01")
+
+    test_client.put(f"/tasks/{task_ids[1]}", json={"completed": True})
+    test_client.put(f"/tasks/{task_ids[2]}", json={"project_id": other_id})
+    test_client.patch("/tasks/batch", json=[{"id": task_ids[0], "deadline": "2999-04-01"}])
+    assert stats(project_id) == (3, 2, 1, 0, "2999-04-01")
+    assert stats(other_id) == (1, 0, 1, 0, None)
+
+    test_client.put(f"/projects/{other_id}", json={"tasks_ids": [task_ids[0]]})
+    assert stats(project_id) == (2, 2, 0, 0, None)
+    assert stats(other_id) == (1, 0, 1, 0, "2999-04-01")
+    test_client.delete(f"/tasks/{task_ids[1]}")
+    assert stats(project_id) == (1, 1, 0, 0, None)
+
+    res = test_client.get("/projects/stats", params={"limit": 1, "cursor": encode_cursor("id", project_id - 1)})
+    assert [row["project_id"] for row in res.json()] == [project_id]
+    res = test_client.get("/projects/stats", params={"cursor": res.headers["X-Next-Cursor"]})
+    assert res.json()[0]["project_id"] == other_id
+    test_client.delete(f"/projects/{other_id}")
+    assert test_client.get(f"/projects/{other_id}/stats").status_code == 400
+
+def test_project_stats_overdue_and_rebuild():
+    with Session(bind=connection) as session:
+        project_ops = SQLProjectOperations(session)
+        project_id = project_ops.create_project(Project(title="Overdue Stats", deadline=date(2999, 1, 1))).id
+        session.add_all([Task(title="Overdue", desc="Overdue", deadline=date(2001, 1, day), project_id=project_id)
+                         for day in (1, 1, 2)])
+        session.commit()
+        expected = project_ops.get_project_stats(project_id, today=date.today())
+        assert (expected.overdue, expected.earliest_open_deadline) == (3, date(2001, 1, 1))
+        assert project_ops.get_project_stats(project_id, today=date(2001, 1, 2)).overdue == 2
+
+        session.exec(update(ProjectTaskStats).values(total=0))
+        session.commit()
+        project_ops.rebuild_project_stats()
+        assert project_ops.get_project_stats(project_id, today=date.today()) == expected
+
+def test_search_tasks():
+    project_id = test_client.post("/projects", json={"title": "Search Project", "deadline": "2999-12-31"}).json()["id"]
+    tasks = [("Invoice reminders", "Send invoices to customers", project_id),
+             ("Customer call", "Discuss the invoice", project_id),
+             ("Invoicing system", "Pick a vendor", None)]
+    ids = [test_client.post("/tasks", json={"title": title, "desc": desc, "project_id": project}).json()["id"]
+           for title, desc, project in tasks]
+
+    def search(**params) -> list[int]:
+        res = test_client.get("/tasks/search", params=params)
+        assert res.status_code == 200
+        return [task["id"] for task in res.json()]
+
+    assert search(q="invoice") == [ids[0], ids[1]]
+    assert search(q="INVOIC*") == [ids[0], ids[2], ids[1]]
+    assert sorted(search(q="invoic* customer*")) == [ids[0], ids[1]]
+    assert search(q="invoic*", project_id=project_id) == [ids[0], ids[1]]
+
+    first = test_client.get("/tasks/search", params={"q": "invoic*", "limit": 2})
+    assert [task["id"] for task in first.json()] == ids[:3:2]
+    assert "X-Truncated" not in first.headers
+    assert search(q="invoic*", limit=2, cursor=first.headers["X-Next-Cursor"]) == [ids[1]]
+    # tasks created after the first page are left to the next search
+    late_id = test_client.post("/tasks", json={"title": "Invoice", "desc": "Late invoice"}).json()["id"]
+    assert late_id not in search(q="invoic*", limit=3, cursor=first.headers["X-Next-Cursor"])
+    test_client.delete(f"/tasks/{late_id}")
+    assert test_client.get("/tasks/search", params={"q": "vendor", "cursor": first.headers["X-Next-Cursor"]}
+                           ).status_code == 400
+    assert test_client.get("/tasks/search", params={"q": '"*'}).status_code == 400
+
+    test_client.put(f"/tasks/{ids[1]}", json={"desc": "Discuss the offer"})
+    test_client.delete(f"/tasks/{ids[2]}")
+    assert search(q="invoic*") == [ids[0]]
+    assert search(q="offer") == [ids[1]]
+
+def test_search_ranks_newest_matches(monkeypatch):
+    monkeypatch.setattr("tmt.services.MAX_RANKED_MATCHES", 2)
+    ids = [test_client.post("/tasks", json={"title": title, "desc": "Capped search"}).json()["id"]
+           for title in ("Capped capped capped", "Capped", "Capped")]
+
+    first = test_client.get("/tasks/search", params={"q": "capped", "limit": 1})
+    assert [task["id"] for task in first.json()] == [ids[1]]
+    assert first.headers["X-Truncated"] == "true"
+    # the best ranked task is not among the newest matches of following pages either
+    res = test_client.get("/tasks/search", params={"q": "capped", "cursor": first.headers["X-Next-Cursor"]})
+    assert [task["id"] for task in res.json()] == [ids[2]]
+    assert res.headers["X-Truncated"] == "true"
+
+def test_changes():
+    since = int(test_client.get("/changes").headers["X-Last-Seq"])
+    project_id = test_client.post("/projects", json={"title": "Synced Project", "deadline": "2999-12-31"}).json()["id"]
+    task_id = test_client.post("/tasks", json={"title": "Synced Task", "desc": "Synced",
+                                               "project_id": project_id}).json()["id"]
+    test_client.put(f"/tasks/{task_id}", json={"title": "Renamed Task"})
+    removed_id = test_client.post("/tasks", json={"title": "Removed Task", "desc": "Removed"}).json()["id"]
+    test_client.delete(f"/tasks/{removed_id}")
+
+    def changes(**params) -> list[tuple[str, int, bool]]:
+        res = test_client.get("/changes", params=params)
+        assert res.status_code == 200
+        return [(change["entity"], change["entity_id"], change["deleted"]) for change in res.json()]
+
+    # only the latest change of every row, removed task as tombstone
+    res = test_client.get("/changes", params={"since": since})
+    assert changes(since=since) == [("project", project_id, False), ("task", task_id, False), ("task", removed_id, True)]
+    assert res.json()[0]["project"]["title"] == "Synced Project"
+    assert res.json()[1]["task"]["title"] == "Renamed Task"
+    assert res.json()[2]["task"] is None
+    last_seq = res.json()[-1]["seq"]
+    assert res.headers["X-Last-Seq"] == str(last_seq)
+
+    first = test_client.get("/changes", params={"since": since, "limit": 2})
+    assert changes(since=first.headers["X-Next-Cursor"]) == [("task", removed_id, True)]
+
+    # tasks of deleted project lose their project_id before it is deleted
+    test_client.delete(f"/projects/{project_id}")
+    assert changes(since=last_seq) == [("task", task_id, False), ("project", project_id, True)]
+    res = test_client.get("/changes", params={"since": last_seq + 10})
+    assert res.status_code == 410
+    assert res.headers["X-Last-Seq"] == test_client.get("/changes").headers["X-Last-Seq"]
+
+def test_change_stream(monkeypatch):
+    monkeypatch.setattr("tmt.main.CHANGE_POLL_SECONDS", 0.01)
+    monkeypatch.setattr("tmt.main.CHANGE_STREAM_SECONDS", 0.1)
+    since = int(test_client.get("/changes").headers["X-Last-Seq"])
+    task_id = test_client.post("/tasks", json={"title": "Streamed Task", "desc": "Streamed"}).json()["id"]
+    test_client.delete(f"/tasks/{task_id}")
+
+    res = test_client.get("/changes/stream", params={"since": since})
+    assert res.headers["Content-Type"].startswith("text/event-stream")
+    events = [event.split("\n") for event in res.text.split("\n\n") if event]
+    assert len(events) == 1
+    seq, name, data = events[0]
+    assert name == "event: change"
+    assert json.loads(data.removeprefix("data: "))["entity_id"] == task_id
+    assert json.loads(data.removeprefix("data: "))["deleted"]
+
+    # reconnecting client continues after the last received event
+    assert test_client.get("/changes/stream", headers={"Last-Event-ID": seq.removeprefix("id: ")}).text == ""
+    assert test_client.get("/changes/stream", headers={"Last-Event-ID": "x"}).status_code == 400
+
+def test_compact_changes(change_ops: ChangeOperations | None = None):
+    with Session(bind=connection) as session:
+        change_ops = change_ops or SQLChangeOperations(session)
+        service = ChangeService(change_ops)
+        ids = [test_client.post("/tasks", json={"title": "Compacted Task", "desc": "Compacted"}).json()["id"]
+               for _ in range(3)]
+        test_client.put(f"/tasks/{ids[0]}", json={"completed": True})
+        last_seq = service.get_last_seq()
+
+        # superseded creation of the first task is removed, then all but the 3 latest changes
+        assert service.compact_changes(keep=3) > 0
+        compacted_seq, _ = change_ops.get_change_bounds()
+        assert compacted_seq < last_seq - 2
+        assert [change.entity_id for change in service.get_changes(since=compacted_seq, limit=10).items] == \
+               [ids[1], ids[2], ids[0]]
+        try:
+            service.get_changes(since=compacted_seq - 1, limit=10)
+            assert False, "changes before compacted seq were served"
+        except ChangesUnavailableError:
+            pass
+        assert service.get_last_seq() == last_seq
+
+def test_etags(monkeypatch, versions: ChangeVersions | None = None):
+    monkeypatch.setattr("tmt.main.change_versions", versions or ChangeVersions())
+    project_id = test_client.post("/projects", json={"title": "Polled Project", "deadline": "2999-12-31"}).json()["id"]
+    other_id = test_client.post("/projects", json={"title": "Other Project", "deadline": "2999-12-31"}).json()["id"]
+    task_id = test_client.post("/tasks", json={"title": "Polled Task", "desc": "Polled", "deadline": "2999-01-01",
+                                               "project_id": project_id}).json()["id"]
+
+    def poll(url: str, etag: str | None = None, **params) -> tuple[int, str]:
+        headers = {"If-None-Match": etag} if etag else {}
+        res = test_client.get(url, params=params, headers=headers)
+        return res.status_code, res.headers["ETag"]
+
+    status, tasks_etag = poll("/tasks")
+    assert status == 200
+    with QueryCounter(test_engine) as counter:
+        assert poll("/tasks", tasks_etag) == (304, tasks_etag)
+    assert counter.count == 0
+    _, project_etag = poll(f"/projects/{project_id}")
+    _, deadlines_etag = poll("/tasks/deadlines", project_id=project_id)
+    assert poll("/projects", f'"other", {tasks_etag}')[0] == 304
+
+    # changes of other project don't touch versions of the polled one
+    test_client.post("/tasks", json={"title": "Other Task", "desc": "Other", "project_id": other_id})
+    assert poll("/tasks", tasks_etag)[0] == 200
+    assert poll(f"/projects/{project_id}", project_etag)[0] == 304
+    assert poll("/tasks/deadlines", deadlines_etag, project_id=project_id)[0] == 304
+
+    test_client.put(f"/tasks/{task_id}", json={"project_id": other_id})
+    assert poll(f"/projects/{project_id}", project_etag)[0] == 200
+    status, project_etag = poll(f"/projects/{project_id}")
+    test_client.patch("/tasks/batch", json=[{"id": task_id, "project_id": project_id}])
+    assert poll(f"/projects/{project_id}", project_etag)[0] == 200
+    assert test_client.get(f"/tasks/{task_id}").json()["project_id"] == project_id
+    assert test_client.get("/tasks/999999").status_code == 400
+
+def test_listing_query_count_does_not_depend_on_page_size():
+    for path in ["/tasks", "/projects"]:
+        counts = []
+        for limit in [1, 2]:
+            with QueryCounter(test_engine) as counter:
+                res = test_client.get(path, params={"limit": limit})
+            assert len(res.json()) == limit
+            counts.append(counter.count)
+        assert counts[0] == counts[1] <= 3
+
+def test_fast_serialization(monkeypatch):
+    project = {"title": "Serialized Project", "deadline": "2999-12-31"}
+    project_id = test_client.post("/projects", json=project).json()["id"]
+    test_client.post("/tasks/batch", json=[{"title": f"Serialized Task {i}", "desc": "Serialized",
+                                            "project_id": project_id, "deadline": "2999-06-01" if i % 2 else None}
+                                           for i in range(3)])
+    cursor = test_client.get("/tasks", params={"limit": 1, "order_by": "deadline"}).headers["X-Next-Cursor"]
+    requests = [("/tasks", {"limit": 2}), ("/tasks", {"limit": 3, "order_by": "deadline", "cursor": cursor}),
+                ("/tasks/deadlines", {"project_id": project_id}), ("/tasks/upcoming", {"n": 100}),
+                ("/projects", {"limit": 100})]
+
+    def get_all() -> list[tuple[list, str | None, str | None]]:
+        responses = [test_client.get(path, params=params) for path, params in requests]
+        return [(res.json(), res.headers.get("X-Total-Count"), res.headers.get("X-Next-Cursor")) for res in responses]
+
+    standard = get_all()
+    monkeypatch.setattr("tmt.main.fast_serialization", True)
+    assert get_all() == standard
+
+def test_overdue_tasks_use_deadline_indexes():
+    with Session(bind=connection) as session:
+        # past deadlines can't be posted through API
+        session.add(Task(title="Overdue Task", desc="Overdue Description", deadline=date(2000, 1, 1)))
+        session.commit()
+    assert test_client.get("/tasks/overdue").json()[0]["title"] == "Overdue Task"
+
+    for filters, index in [({"completed": False}, "ix_task_completed_deadline"),
+                           ({"project_id": 1}, "ix_task_project_id_deadline")]:
+        statement = deadline_range_statement(**{"before": date.today(), "after": None, "completed": None,
+                                                "project_id": None, "limit": 10, **filters})
+        sql = statement.compile(test_engine, compile_kwargs={"literal_binds": True})
+        plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+        assert index in plan
+        assert "TEMP B-TREE" not in plan
+
+def test_metrics():
+    instrument_engine(test_engine)
+    res = test_client.post("/tasks", json={"title": "Metrics Task", "desc": "Metrics"})
+    assert res.status_code == 201
+    assert test_client.put(f"/tasks/{res.json()['id']}", json={"desc": "Measured"}).status_code == 200
+    res = test_client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = res.text.splitlines()
+    assert any(line.startswith('tmt_request_duration_seconds_count{method="PUT",route="/tasks/{_id}",status="200"}')
+               for line in lines)
+    assert any(line.startswith('tmt_request_sql_statements_sum{method="POST",route="/tasks"}') for line in lines)
+    assert any(line.startswith('tmt_sql_statement_duration_seconds_bucket{statement="INSERT",le="+Inf"}')
+               for line in lines)
+
+    # test sessions join transaction of shared connection, commit is measured on engine of its own
+    commit_engine = create_engine("sqlite://")
+    instrument_engine(commit_engine)
+    SQLModel.metadata.create_all(commit_engine)
+    with Session(commit_engine) as session:
+        session.add(Task(title="Committed Task", desc="Metrics"))
+        session.commit()
+    assert any(line.startswith("tmt_commit_duration_seconds_count ") for line in render_metrics().splitlines())
+
+def test_slow_request_log_and_profiler(caplog):
+    config = MetricsConfig(slow_request_ms=0.001, profiling_enabled=True)
+    client = TestClient(MetricsMiddleware(tmt, config))
+    with caplog.at_level("WARNING", logger="tmt.metrics"):
+        assert client.get("/tasks", params={"limit": 1}).status_code == 200
+    assert "Slow request GET /tasks" in caplog.text
+    assert "FROM task" in caplog.text
+
+    res = client.get("/tasks", params={"limit": 1}, headers={"X-Profile": "1"})
+    assert res.status_code == 200
+    assert res.headers["X-Profiled-Status"] == "200"
+    assert res.text.split("\n", 1)[0].endswith("ms")
+
+def test_engine_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv("TMT_SQLITE_BUSY_TIMEOUT", "1234")
+    profile = EngineProfile.from_env()
+    assert profile.busy_timeout == 1234
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.sqlite'}")
+    with engine.connect() as connection:
+        profile.apply(connection.connection.dbapi_connection)
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+
+def test_lru_ttl_cache():
+    now = [0.0]
+    cache = LRUTTLCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1, tags=["x"])
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts least recently used "b"
+    assert cache.get("b") is None
+    cache.invalidate_tags(["x"])
+    assert cache.get("a") is None
+    now[0] = 11
+    assert cache.get("c") is None
+    assert cache.stats().hits == 1
+    assert cache.stats().evictions == 1
+
+def test_cached_operations():
+    operations_cache = OperationsCache(CacheConfig(enabled=True))
+    with Session(bind=connection) as session:
+        project_ops = CachedProjectOperations(SQLProjectOperations(session), operations_cache)
+        task_ops = CachedTaskOperations(SQLTaskOperations(session), operations_cache)
+        project_ops.get_project_by_id(1)
+        project_ops.get_projects(offset=0, limit=5)
+        task_ops.get_tasks(offset=0, limit=5)
+
+    with Session(bind=connection) as session:
+        project_ops = CachedProjectOperations(SQLProjectOperations(session), operations_cache)
+        task_ops = CachedTaskOperations(SQLTaskOperations(session), operations_cache)
+        with QueryCounter(test_engine) as counter:
+            project = project_ops.get_project_by_id(1)
+            tasks = [TaskRead.model_validate(task) for task in task_ops.get_tasks(offset=0, limit=5)]
+        assert counter.count == 0
+        assert project.title == "Basic Project"
+        assert any(task.project is not None for task in tasks)
+        with QueryCounter(test_engine) as counter:
+            assert project_ops.get_deadlines([1]) == {1: project.deadline}
+        assert counter.count == 0
+
+        project_ops.apply_update(project, ProjectUpdate(title="Cached Project"))
+        project_ops.update_project(project)
+        assert operations_cache.projects.get(1) is None
+        assert project_ops.get_projects(offset=0, limit=5)[0].title == "Cached Project"
+        project_ops.apply_update(project, ProjectUpdate(title="Basic Project"))
+        project_ops.update_project(project)
+        assert project_ops.get_deadlines([1, 9999]) == {1: project.deadline}
+        assert operations_cache.projects.get(1)["title"] == "Basic Project"
+
+def test_cached_task_of_deleted_project(monkeypatch):
+    monkeypatch.setattr("tmt.main.operations_cache", OperationsCache(CacheConfig(enabled=True)))
+    monkeypatch.setattr("tmt.main.fast_serialization", False)
+    project_id = test_client.post("/projects", json={"title": "Doomed Project", "deadline": "2999-12-31"}).json()["id"]
+    task_id = test_client.post("/tasks", json={"title": "Orphaned Task", "desc": "Orphaned",
+                                               "project_id": project_id}).json()["id"]
+    assert test_client.get(f"/tasks/{task_id}").json()["project_id"] == project_id
+
+    assert test_client.delete(f"/projects/{project_id}").status_code == 204
+    assert test_client.get(f"/tasks/{task_id}").json()["project_id"] is None
+    assert test_client.put(f"/tasks/{task_id}", json={"completed": True}).status_code == 200
+
+
+
+
+
+
+
+def test_sparse_fieldsets():
+    project_id = test_client.post("/projects", json={"title": "Sparse Project", "deadline": "2999-12-31"}).json()["id"]
+    task_id = test_client.post("/tasks", json={"title": "Sparse Task", "desc": "Sparse", "deadline": "2999-05-01",
+                                               "project_id": project_id}).json()["id"]
+
+    def get(url: str, **params):
+        res = test_client.get(url, params=params)
+        assert res.status_code == 200
+        return res
+
+    assert get(f"/tasks/{task_id}", fields="title,completed").json() == \
+           {"id": task_id, "title": "Sparse Task", "completed": False}
+    task = get(f"/tasks/{task_id}", fields="title", expand="project").json()
+    assert task == {"id": task_id, "title": "Sparse Task",
+                    "project": {"id": project_id, "title": "Sparse Project", "deadline": "2999-12-31"}}
+    assert get(f"/tasks/{task_id}", expand="").json().keys() == \
+           {"id", "title", "desc", "deadline", "completed", "project_id"}
+    assert get(f"/tasks/{task_id}").json()["project"]["id"] == project_id
+
+    res = get("/tasks", fields="title", limit=2)
+    assert all(task.keys() == {"id", "title"} for task in res.json())
+    assert "X-Total-Count" in res.headers
+    res = get("/tasks", fields="title", order_by="deadline", limit=1)
+    assert res.json()[0].keys() == {"id", "title", "deadline"}
+    get("/tasks", fields="title", order_by="deadline", cursor=res.headers["X-Next-Cursor"])
+    assert get("/tasks/deadlines", project_id=project_id, fields="deadline").json() == \
+           [{"id": task_id, "deadline": "2999-05-01"}]
+
+    assert get(f"/projects/{project_id}", fields="title").json() == {"id": project_id, "title": "Sparse Project"}
+    project = get(f"/projects/{project_id}", fields="title", expand="tasks").json()
+    assert [task["id"] for task in project["tasks"]] == [task_id]
+    first_ids = [{"id": project["id"]} for project in get("/projects", limit=1).json()]
+    assert get("/projects", fields="id", limit=1).json() == first_ids
+
+    assert test_client.get("/tasks", params={"fields": "title,secret"}).status_code == 400
+    assert test_client.get(f"/projects/{project_id}", params={"expand": "project"}).status_code == 400
+
+def test_sparse_fieldsets_are_pushed_down():
+    project_fields = FieldSet(columns=("title", "id"))
+    with Session(bind=connection) as session:
+        with QueryCounter(test_engine) as counter:
+            projects = SQLProjectOperations(session, field_set=project_fields).get_projects(offset=0, limit=5)
+        assert counter.count == 1
+        assert all(project.keys() == {"title", "id"} for project in projects)
+        with QueryCounter(test_engine) as counter:
+            SQLProjectOperations(session, field_set=FieldSet(columns=("id",), expand=("tasks",))).get_projects(0, 5)
+        assert counter.count == 2
+
+        task_ops = SQLTaskOperations(session, field_set=FieldSet(columns=("id",)))
+        assert "JOIN" not in str(task_ops._select())
+        ids = [task.id for task in SQLTaskOperations(session).get_tasks(offset=0, limit=2)]
+        assert task_ops.get_tasks(offset=0, limit=2) == [{"id": _id} for _id in ids]
+        assert task_ops.get_task_by_id(ids[0]) == {"id": ids[0]}
+        assert task_ops.get_task_by_id(0) is None
+
+def test_archive_tasks(monkeypatch, task_service: TaskService | None = None):
+    project_id = test_client.post("/projects", json={"title": "Archive Project", "deadline": "2999-12-31"}).json()["id"]
+    done_id, open_id = [test_client.post("/tasks", json={"title": "Archive Task", "desc": "Archive", "completed": completed,
+                                                         "deadline": deadline, "project_id": project_id}).json()["id"]
+                        for completed, deadline in [(True, "2999-02-01"), (False, "2999-02-02")]]
+
+    def count(**params) -> int:
+        return int(test_client.get("/tasks", params=params).headers["X-Total-Count"])
+
+    def deadline_ids(**params) -> list[int]:
+        return [task["id"] for task in test_client.get("/tasks/deadlines", params={"project_id": project_id,
+                                                                                   **params}).json()]
+
+    def total() -> int:
+        return test_client.get(f"/projects/{project_id}/stats").json()["total"]
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls) -> date:
+            return date.today() + timedelta(days=1)
+
+    tasks_count, all_count = count(), count(include_archived=True)
+    assert tasks_count == all_count
+    monkeypatch.setattr("tmt.services.date", Tomorrow)
+    with Session(bind=connection) as session:
+        task_service = task_service or TaskService(SQLTaskOperations(session), SQLProjectOperations(session))
+        assert task_service.archive_completed_tasks(1) == 0
+        archived = task_service.archive_completed_tasks(0, batch_size=2)
+    assert archived > 0
+    assert (count(), count(include_archived=True)) == (tasks_count - archived, all_count)
+    assert test_client.get(f"/tasks/{done_id}").status_code == 400
+    res = test_client.get(f"/tasks/{done_id}", params={"include_archived": True})
+    assert res.status_code == 200
+    assert res.json()["completed"] and res.json()["project"]["id"] == project_id
+    assert deadline_ids() == [open_id]
+    assert deadline_ids(include_archived=True) == [done_id, open_id]
+    assert total() == 2
+
+    assert test_client.delete(f"/tasks/{open_id}", params={"archive": True}).status_code == 204
+    assert test_client.get(f"/tasks/{open_id}", params={"include_archived": True}).status_code == 400
+    assert deadline_ids(include_archived=True) == [done_id]
+    assert count(include_archived=True) == all_count - 1
+    assert total() == 1
+
+    # archived task is deleted from archive
+    assert test_client.delete(f"/tasks/{done_id}").status_code == 204
+    assert test_client.get(f"/tasks/{done_id}", params={"include_archived": True}).status_code == 400
+    assert test_client.delete(f"/tasks/{done_id}", params={"archive": True}).status_code == 400
+    assert count(include_archived=True) == all_count - 2
+    assert total() == 0
+
+def test_task_table_is_rebuilt_with_autoincrement():
+    engine = create_engine("sqlite://")
+    with engine.begin() as old_connection:
+        # task table of database created before archive
+        old_connection.exec_driver_sql('CREATE TABLE task (title VARCHAR NOT NULL, "desc" VARCHAR NOT NULL, '
+                                       'deadline DATE, completed BOOLEAN NOT NULL, project_id INTEGER, '
+                                       'id INTEGER NOT NULL PRIMARY KEY)')
+        old_connection.exec_driver_sql("""INSERT INTO task (title, "desc", completed, id)
+                                       VALUES ('First', 'Done', 1, 1), ('Latest', 'Done', 1, 2)""")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        task_ops = SQLTaskOperations(session)
+        assert task_ops.archive_tasks([2]) == [2]
+        task = task_ops.create_task(Task(title="New", desc="Done", completed=True))
+        assert task.id == 3
+        assert task_ops.archive_tasks([task.id]) == [task.id]
+        assert task_ops.search_tasks(["first"], limit=10)[0][0].id == 1
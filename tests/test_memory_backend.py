@@ -0,0 +1,110 @@
+from datetime import date
+
+import pytest
+
+from tests import test_main as sql_suite
+from tmt.crud_memory import MemoryChangeOperations, MemoryProjectOperations, MemoryStore, MemoryTaskOperations
+from tmt.crud_sql import ChangeVersions
+from tmt.main import (get_change_service, get_project_read_service, get_project_service, get_project_view_service,
+                      get_task_list_service, get_task_read_service, get_task_service, get_task_view_service, tmt)
+from tmt.models import Task, TaskUpdate
+from tmt.services import ChangeService, ProjectService, TaskService
+
+
+# API tests of SQL backend, run in the same order against memory backend
+API_TESTS = [
+    sql_suite.test_create_task,
+    sql_suite.test_create_project,
+    sql_suite.test_create_deadline_task,
+    sql_suite.test_get_tasks,
+    sql_suite.test_get_tasks_with_deadlines,
+    sql_suite.test_update_task,
+    sql_suite.test_invalid_deadline_update_task,
+    sql_suite.test_invalid_project_id_update_task,
+    sql_suite.test_delete_task,
+    sql_suite.test_get_projects,
+    sql_suite.test_get_tasks_cursor_pagination,
+    sql_suite.test_get_tasks_invalid_cursor,
+    sql_suite.test_update_project_tasks_ids,
+    sql_suite.test_export_tasks,
+    sql_suite.test_export_projects,
+    sql_suite.test_batch_tasks,
+    sql_suite.test_batch_projects,
+    sql_suite.test_project_deadline_lists_capped_offending_tasks,
+    sql_suite.test_batch_size_limit,
+    sql_suite.test_deadline_range_queries,
+    sql_suite.test_project_stats,
+    sql_suite.test_search_tasks,
+    sql_suite.test_changes,
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def memory_backend():
+    store = MemoryStore()
+
+    def project_service() -> ProjectService:
+        return ProjectService(MemoryProjectOperations(store), MemoryTaskOperations(store))
+
+    def task_service() -> TaskService:
+        return TaskService(MemoryTaskOperations(store), MemoryProjectOperations(store))
+
+    def change_service() -> ChangeService:
+        return ChangeService(MemoryChangeOperations(store))
+
+    overrides = {get_project_service: project_service, get_project_read_service: project_service,
+                 get_project_view_service: project_service, get_task_service: task_service,
+                 get_task_read_service: task_service, get_task_view_service: task_service,
+                 get_task_list_service: task_service, get_change_service: change_service}
+    tmt.dependency_overrides.update(overrides)
+    yield store
+    for dependency in overrides:
+        del tmt.dependency_overrides[dependency]
+
+
+@pytest.mark.parametrize("api_test", API_TESTS, ids=[test.__name__ for test in API_TESTS])
+def test_api(api_test):
+    api_test()
+
+
+def test_search_ranks_newest_matches(memory_backend, monkeypatch):
+    sql_suite.test_search_ranks_newest_matches(monkeypatch)
+
+
+def test_change_stream(memory_backend, monkeypatch):
+    sql_suite.test_change_stream(monkeypatch)
+
+
+def test_compact_changes(memory_backend):
+    sql_suite.test_compact_changes(MemoryChangeOperations(memory_backend))
+
+
+def test_etags(memory_backend, monkeypatch):
+    versions = ChangeVersions()
+    monkeypatch.setattr(memory_backend, "change_versions", versions)
+    sql_suite.test_etags(monkeypatch, versions)
+
+
+def test_indexes_follow_updates(memory_backend):
+    task_ops = MemoryTaskOperations(memory_backend)
+    task = task_ops.create_task(Task(title="Indexed", desc="Indexed", project_id=1))
+    assert task.id in memory_backend.tasks_by_project[1]
+    assert task.id in memory_backend.no_deadline_ids
+
+    task = task_ops.update_task(task_ops.apply_update(task, TaskUpdate(deadline=date(2999, 1, 1), project_id=None)))
+    assert task.id not in memory_backend.tasks_by_project[1]
+    assert task.id not in memory_backend.no_deadline_ids
+    assert (task.deadline, task.id) in memory_backend.deadline_index
+
+    task_ops.delete_task(task)
+    assert (task.deadline, task.id) not in memory_backend.deadline_index
+    assert task_ops.get_task_by_id(task.id) is None
+
+
+def test_archive_tasks(memory_backend, monkeypatch):
+    sql_suite.test_archive_tasks(monkeypatch, TaskService(MemoryTaskOperations(memory_backend),
+                                                          MemoryProjectOperations(memory_backend)))
+
+
+def test_sparse_fieldsets(memory_backend):
+    sql_suite.test_sparse_fieldsets()
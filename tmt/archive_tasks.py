@@ -0,0 +1,74 @@
+"""Move tasks completed more than --completed-days ago from task table to archive, in transactions
+of --batch-size tasks. Archived tasks are read only with include_archived.
+
+    uv run python -m tmt.archive_tasks --completed-days 30
+
+The application runs the same job every TMT_ARCHIVE_INTERVAL_S seconds when it is set.
+"""
+import argparse
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlmodel import Session
+
+from .crud_sql import SQLProjectOperations, SQLTaskOperations
+from .database import create_db, engine, env_config
+from .services import ARCHIVE_BATCH_SIZE, TaskService
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ArchiveConfig:
+    """Archive settings, every field can be overridden by TMT_ARCHIVE_<FIELD> environment variable."""
+    completed_days: int = 30  # tasks completed earlier are archived
+    batch_size: int = ARCHIVE_BATCH_SIZE  # tasks per transaction
+    interval_s: float = 0  # period of archiving in application process, 0 disables it
+    soft_delete: bool = False  # DELETE /tasks/{id} archives task as deleted unless archive=false is passed
+
+    @classmethod
+    def from_env(cls) -> "ArchiveConfig":
+        return env_config(cls, "TMT_ARCHIVE_")
+
+
+class ArchiveJob:
+    """Daemon thread calling archive every interval_s seconds until stopped, failures are logged."""
+    def __init__(self, archive: Callable[[], int], interval_s: float):
+        self._archive = archive
+        self._interval_s = interval_s
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tmt-archive", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval_s):
+            try:
+                self._archive()
+            except Exception:
+                log.exception("Archiving completed tasks failed")
+
+
+def main() -> None:
+    config = ArchiveConfig.from_env()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--completed-days", type=int, default=config.completed_days)
+    parser.add_argument("--batch-size", type=int, default=config.batch_size)
+    args = parser.parse_args()
+
+    create_db()
+    with Session(engine) as session:
+        service = TaskService(SQLTaskOperations(session), SQLProjectOperations(session))
+        archived = service.archive_completed_tasks(args.completed_days, batch_size=args.batch_size)
+    print(f"{archived} tasks archived")
+
+
+if __name__ == "__main__":
+    main()
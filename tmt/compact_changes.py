@@ -0,0 +1,27 @@
+"""Bound size of change log: remove changes followed by later change of the same row, then all but --keep
+latest changes. Clients following changes from before the removed ones get 410 and read all rows again.
+
+    uv run python -m tmt.compact_changes --keep 100000
+"""
+import argparse
+
+from sqlmodel import Session
+
+from .crud_sql import SQLChangeOperations
+from .database import create_db, engine
+from .services import ChangeService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep", type=int, default=100000)
+    args = parser.parse_args()
+
+    create_db()
+    with Session(engine) as session:
+        removed = ChangeService(SQLChangeOperations(session)).compact_changes(keep=args.keep)
+    print(f"{removed} changes removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
-from .models import Project, ProjectBase, ProjectRead, ProjectUpdate, Task, TaskBase, TaskUpdate, TaskRead
+from collections.abc import AsyncIterator, Iterator
+from datetime import date
+
+from .models import (Change, Project, ProjectBase, ProjectRead, ProjectStats, ProjectUpdate, Task, TaskBase, TaskOrder,
+                     TaskUpdate, TaskRead)
 
 class ProjectOperations(ABC):
     @abstractmethod
@@ -10,10 +14,46 @@ class ProjectOperations(ABC):
     def get_projects(self, offset: int, limit: int) -> list[Project]:
         pass
 
+    @abstractmethod
+    def get_projects_after(self, limit: int, after_id: int) -> list[Project]:
+        """ Return up to limit projects with id greater than after_id, ordered by id."""
+        pass
+
+    @abstractmethod
+    def iter_projects(self, batch_size: int) -> Iterator[dict]:
+        """ Yield column values of every project ordered by id, fetching batch_size rows at a time."""
+        pass
+
     @abstractmethod
     def get_project_by_id(self, _id: int) -> Project:
         pass
 
+    @abstractmethod
+    def get_projects_by_ids(self, ids: list[int], with_tasks: bool = False) -> list[Project]:
+        """ Return existing projects with given ids in one query, tasks are loaded eagerly only when with_tasks is set."""
+        pass
+
+    @abstractmethod
+    def get_deadlines(self, ids: list[int]) -> dict[int, date]:
+        """ Map id of every existing project from ids to its deadline, without loading project objects."""
+        pass
+
+    @abstractmethod
+    def get_project_stats(self, _id: int, today: date) -> ProjectStats | None:
+        """ Return task counts of project kept up to date by every change of tasks, None when project doesn't exist.
+        Tasks with deadline before today are overdue."""
+        pass
+
+    @abstractmethod
+    def get_projects_stats_after(self, limit: int, after_id: int, today: date) -> list[ProjectStats]:
+        """ Return task counts of up to limit projects with id greater than after_id, ordered by id."""
+        pass
+
+    @abstractmethod
+    def rebuild_project_stats(self) -> None:
+        """ Recount task counts of all projects from their tasks and commit."""
+        pass
+
     @abstractmethod
     def create_project(self, project: ProjectBase) -> Project:
         pass
@@ -26,6 +66,27 @@ class ProjectOperations(ABC):
     def delete_project(self, project: Project) -> None:
         pass
 
+    @abstractmethod
+    def create_projects(self, rows: list[dict]) -> list[int]:
+        """ Insert column values of several projects with one statement and commit. Return their ids in the same order."""
+        pass
+
+    @abstractmethod
+    def update_projects(self, rows: list[dict]) -> None:
+        """ Write column values (including id) of several projects with one statement and commit."""
+        pass
+
+    @abstractmethod
+    def delete_projects(self, ids: list[int]) -> list[int]:
+        """ Delete projects with given ids, detach their tasks and commit. Return ids of deleted projects."""
+        pass
+
+    @abstractmethod
+    def restore_project(self, snapshot: dict) -> Project:
+        """ Return Project usable by this backend built from snapshot of its column (and loaded relationship) values,
+        without querying storage. Used to serve cached objects."""
+        pass
+
     @staticmethod
     @abstractmethod
     def apply_update(project: Project, project_update: ProjectUpdate) -> Project:
@@ -33,20 +94,78 @@ class ProjectOperations(ABC):
         pass
 
 class TaskOperations(ABC):
+    # include_archived reads also return archived tasks (not soft deleted ones), which keep ids of their tasks
+
+    @abstractmethod
+    def get_tasks_count(self, include_archived: bool = False) -> int:
+        pass
+
+    @abstractmethod
+    def get_task_by_id(self, _id: int, include_archived: bool = False) -> Task:
+        pass
+
+    @abstractmethod
+    def get_tasks_by_ids(self, ids: list[int]) -> list[Task]:
+        """ Return existing tasks with given ids in one query."""
+        pass
+
+    @abstractmethod
+    def get_tasks(self, offset: int, limit: int, order_by: TaskOrder = "id",
+                  include_archived: bool = False) -> list[Task]:
+        pass
+
+    @abstractmethod
+    def get_tasks_after(self, limit: int, after_id: int, after_deadline: date | None,
+                        order_by: TaskOrder = "id", include_archived: bool = False) -> list[Task]:
+        """ Return up to limit tasks that follow task (after_deadline, after_id) in order_by order.
+        Deadline order sorts tasks without deadline last."""
+        pass
+
+    @abstractmethod
+    def iter_tasks(self, batch_size: int) -> Iterator[dict]:
+        """ Yield column values of every task ordered by id, fetching batch_size rows at a time."""
+        pass
+
+    @abstractmethod
+    def get_tasks_with_deadlines(self, before: date | None = None, after: date | None = None,
+                                 completed: bool | None = None, project_id: int | None = None,
+                                 limit: int | None = None, include_archived: bool = False) -> list[Task]:
+        """ Return tasks with deadline between after and before (both inclusive), optionally filtered
+        by completed and project_id, ordered by (deadline, id). Limit None returns every matching task."""
+        pass
+
+    @abstractmethod
+    def get_max_deadlines(self, project_ids: list[int]) -> dict[int, date]:
+        """ Map id of every project from project_ids that has tasks with deadline to the latest of those deadlines.
+        Cost must not depend on number of tasks in the projects."""
+        pass
+
     @abstractmethod
-    def get_tasks_count(self) -> int:
+    def get_titles_after_deadline(self, deadlines: dict[int, date], limit: int) -> dict[int, list[str]]:
+        """ Map project id to titles of up to limit of its tasks with deadline later than deadline given
+        for the project, latest deadline first. Projects without such tasks are left out."""
         pass
 
     @abstractmethod
-    def get_task_by_id(self, _id: int) -> Task:
+    def search_tasks(self, terms: list[str], limit: int, project_id: int | None = None,
+                     after: tuple[float, int] | None = None, min_id: int = 0,
+                     max_id: int | None = None) -> list[tuple[Task, float]]:
+        """ Return up to limit tasks with min_id <= id <= max_id whose title or description holds every term (term
+        ending with * matches words starting with it) with their rank, best first: ordered by rank ascending, then
+        by id. Only tasks following after=(rank, id) are returned when it is given."""
         pass
 
     @abstractmethod
-    def get_tasks(self, offset: int, limit: int) -> list[Task]:
+    def get_search_window(self, terms: list[str], max_matches: int,
+                          project_id: int | None = None) -> tuple[int, int]:
+        """ Return (lowest, highest) bound of ids of max_matches tasks with the highest ids matched by terms,
+        lowest is 0 when no other task matches and highest is 0 when none matches."""
         pass
 
     @abstractmethod
-    def get_tasks_with_deadlines(self) -> list[Task]:
+    def assign_tasks_to_project(self, project_id: int, task_ids: list[int]) -> list[int]:
+        """ Make tasks with task_ids the only tasks of the project, without committing.
+        Return ids from task_ids that don't point to existing task."""
         pass
 
     @abstractmethod
@@ -61,8 +180,246 @@ class TaskOperations(ABC):
     def delete_task(self, task: Task) -> None:
         pass
 
+    @abstractmethod
+    def create_tasks(self, rows: list[dict]) -> list[int]:
+        """ Insert column values of several tasks with one statement and commit. Return their ids in the same order."""
+        pass
+
+    @abstractmethod
+    def update_tasks(self, rows: list[dict]) -> None:
+        """ Write column values (including id) of several tasks with one statement and commit."""
+        pass
+
+    @abstractmethod
+    def delete_tasks(self, ids: list[int]) -> list[int]:
+        """ Delete tasks with given ids and commit. Return ids of deleted tasks."""
+        pass
+
+    @abstractmethod
+    def get_completed_task_ids(self, completed_before: date, limit: int) -> list[int]:
+        """ Return ids of up to limit tasks completed before completed_before, the earliest completed first."""
+        pass
+
+    @abstractmethod
+    def archive_tasks(self, ids: list[int], deleted: bool = False) -> list[int]:
+        """ Move tasks with given ids to archive and commit, deleted marks them soft deleted.
+        Return ids of archived tasks."""
+        pass
+
+    @abstractmethod
+    def delete_archived_tasks(self, ids: list[int], soft: bool = False) -> list[int]:
+        """ Delete archived tasks with given ids from archive and commit, soft marks them deleted instead.
+        Soft deleted tasks are not found again. Return ids of deleted tasks."""
+        pass
+
+    @abstractmethod
+    def restore_task(self, snapshot: dict) -> Task:
+        """ Return Task usable by this backend built from snapshot of its column (and loaded relationship) values,
+        without querying storage. Used to serve cached objects."""
+        pass
+
     @staticmethod
     @abstractmethod
     def apply_update(task: Task, task_update: TaskUpdate) -> Task:
         """ Apply changes from TaskUpdate model to Task and return Task object with changes."""
-        pass
\ No newline at end of file
+        pass
+
+
+class ChangeOperations(ABC):
+    @abstractmethod
+    def get_changes_after(self, since: int, limit: int) -> list[Change]:
+        """ Return up to limit changes with seq greater than since ordered by seq, only the latest change of every
+        row, holding its current task or project."""
+        pass
+
+    @abstractmethod
+    def get_change_bounds(self) -> tuple[int, int]:
+        """ Return (compacted_seq, last_seq): changes up to compacted_seq were removed by compaction,
+        last_seq is seq of the latest change (0 when there is none)."""
+        pass
+
+    @abstractmethod
+    def compact_changes(self, keep: int) -> int:
+        """ Remove changes followed by later change of the same row, then all but keep latest changes, and commit.
+        Return number of removed changes."""
+        pass
+
+
+class AsyncProjectOperations(ABC):
+    """Coroutine counterpart of ProjectOperations, every method has the same contract, iter_* are async generators and
+    apply_update stays synchronous."""
+    @abstractmethod
+    async def get_projects_count(self) -> int:
+        pass
+
+    @abstractmethod
+    async def get_projects(self, offset: int, limit: int) -> list[Project]:
+        pass
+
+    @abstractmethod
+    async def get_projects_after(self, limit: int, after_id: int) -> list[Project]:
+        pass
+
+    @abstractmethod
+    def iter_projects(self, batch_size: int) -> AsyncIterator[dict]:
+        pass
+
+    @abstractmethod
+    async def get_project_by_id(self, _id: int) -> Project:
+        pass
+
+    @abstractmethod
+    async def get_projects_by_ids(self, ids: list[int], with_tasks: bool = False) -> list[Project]:
+        pass
+
+    @abstractmethod
+    async def get_deadlines(self, ids: list[int]) -> dict[int, date]:
+        pass
+
+    @abstractmethod
+    async def get_project_stats(self, _id: int, today: date) -> ProjectStats | None:
+        pass
+
+    @abstractmethod
+    async def get_projects_stats_after(self, limit: int, after_id: int, today: date) -> list[ProjectStats]:
+        pass
+
+    @abstractmethod
+    async def rebuild_project_stats(self) -> None:
+        pass
+
+    @abstractmethod
+    async def create_project(self, project: ProjectBase) -> Project:
+        pass
+
+    @abstractmethod
+    async def update_project(self, project: Project) -> Project:
+        pass
+
+    @abstractmethod
+    async def delete_project(self, project: Project) -> None:
+        pass
+
+    @abstractmethod
+    async def create_projects(self, rows: list[dict]) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def update_projects(self, rows: list[dict]) -> None:
+        pass
+
+    @abstractmethod
+    async def delete_projects(self, ids: list[int]) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def restore_project(self, snapshot: dict) -> Project:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def apply_update(project: Project, project_update: ProjectUpdate) -> Project:
+        pass
+
+class AsyncTaskOperations(ABC):
+    """Coroutine counterpart of TaskOperations, every method has the same contract, iter_* are async generators and
+    apply_update stays synchronous."""
+    @abstractmethod
+    async def get_tasks_count(self, include_archived: bool = False) -> int:
+        pass
+
+    @abstractmethod
+    async def get_task_by_id(self, _id: int, include_archived: bool = False) -> Task:
+        pass
+
+    @abstractmethod
+    async def get_tasks_by_ids(self, ids: list[int]) -> list[Task]:
+        pass
+
+    @abstractmethod
+    async def get_tasks(self, offset: int, limit: int, order_by: TaskOrder = "id",
+                        include_archived: bool = False) -> list[Task]:
+        pass
+
+    @abstractmethod
+    async def get_tasks_after(self, limit: int, after_id: int, after_deadline: date | None,
+                              order_by: TaskOrder = "id", include_archived: bool = False) -> list[Task]:
+        pass
+
+    @abstractmethod
+    def iter_tasks(self, batch_size: int) -> AsyncIterator[dict]:
+        pass
+
+    @abstractmethod
+    async def get_tasks_with_deadlines(self, before: date | None = None, after: date | None = None,
+                                       completed: bool | None = None, project_id: int | None = None,
+                                       limit: int | None = None, include_archived: bool = False) -> list[Task]:
+        pass
+
+    @abstractmethod
+    async def get_max_deadlines(self, project_ids: list[int]) -> dict[int, date]:
+        pass
+
+    @abstractmethod
+    async def get_titles_after_deadline(self, deadlines: dict[int, date], limit: int) -> dict[int, list[str]]:
+        pass
+
+    @abstractmethod
+    async def search_tasks(self, terms: list[str], limit: int, project_id: int | None = None,
+                           after: tuple[float, int] | None = None, min_id: int = 0,
+                           max_id: int | None = None) -> list[tuple[Task, float]]:
+        pass
+
+    @abstractmethod
+    async def get_search_window(self, terms: list[str], max_matches: int,
+                                project_id: int | None = None) -> tuple[int, int]:
+        pass
+
+    @abstractmethod
+    async def assign_tasks_to_project(self, project_id: int, task_ids: list[int]) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def create_task(self, task: Task) -> Task:
+        pass
+
+    @abstractmethod
+    async def update_task(self, task: Task) -> Task:
+        pass
+
+    @abstractmethod
+    async def delete_task(self, task: Task) -> None:
+        pass
+
+    @abstractmethod
+    async def create_tasks(self, rows: list[dict]) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def update_tasks(self, rows: list[dict]) -> None:
+        pass
+
+    @abstractmethod
+    async def delete_tasks(self, ids: list[int]) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def get_completed_task_ids(self, completed_before: date, limit: int) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def archive_tasks(self, ids: list[int], deleted: bool = False) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def delete_archived_tasks(self, ids: list[int], soft: bool = False) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def restore_task(self, snapshot: dict) -> Task:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def apply_update(task: Task, task_update: TaskUpdate) -> Task:
+        pass
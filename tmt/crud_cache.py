@@ -0,0 +1,473 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import date
+from threading import Lock
+
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+
+from .crud_base import ProjectOperations, TaskOperations
+from .database import env_config
+from .models import Project, ProjectStats, ProjectUpdate, Task, TaskOrder, TaskUpdate
+
+_MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+
+class LRUTTLCache:
+    """Thread-safe mapping that keeps up to max_size most recently used entries, each for at most ttl seconds.
+
+    Entries can be tagged when stored, invalidate_tags drops every entry carrying any of the given tags.
+    """
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, object, tuple]] = OrderedDict()
+        self._tags: dict[Hashable, set[Hashable]] = {}
+        self._lock = Lock()
+        self._stats = CacheStats()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < self._clock():
+                if entry is not None:
+                    self._remove(key)
+                self._stats.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value, tags: Iterable[Hashable] = ()) -> None:
+        if self._max_size <= 0:
+            return
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self._ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self._max_size:
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self._stats.invalidations += 1
+
+    def invalidate_tags(self, tags: Iterable[Hashable]) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**{**asdict(self._stats), "size": len(self._entries)})
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """Operations cache settings, every field can be overridden by TMT_CACHE_<FIELD> environment variable."""
+    enabled: bool = False
+    ttl: float = 30.0  # seconds
+    max_entities: int = 10_000  # per object type
+    max_counts: int = 16
+    max_pages: int = 256
+
+    @classmethod
+    def from_env(cls) -> "CacheConfig":
+        return env_config(cls, "TMT_CACHE_")
+
+
+class OperationsCache:
+    """Process-wide storage shared by CachedProjectOperations and CachedTaskOperations.
+
+    Invalidation only sees writes going through the cached operations of this process, other writers
+    (other uvicorn workers included) are picked up after ttl at the latest.
+    """
+    def __init__(self, config: CacheConfig):
+        self.projects = LRUTTLCache(config.max_entities, config.ttl)
+        self.tasks = LRUTTLCache(config.max_entities, config.ttl)
+        self.counts = LRUTTLCache(config.max_counts, config.ttl)
+        self.pages = LRUTTLCache(config.max_pages, config.ttl)
+
+    def stats(self) -> dict[str, CacheStats]:
+        return {"projects": self.projects.stats(), "tasks": self.tasks.stats(),
+                "counts": self.counts.stats(), "pages": self.pages.stats()}
+
+
+def snapshot(instance: SQLModel, with_relationships: bool = False) -> dict:
+    """Return column values of instance, optionally with values of its already loaded relationships."""
+    data = instance.model_dump()
+    if not with_relationships:
+        return data
+
+    state = inspect(instance)
+    for relationship in state.mapper.relationships:
+        if relationship.key in state.unloaded:
+            continue
+        value = getattr(instance, relationship.key)
+        if relationship.uselist:
+            data[relationship.key] = [item.model_dump() for item in value]
+        else:
+            data[relationship.key] = value.model_dump() if value is not None else None
+    return data
+
+
+def is_cacheable(instance: SQLModel | None) -> bool:
+    """Objects with pending changes don't represent stored state and must not be cached."""
+    return instance is not None and not inspect(instance).modified
+
+
+# page tags: every page of one listing, and every page containing given project / task
+TASK_PAGES = ("pages", "tasks")
+PROJECT_PAGES = ("pages", "projects")
+
+def task_tag(_id: int) -> tuple:
+    return "task", _id
+
+def project_tag(_id: int | None) -> tuple:
+    return "project", _id
+
+
+def task_page_tags(tasks: list[Task]) -> list[tuple]:
+    tags = [TASK_PAGES]
+    for task in tasks:
+        tags += [task_tag(task.id), project_tag(task.project_id)]
+    return tags
+
+def project_page_tags(projects: list[Project]) -> list[tuple]:
+    tags = [PROJECT_PAGES]
+    for project in projects:
+        tags.append(project_tag(project.id))
+        if "tasks" not in inspect(project).unloaded:
+            tags += [task_tag(task.id) for task in project.tasks]
+    return tags
+
+
+class CachedProjectOperations(ProjectOperations):
+    """Read-through cache in front of any synchronous ProjectOperations backend.
+
+    Serves get_project_by_id, get_deadlines, count and pages from cache and invalidates affected entries on every mutation.
+    Methods outside ProjectOperations interface are delegated to wrapped backend.
+    """
+    def __init__(self, inner: ProjectOperations, cache: OperationsCache):
+        self._inner = inner
+        self._cache = cache
+
+    def __getattr__(self, name: str):
+        return getattr(self._inner, name)
+
+    def get_projects_count(self) -> int:
+        count = self._cache.counts.get("projects", _MISSING)
+        if count is _MISSING:
+            count = self._inner.get_projects_count()
+            self._cache.counts.set("projects", count)
+        return count
+
+    def get_projects(self, offset: int, limit: int) -> list[Project]:
+        return self._get_page(("projects", offset, limit),
+                              lambda: self._inner.get_projects(offset=offset, limit=limit))
+
+    def get_projects_after(self, limit: int, after_id: int) -> list[Project]:
+        return self._get_page(("projects_after", after_id, limit),
+                              lambda: self._inner.get_projects_after(limit=limit, after_id=after_id))
+
+    def iter_projects(self, batch_size: int) -> Iterator[dict]:
+        return self._inner.iter_projects(batch_size=batch_size)
+
+    def get_project_by_id(self, _id: int) -> Project:
+        cached = self._cache.projects.get(_id)
+        if cached is not None:
+            return self._inner.restore_project(cached)
+
+        project = self._inner.get_project_by_id(_id)
+        if is_cacheable(project):
+            self._cache.projects.set(_id, snapshot(project))
+        return project
+
+    def get_projects_by_ids(self, ids: list[int], with_tasks: bool = False) -> list[Project]:
+        return self._inner.get_projects_by_ids(ids, with_tasks=with_tasks)
+
+    def get_deadlines(self, ids: list[int]) -> dict[int, date]:
+        """Deadlines of cached projects, projects missing in cache are read by one query and cached."""
+        deadlines, missing = {}, []
+        for _id in ids:
+            cached = self._cache.projects.get(_id)
+            if cached is not None:
+                deadlines[_id] = cached["deadline"]
+            else:
+                missing.append(_id)
+        if missing:
+            for project in self._inner.get_projects_by_ids(missing):
+                if is_cacheable(project):
+                    self._cache.projects.set(project.id, snapshot(project))
+                deadlines[project.id] = project.deadline
+        return deadlines
+
+    # stats are served from summary tables by primary key, they are not cached
+    def get_project_stats(self, _id: int, today: date) -> ProjectStats | None:
+        return self._inner.get_project_stats(_id, today)
+
+    def get_projects_stats_after(self, limit: int, after_id: int, today: date) -> list[ProjectStats]:
+        return self._inner.get_projects_stats_after(limit=limit, after_id=after_id, today=today)
+
+    def rebuild_project_stats(self) -> None:
+        self._inner.rebuild_project_stats()
+
+    def create_project(self, project: Project) -> Project:
+        project = self._inner.create_project(project)
+        self._cache.counts.delete("projects")
+        self._cache.pages.invalidate_tags([PROJECT_PAGES])
+        return project
+
+    def update_project(self, project: Project) -> Project:
+        project = self._inner.update_project(project)
+        self._cache.projects.delete(project.id)
+        self._cache.pages.invalidate_tags([project_tag(project.id)])
+        return project
+
+    def delete_project(self, project: Project) -> None:
+        _id = project.id
+        self._inner.delete_project(project)
+        self._cache.projects.delete(_id)
+        # tasks of deleted project were detached as well, cached ones would still point at it
+        self._cache.tasks.clear()
+        self._cache.counts.delete("projects")
+        self._cache.pages.invalidate_tags([PROJECT_PAGES, project_tag(_id)])
+
+    def create_projects(self, rows: list[dict]) -> list[int]:
+        ids = self._inner.create_projects(rows)
+        self._cache.counts.delete("projects")
+        self._cache.pages.invalidate_tags([PROJECT_PAGES])
+        return ids
+
+    def update_projects(self, rows: list[dict]) -> None:
+        self._inner.update_projects(rows)
+        for row in rows:
+            self._cache.projects.delete(row["id"])
+        self._cache.pages.invalidate_tags([project_tag(row["id"]) for row in rows])
+
+    def delete_projects(self, ids: list[int]) -> list[int]:
+        deleted_ids = self._inner.delete_projects(ids)
+        # tasks of deleted projects were detached as well
+        self._cache.projects.clear()
+        self._cache.tasks.clear()
+        self._cache.counts.delete("projects")
+        self._cache.pages.clear()
+        return deleted_ids
+
+    def restore_project(self, snapshot: dict) -> Project:
+        return self._inner.restore_project(snapshot)
+
+    def apply_update(self, project: Project, project_update: ProjectUpdate) -> Project:
+        self._cache.projects.delete(project.id)
+        return self._inner.apply_update(project=project, project_update=project_update)
+
+    def _get_page(self, key: tuple, load: Callable[[], list[Project]]) -> list[Project]:
+        cached = self._cache.pages.get(key)
+        if cached is not None:
+            return [self._inner.restore_project(item) for item in cached]
+
+        projects = load()
+        if all(is_cacheable(project) for project in projects):
+            self._cache.pages.set(key, [snapshot(project, with_relationships=True) for project in projects],
+                                  tags=project_page_tags(projects))
+        return projects
+
+
+class CachedTaskOperations(TaskOperations):
+    """Read-through cache in front of any synchronous TaskOperations backend.
+
+    Serves get_task_by_id, count and pages from cache and invalidates affected entries on every mutation.
+    Methods outside TaskOperations interface are delegated to wrapped backend.
+    """
+    def __init__(self, inner: TaskOperations, cache: OperationsCache):
+        self._inner = inner
+        self._cache = cache
+
+    def __getattr__(self, name: str):
+        return getattr(self._inner, name)
+
+    def get_tasks_count(self, include_archived: bool = False) -> int:
+        key = "all_tasks" if include_archived else "tasks"
+        count = self._cache.counts.get(key, _MISSING)
+        if count is _MISSING:
+            count = self._inner.get_tasks_count(include_archived=include_archived)
+            self._cache.counts.set(key, count)
+        return count
+
+    def get_tasks_by_ids(self, ids: list[int]) -> list[Task]:
+        return self._inner.get_tasks_by_ids(ids)
+
+    def get_task_by_id(self, _id: int, include_archived: bool = False) -> Task:
+        cached = self._cache.tasks.get(_id)
+        if cached is not None:
+            return self._inner.restore_task(cached)
+
+        task = self._inner.get_task_by_id(_id, include_archived=include_archived)
+        # cached tasks are served to reads without archived tasks as well
+        if not include_archived and is_cacheable(task):
+            self._cache.tasks.set(_id, snapshot(task))
+        return task
+
+    def get_tasks(self, offset: int, limit: int, order_by: TaskOrder = "id",
+                  include_archived: bool = False) -> list[Task]:
+        return self._get_page(("tasks", offset, limit, order_by, include_archived),
+                              lambda: self._inner.get_tasks(offset=offset, limit=limit, order_by=order_by,
+                                                            include_archived=include_archived))
+
+    def get_tasks_after(self, limit: int, after_id: int, after_deadline: date | None,
+                        order_by: TaskOrder = "id", include_archived: bool = False) -> list[Task]:
+        return self._get_page(("tasks_after", after_id, after_deadline, limit, order_by, include_archived),
+                              lambda: self._inner.get_tasks_after(limit=limit, after_id=after_id,
+                                                                  after_deadline=after_deadline, order_by=order_by,
+                                                                  include_archived=include_archived))
+
+    def iter_tasks(self, batch_size: int) -> Iterator[dict]:
+        return self._inner.iter_tasks(batch_size=batch_size)
+
+    # deadline checks must see current tasks, they are not cached
+    def get_max_deadlines(self, project_ids: list[int]) -> dict[int, date]:
+        return self._inner.get_max_deadlines(project_ids)
+
+    def get_titles_after_deadline(self, deadlines: dict[int, date], limit: int) -> dict[int, list[str]]:
+        return self._inner.get_titles_after_deadline(deadlines, limit)
+
+    def search_tasks(self, terms: list[str], limit: int, project_id: int | None = None,
+                     after: tuple[float, int] | None = None, min_id: int = 0,
+                     max_id: int | None = None) -> list[tuple[Task, float]]:
+        return self._inner.search_tasks(terms, limit, project_id=project_id, after=after, min_id=min_id,
+                                        max_id=max_id)
+
+    def get_search_window(self, terms: list[str], max_matches: int,
+                          project_id: int | None = None) -> tuple[int, int]:
+        return self._inner.get_search_window(terms, max_matches, project_id=project_id)
+
+    def get_tasks_with_deadlines(self, before: date | None = None, after: date | None = None,
+                                 completed: bool | None = None, project_id: int | None = None,
+                                 limit: int | None = None, include_archived: bool = False) -> list[Task]:
+        return self._inner.get_tasks_with_deadlines(before=before, after=after, completed=completed,
+                                                    project_id=project_id, limit=limit,
+                                                    include_archived=include_archived)
+
+    def assign_tasks_to_project(self, project_id: int, task_ids: list[int]) -> list[int]:
+        missing_ids = self._inner.assign_tasks_to_project(project_id, task_ids)
+        # set-based update can touch any task, pages embed tasks and projects both ways
+        self._cache.tasks.clear()
+        self._cache.pages.clear()
+        return missing_ids
+
+    def create_task(self, task: Task) -> Task:
+        task = self._inner.create_task(task)
+        self._cache.counts.delete("tasks")
+        self._cache.counts.delete("all_tasks")
+        self._cache.pages.invalidate_tags([TASK_PAGES, project_tag(task.project_id)])
+        return task
+
+    def update_task(self, task: Task) -> Task:
+        task = self._inner.update_task(task)
+        self._cache.tasks.delete(task.id)
+        # pages with the task and pages of project it belongs to now
+        self._cache.pages.invalidate_tags([task_tag(task.id), project_tag(task.project_id)])
+        return task
+
+    def delete_task(self, task: Task) -> None:
+        _id = task.id
+        self._inner.delete_task(task)
+        self._cache.tasks.delete(_id)
+        self._cache.counts.delete("tasks")
+        self._cache.counts.delete("all_tasks")
+        self._cache.pages.invalidate_tags([TASK_PAGES, task_tag(_id)])
+
+    def create_tasks(self, rows: list[dict]) -> list[int]:
+        ids = self._inner.create_tasks(rows)
+        self._cache.counts.delete("tasks")
+        self._cache.counts.delete("all_tasks")
+        self._cache.pages.invalidate_tags([TASK_PAGES] + [project_tag(row.get("project_id")) for row in rows])
+        return ids
+
+    def update_tasks(self, rows: list[dict]) -> None:
+        self._inner.update_tasks(rows)
+        tags = []
+        for row in rows:
+            self._cache.tasks.delete(row["id"])
+            tags += [task_tag(row["id"]), project_tag(row.get("project_id"))]
+        self._cache.pages.invalidate_tags(tags)
+
+    def delete_tasks(self, ids: list[int]) -> list[int]:
+        deleted_ids = self._inner.delete_tasks(ids)
+        for _id in deleted_ids:
+            self._cache.tasks.delete(_id)
+        self._cache.counts.delete("tasks")
+        self._cache.counts.delete("all_tasks")
+        self._cache.pages.invalidate_tags([TASK_PAGES] + [task_tag(_id) for _id in deleted_ids])
+        return deleted_ids
+
+    def get_completed_task_ids(self, completed_before: date, limit: int) -> list[int]:
+        return self._inner.get_completed_task_ids(completed_before, limit)
+
+    def archive_tasks(self, ids: list[int], deleted: bool = False) -> list[int]:
+        archived_ids = self._inner.archive_tasks(ids, deleted=deleted)
+        for _id in archived_ids:
+            self._cache.tasks.delete(_id)
+        self._cache.counts.delete("tasks")
+        self._cache.counts.delete("all_tasks")
+        self._cache.pages.invalidate_tags([TASK_PAGES] + [task_tag(_id) for _id in archived_ids])
+        return archived_ids
+
+    def delete_archived_tasks(self, ids: list[int], soft: bool = False) -> list[int]:
+        deleted_ids = self._inner.delete_archived_tasks(ids, soft=soft)
+        self._cache.counts.delete("all_tasks")
+        self._cache.pages.invalidate_tags([TASK_PAGES] + [task_tag(_id) for _id in deleted_ids])
+        return deleted_ids
+
+    def restore_task(self, snapshot: dict) -> Task:
+        return self._inner.restore_task(snapshot)
+
+    def apply_update(self, task: Task, task_update: TaskUpdate) -> Task:
+        self._cache.tasks.delete(task.id)
+        return self._inner.apply_update(task=task, task_update=task_update)
+
+    def _get_page(self, key: tuple, load: Callable[[], list[Task]]) -> list[Task]:
+        cached = self._cache.pages.get(key)
+        if cached is not None:
+            return [self._inner.restore_task(item) for item in cached]
+
+        tasks = load()
+        if all(is_cacheable(task) for task in tasks):
+            self._cache.pages.set(key, [snapshot(task, with_relationships=True) for task in tasks],
+                                  tags=task_page_tags(tasks))
+        return tasks
@@ -0,0 +1,624 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+from itertools import chain
+from collections.abc import Iterator
+from datetime import date
+from threading import RLock
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .crud_base import ChangeOperations, ProjectOperations, TaskOperations
+from .crud_sql import TASK_SEARCH_WEIGHTS, ChangeVersions, SQLProjectOperations, SQLTaskOperations
+from .models import Change, Project, ProjectStats, ProjectUpdate, Task, TaskOrder, TaskUpdate
+
+
+class MemoryStore:
+    """Projects and tasks kept in process memory, together with indexes used by memory operations.
+
+    tasks_by_project maps project id to ids of its tasks, task_ids / project_ids are sorted ids,
+    deadline_index holds sorted (deadline, id) pairs of tasks with deadline (deadlines_by_project
+    the same pairs per project) and no_deadline_ids sorted ids of tasks without one. Project stats are
+    counted from completed_by_project and open_deadlines_by_project, pairs of not completed tasks.
+    task_ids_by_word maps lowercase words of titles and descriptions to ids of tasks holding them,
+    words are kept sorted in words for prefix lookups.
+    change_seqs are sorted seqs of changes logged by every write, change_entries maps them to (entity, id, deleted)
+    and change_seq_by_row the other way, so only the latest change of every row is kept.
+    completed_on maps ids of completed tasks to the day they were completed. Archived tasks are moved
+    to archived_tasks with the same kind of indexes (archived_ids, archived_deadline_index, archived_no_deadline_ids,
+    archived_by_project) and still counted in project stats, soft deleted ones only to deleted_tasks.
+    Task.project / Project.tasks relationships of stored objects are kept in sync with project_id
+    without relationship events, Project.tasks is rebuilt from tasks_by_project when project is read
+    after its tasks changed. Every change is published to change_versions right away, when given.
+    """
+    def __init__(self, change_versions: ChangeVersions | None = None):
+        self.lock = RLock()
+        self.change_versions = change_versions
+        self.projects: dict[int, Project] = {}
+        self.tasks: dict[int, Task] = {}
+        self.project_ids: list[int] = []
+        self.task_ids: list[int] = []
+        self.tasks_by_project: dict[int, set[int]] = {}
+        self.deadline_index: list[tuple[date, int]] = []
+        self.deadlines_by_project: dict[int, list[tuple[date, int]]] = {}
+        self.no_deadline_ids: list[int] = []
+        self.completed_by_project: dict[int, int] = {}
+        self.open_deadlines_by_project: dict[int, list[tuple[date, int]]] = {}
+        self.task_ids_by_word: dict[str, set[int]] = {}
+        self.words: list[str] = []
+        self.completed_on: dict[int, date] = {}
+        self.archived_tasks: dict[int, Task] = {}
+        self.archived_ids: list[int] = []
+        self.archived_deadline_index: list[tuple[date, int]] = []
+        self.archived_no_deadline_ids: list[int] = []
+        self.archived_by_project: dict[int, set[int]] = {}
+        self.deleted_tasks: dict[int, Task] = {}
+        self.change_seqs: list[int] = []
+        self.change_entries: dict[int, tuple[str, int, bool]] = {}
+        self.change_seq_by_row: dict[tuple[str, int], int] = {}
+        self.last_seq = 0
+        self.compacted_seq = 0
+        self._stale_projects: set[int] = set()
+        self._last_project_id = 0
+        self._last_task_id = 0
+
+    def get_project(self, _id: int | None) -> Project | None:
+        project = self.projects.get(_id)
+        if project is not None and _id in self._stale_projects:
+            task_ids = sorted(self.tasks_by_project.get(_id, ()))
+            set_committed_value(project, "tasks", [self.tasks[task_id] for task_id in task_ids])
+            self._stale_projects.discard(_id)
+        return project
+
+    def add_project(self, project: Project) -> Project:
+        self._last_project_id += 1
+        project.id = self._last_project_id
+        self.projects[project.id] = project
+        self.project_ids.append(project.id)
+        self._stale_projects.add(project.id)
+        self._changed(Project, project.id, [project.id])
+        return project
+
+    def update_project(self, project: Project, values: dict) -> Project:
+        for key, value in values.items():
+            setattr(project, key, value)
+        self._changed(Project, project.id, [project.id])
+        return project
+
+    def remove_project(self, project: Project) -> None:
+        del self.projects[project.id]
+        _remove_sorted(self.project_ids, project.id)
+        # like deleting through SQL relationship, tasks of removed project lose their project_id
+        for task_id in list(self.tasks_by_project.pop(project.id, ())):
+            self.update_task(self.tasks[task_id], {"project_id": None})
+        for task_id in self.archived_by_project.pop(project.id, ()):
+            self.archived_tasks[task_id].project_id = None
+            set_committed_value(self.archived_tasks[task_id], "project", None)
+        self.deadlines_by_project.pop(project.id, None)
+        self.completed_by_project.pop(project.id, None)
+        self.open_deadlines_by_project.pop(project.id, None)
+        self._stale_projects.discard(project.id)
+        self._changed(Project, project.id, [project.id], deleted=True)
+
+    def add_task(self, task: Task) -> Task:
+        self._last_task_id += 1
+        task.id = self._last_task_id
+        self.tasks[task.id] = task
+        self.task_ids.append(task.id)
+        self._index_task(task)
+        if task.completed:
+            self.completed_on[task.id] = date.today()
+        self._changed(Task, task.id, [task.project_id])
+        return task
+
+    def update_task(self, task: Task, values: dict) -> Task:
+        previous_project_id, was_completed = task.project_id, task.completed
+        self._unindex_task(task)
+        for key, value in values.items():
+            setattr(task, key, value)
+        self._index_task(task)
+        if task.completed and not was_completed:
+            self.completed_on[task.id] = date.today()
+        elif not task.completed:
+            self.completed_on.pop(task.id, None)
+        self._changed(Task, task.id, [previous_project_id, task.project_id])
+        return task
+
+    def remove_task(self, task: Task) -> None:
+        self._unindex_task(task)
+        del self.tasks[task.id]
+        _remove_sorted(self.task_ids, task.id)
+        self.completed_on.pop(task.id, None)
+        self._changed(Task, task.id, [task.project_id], deleted=True)
+
+    def archive_task(self, task: Task, deleted: bool) -> None:
+        """Move task to archive, like in SQL it leaves as deleted and is counted in stats again unless deleted."""
+        self.remove_task(task)
+        if deleted:
+            self.deleted_tasks[task.id] = task
+            return
+        self.archived_tasks[task.id] = task
+        insort(self.archived_ids, task.id)
+        self._count_task(task)
+        if task.project_id is not None:
+            self.archived_by_project.setdefault(task.project_id, set()).add(task.id)
+        if task.deadline is not None:
+            insort(self.archived_deadline_index, (task.deadline, task.id))
+        else:
+            insort(self.archived_no_deadline_ids, task.id)
+
+    def remove_archived_task(self, task: Task, soft: bool) -> None:
+        """Remove task from archive and from stats, soft keeps it in deleted_tasks."""
+        del self.archived_tasks[task.id]
+        _remove_sorted(self.archived_ids, task.id)
+        self._count_task(task, -1)
+        if task.project_id is not None:
+            self.archived_by_project.get(task.project_id, set()).discard(task.id)
+        if task.deadline is not None:
+            _remove_sorted(self.archived_deadline_index, (task.deadline, task.id))
+        else:
+            _remove_sorted(self.archived_no_deadline_ids, task.id)
+        if soft:
+            self.deleted_tasks[task.id] = task
+        # already deleted from change log when it was archived
+        if self.change_versions is not None:
+            self.change_versions.bump([Task.__tablename__], [task.project_id] if task.project_id is not None else [])
+
+    def get_task(self, _id: int, include_archived: bool = False) -> Task | None:
+        task = self.tasks.get(_id)
+        if task is None and include_archived:
+            return self.archived_tasks.get(_id)
+        return task
+
+    def task_indexes(self, include_archived: bool) -> tuple[list[int], list[tuple[date, int]], list[int]]:
+        """Sorted ids, deadline index and sorted ids without deadline of tasks, merged with those of archived
+        tasks when include_archived. Merged lists are built on every call."""
+        if not include_archived:
+            return self.task_ids, self.deadline_index, self.no_deadline_ids
+        return (list(merge(self.task_ids, self.archived_ids)),
+                list(merge(self.deadline_index, self.archived_deadline_index)),
+                list(merge(self.no_deadline_ids, self.archived_no_deadline_ids)))
+
+    def project_stats(self, _id: int, today: date) -> ProjectStats:
+        total = len(self.tasks_by_project.get(_id, ())) + len(self.archived_by_project.get(_id, ()))
+        completed = self.completed_by_project.get(_id, 0)
+        open_deadlines = self.open_deadlines_by_project.get(_id, [])
+        return ProjectStats(project_id=_id, total=total, completed=completed, open=total - completed,
+                            overdue=bisect_left(open_deadlines, (today,)),
+                            earliest_open_deadline=open_deadlines[0][0] if open_deadlines else None)
+
+    def match_task_ids(self, term: str) -> set[int]:
+        """Ids of tasks holding word term, or any word starting with term without trailing *."""
+        if not term.endswith("*"):
+            return self.task_ids_by_word.get(term, set())
+        prefix = term.removesuffix("*")
+        ids = set()
+        for word in self.words[bisect_left(self.words, prefix):]:
+            if not word.startswith(prefix):
+                break
+            ids |= self.task_ids_by_word[word]
+        return ids
+
+    def rebuild_stats(self) -> None:
+        self.completed_by_project.clear()
+        self.open_deadlines_by_project.clear()
+        for task in chain(self.tasks.values(), self.archived_tasks.values()):
+            self._count_task(task)
+
+    def compact_changes(self, keep: int) -> int:
+        removed = self.change_seqs[:max(len(self.change_seqs) - keep, 0)]
+        for seq in removed:
+            entity, _id, _ = self.change_entries.pop(seq)
+            del self.change_seq_by_row[entity, _id]
+        if removed:
+            del self.change_seqs[:len(removed)]
+            self.compacted_seq = removed[-1]
+        return len(removed)
+
+    def _changed(self, model: type[Project | Task], _id: int, project_ids: list[int | None],
+                 deleted: bool = False) -> None:
+        row = model.__tablename__, _id
+        if (previous_seq := self.change_seq_by_row.get(row)) is not None:
+            _remove_sorted(self.change_seqs, previous_seq)
+            del self.change_entries[previous_seq]
+        self.last_seq += 1
+        self.change_seqs.append(self.last_seq)
+        self.change_entries[self.last_seq] = *row, deleted
+        self.change_seq_by_row[row] = self.last_seq
+        if self.change_versions is not None:
+            self.change_versions.bump([model.__tablename__],
+                                      [project_id for project_id in project_ids if project_id is not None])
+
+    def _count_task(self, task: Task, delta: int = 1) -> None:
+        if task.project_id is None:
+            return
+        if task.completed:
+            self.completed_by_project[task.project_id] = self.completed_by_project.get(task.project_id, 0) + delta
+        elif task.deadline is not None:
+            open_deadlines = self.open_deadlines_by_project.setdefault(task.project_id, [])
+            if delta > 0:
+                insort(open_deadlines, (task.deadline, task.id))
+            else:
+                _remove_sorted(open_deadlines, (task.deadline, task.id))
+
+    def _index_words(self, task: Task) -> None:
+        for word in set(task_words(task.title) + task_words(task.desc)):
+            if word not in self.task_ids_by_word:
+                self.task_ids_by_word[word] = set()
+                insort(self.words, word)
+            self.task_ids_by_word[word].add(task.id)
+
+    def _unindex_words(self, task: Task) -> None:
+        for word in set(task_words(task.title) + task_words(task.desc)):
+            ids = self.task_ids_by_word.get(word, set())
+            ids.discard(task.id)
+            if not ids and word in self.task_ids_by_word:
+                del self.task_ids_by_word[word]
+                _remove_sorted(self.words, word)
+
+    def _index_task(self, task: Task) -> None:
+        self._count_task(task)
+        self._index_words(task)
+        if task.project_id is not None:
+            self.tasks_by_project.setdefault(task.project_id, set()).add(task.id)
+            self._stale_projects.add(task.project_id)
+        set_committed_value(task, "project", self.projects.get(task.project_id))
+        if task.deadline is not None:
+            insort(self.deadline_index, (task.deadline, task.id))
+            if task.project_id is not None:
+                insort(self.deadlines_by_project.setdefault(task.project_id, []), (task.deadline, task.id))
+        else:
+            insort(self.no_deadline_ids, task.id)
+
+    def _unindex_task(self, task: Task) -> None:
+        self._count_task(task, -1)
+        self._unindex_words(task)
+        if task.project_id is not None:
+            self.tasks_by_project.get(task.project_id, set()).discard(task.id)
+            self._stale_projects.add(task.project_id)
+        if task.deadline is not None:
+            _remove_sorted(self.deadline_index, (task.deadline, task.id))
+            if task.project_id is not None:
+                _remove_sorted(self.deadlines_by_project.get(task.project_id, []), (task.deadline, task.id))
+        else:
+            _remove_sorted(self.no_deadline_ids, task.id)
+
+
+def task_words(text: str | None) -> list[str]:
+    return re.findall(r"\w+", text.lower()) if text else []
+
+
+def search_rank(task: Task, terms: list[str]) -> float:
+    """Negated number of words matching terms, weighted like bm25 in SQL, so lower rank is better as well."""
+    def matches(text: str | None) -> int:
+        return sum(word.startswith(term.removesuffix("*")) if term.endswith("*") else word == term
+                   for term in terms for word in task_words(text))
+
+    title_weight, desc_weight = TASK_SEARCH_WEIGHTS
+    return -(title_weight * matches(task.title) + desc_weight * matches(task.desc))
+
+
+def _remove_sorted(values: list, value) -> None:
+    index = bisect_left(values, value)
+    if index < len(values) and values[index] == value:
+        del values[index]
+
+
+class MemoryProjectOperations(ProjectOperations):
+    """ProjectOperations kept in MemoryStore, changes are applied immediately (there are no transactions).
+
+    Stored objects are returned directly, so they must be changed only through apply_update,
+    which returns a changed copy, and update_project, which writes the copy back.
+    """
+    def __init__(self, store: MemoryStore):
+        self._store = store
+
+    def get_projects_count(self) -> int:
+        return len(self._store.projects)
+
+    def get_projects(self, offset: int, limit: int) -> list[Project]:
+        with self._store.lock:
+            return [self._store.get_project(_id) for _id in self._store.project_ids[offset:offset + limit]]
+
+    def get_projects_after(self, limit: int, after_id: int) -> list[Project]:
+        with self._store.lock:
+            start = bisect_right(self._store.project_ids, after_id)
+            return [self._store.get_project(_id) for _id in self._store.project_ids[start:start + limit]]
+
+    def iter_projects(self, batch_size: int) -> Iterator[dict]:
+        yield from _iter_rows(self._store, self._store.projects, self._store.project_ids, batch_size)
+
+    def get_project_by_id(self, _id: int) -> Project:
+        with self._store.lock:
+            return self._store.get_project(_id)
+
+    def get_projects_by_ids(self, ids: list[int], with_tasks: bool = False) -> list[Project]:
+        with self._store.lock:
+            return [self._store.get_project(_id) for _id in sorted(set(ids)) if _id in self._store.projects]
+
+    def get_deadlines(self, ids: list[int]) -> dict[int, date]:
+        with self._store.lock:
+            return {_id: self._store.projects[_id].deadline for _id in ids if _id in self._store.projects}
+
+    def get_project_stats(self, _id: int, today: date) -> ProjectStats | None:
+        with self._store.lock:
+            return self._store.project_stats(_id, today) if _id in self._store.projects else None
+
+    def get_projects_stats_after(self, limit: int, after_id: int, today: date) -> list[ProjectStats]:
+        with self._store.lock:
+            start = bisect_right(self._store.project_ids, after_id)
+            return [self._store.project_stats(_id, today) for _id in self._store.project_ids[start:start + limit]]
+
+    def rebuild_project_stats(self) -> None:
+        with self._store.lock:
+            self._store.rebuild_stats()
+
+    def create_project(self, project: Project) -> Project:
+        with self._store.lock:
+            return self._store.get_project(self._store.add_project(project).id)
+
+    def update_project(self, project: Project) -> Project:
+        with self._store.lock:
+            stored = self._store.update_project(self._store.projects[project.id], project.model_dump(exclude={"id"}))
+            return self._store.get_project(stored.id)
+
+    def delete_project(self, project: Project) -> None:
+        with self._store.lock:
+            self._store.remove_project(self._store.projects[project.id])
+
+    def create_projects(self, rows: list[dict]) -> list[int]:
+        with self._store.lock:
+            return [self._store.add_project(Project(**row)).id for row in rows]
+
+    def update_projects(self, rows: list[dict]) -> None:
+        with self._store.lock:
+            for row in rows:
+                values = {key: value for key, value in row.items() if key != "id"}
+                self._store.update_project(self._store.projects[row["id"]], values)
+
+    def delete_projects(self, ids: list[int]) -> list[int]:
+        with self._store.lock:
+            deleted_ids = [_id for _id in dict.fromkeys(ids) if _id in self._store.projects]
+            for _id in deleted_ids:
+                self._store.remove_project(self._store.projects[_id])
+            return deleted_ids
+
+    def restore_project(self, snapshot: dict) -> Project:
+        return self.get_project_by_id(snapshot["id"])
+
+    @staticmethod
+    def apply_update(project: Project, project_update: ProjectUpdate) -> Project:
+        changed = Project(**project.model_dump())
+        # share tasks without backref events, so stored tasks keep pointing to stored project
+        set_committed_value(changed, "tasks", list(project.tasks))
+        return SQLProjectOperations.apply_update(changed, project_update)
+
+    get_db_project_object = staticmethod(SQLProjectOperations.get_db_project_object)
+
+
+class MemoryTaskOperations(TaskOperations):
+    """TaskOperations kept in MemoryStore, changes are applied immediately (there are no transactions).
+
+    Stored objects are returned directly, so they must be changed only through apply_update,
+    which returns a changed copy, and update_task, which writes the copy back.
+    """
+    def __init__(self, store: MemoryStore):
+        self._store = store
+
+    def get_tasks_count(self, include_archived: bool = False) -> int:
+        return len(self._store.tasks) + (len(self._store.archived_tasks) if include_archived else 0)
+
+    def get_task_by_id(self, _id: int, include_archived: bool = False) -> Task:
+        return self._store.get_task(_id, include_archived)
+
+    def get_tasks_by_ids(self, ids: list[int]) -> list[Task]:
+        with self._store.lock:
+            return [self._store.tasks[_id] for _id in sorted(set(ids)) if _id in self._store.tasks]
+
+    def get_tasks_by_project_id_except_ids(self, project_id: int, task_ids: list[int]) -> list[Task]:
+        with self._store.lock:
+            ids = self._store.tasks_by_project.get(project_id, set()).difference(task_ids)
+            return [self._store.tasks[_id] for _id in sorted(ids)]
+
+    def get_tasks(self, offset: int, limit: int, order_by: TaskOrder = "id",
+                  include_archived: bool = False) -> list[Task]:
+        with self._store.lock:
+            task_ids, deadline_index, no_deadline_ids = self._store.task_indexes(include_archived)
+            if order_by == "id":
+                ids = task_ids[offset:offset + limit]
+            else:
+                ids = [_id for _, _id in deadline_index[offset:offset + limit]]
+                offset = max(0, offset - len(deadline_index))
+                ids += no_deadline_ids[offset:offset + limit - len(ids)]
+            return [self._store.get_task(_id, include_archived) for _id in ids]
+
+    def get_tasks_after(self, limit: int, after_id: int, after_deadline: date | None,
+                        order_by: TaskOrder = "id", include_archived: bool = False) -> list[Task]:
+        with self._store.lock:
+            task_ids, deadline_index, no_deadline_ids = self._store.task_indexes(include_archived)
+            if order_by == "id":
+                start = bisect_right(task_ids, after_id)
+                return [self._store.get_task(_id, include_archived) for _id in task_ids[start:start + limit]]
+
+            ids = []
+            if after_deadline is not None:
+                start = bisect_right(deadline_index, (after_deadline, after_id))
+                ids = [_id for _, _id in deadline_index[start:start + limit]]
+                after_id = 0  # tasks without deadline follow all tasks with deadline
+            start = bisect_right(no_deadline_ids, after_id)
+            ids += no_deadline_ids[start:start + limit - len(ids)]
+            return [self._store.get_task(_id, include_archived) for _id in ids]
+
+    def iter_tasks(self, batch_size: int) -> Iterator[dict]:
+        yield from _iter_rows(self._store, self._store.tasks, self._store.task_ids, batch_size)
+
+    def get_tasks_with_deadlines(self, before: date | None = None, after: date | None = None,
+                                 completed: bool | None = None, project_id: int | None = None,
+                                 limit: int | None = None, include_archived: bool = False) -> list[Task]:
+        with self._store.lock:
+            _, index, _ = self._store.task_indexes(include_archived)
+            start = bisect_left(index, (after,)) if after is not None else 0
+            # (before, inf) follows every (before, id) pair
+            end = bisect_right(index, (before, float("inf"))) if before is not None else len(index)
+            tasks = []
+            for position in range(start, end):
+                if limit is not None and len(tasks) == limit:
+                    break
+                task = self._store.get_task(index[position][1], include_archived)
+                if completed is not None and task.completed != completed:
+                    continue
+                if project_id is not None and task.project_id != project_id:
+                    continue
+                tasks.append(task)
+            return tasks
+
+    def get_max_deadlines(self, project_ids: list[int]) -> dict[int, date]:
+        with self._store.lock:
+            deadlines = {_id: self._store.deadlines_by_project.get(_id) for _id in project_ids}
+            return {_id: pairs[-1][0] for _id, pairs in deadlines.items() if pairs}
+
+    def get_titles_after_deadline(self, deadlines: dict[int, date], limit: int) -> dict[int, list[str]]:
+        titles = {}
+        with self._store.lock:
+            for project_id, deadline in deadlines.items():
+                pairs = self._store.deadlines_by_project.get(project_id, [])
+                start = max(bisect_right(pairs, (deadline, float("inf"))), len(pairs) - limit)
+                if start < len(pairs):
+                    titles[project_id] = [self._store.tasks[_id].title for _, _id in reversed(pairs[start:])]
+        return titles
+
+    def search_tasks(self, terms: list[str], limit: int, project_id: int | None = None,
+                     after: tuple[float, int] | None = None, min_id: int = 0,
+                     max_id: int | None = None) -> list[tuple[Task, float]]:
+        with self._store.lock:
+            ranked = sorted((search_rank(self._store.tasks[_id], terms), _id)
+                            for _id in self._match_task_ids(terms, project_id)
+                            if _id >= min_id and (max_id is None or _id <= max_id))
+            start = bisect_right(ranked, after) if after is not None else 0
+            return [(self._store.tasks[_id], rank) for rank, _id in ranked[start:start + limit]]
+
+    def get_search_window(self, terms: list[str], max_matches: int,
+                          project_id: int | None = None) -> tuple[int, int]:
+        with self._store.lock:
+            ids = sorted(self._match_task_ids(terms, project_id))
+            return ids[-max_matches - 1] + 1 if len(ids) > max_matches else 0, ids[-1] if ids else 0
+
+    def _match_task_ids(self, terms: list[str], project_id: int | None) -> set[int]:
+        ids = set.intersection(*(self._store.match_task_ids(term) for term in terms))
+        if project_id is None:
+            return ids
+        return {_id for _id in ids if self._store.tasks[_id].project_id == project_id}
+
+    def assign_tasks_to_project(self, project_id: int, task_ids: list[int]) -> list[int]:
+        with self._store.lock:
+            for _id in self._store.tasks_by_project.get(project_id, set()).difference(task_ids):
+                self._store.update_task(self._store.tasks[_id], {"project_id": None})
+
+            missing_ids = []
+            for _id in task_ids:
+                if _id not in self._store.tasks:
+                    missing_ids.append(_id)
+                    continue
+                self._store.update_task(self._store.tasks[_id], {"project_id": project_id})
+            return missing_ids
+
+    def create_task(self, task: Task) -> Task:
+        with self._store.lock:
+            return self._store.add_task(task)
+
+    def update_task(self, task: Task) -> Task:
+        with self._store.lock:
+            stored = self._store.tasks[task.id]
+            return self._store.update_task(stored, task.model_dump(exclude={"id"}))
+
+    def delete_task(self, task: Task) -> None:
+        with self._store.lock:
+            self._store.remove_task(self._store.tasks[task.id])
+
+    def create_tasks(self, rows: list[dict]) -> list[int]:
+        with self._store.lock:
+            return [self._store.add_task(Task(**row)).id for row in rows]
+
+    def update_tasks(self, rows: list[dict]) -> None:
+        with self._store.lock:
+            for row in rows:
+                values = {key: value for key, value in row.items() if key != "id"}
+                self._store.update_task(self._store.tasks[row["id"]], values)
+
+    def delete_tasks(self, ids: list[int]) -> list[int]:
+        with self._store.lock:
+            deleted_ids = [_id for _id in dict.fromkeys(ids) if _id in self._store.tasks]
+            for _id in deleted_ids:
+                self._store.remove_task(self._store.tasks[_id])
+            return deleted_ids
+
+    def get_completed_task_ids(self, completed_before: date, limit: int) -> list[int]:
+        with self._store.lock:
+            completed = sorted((day, _id) for _id, day in self._store.completed_on.items() if day < completed_before)
+            return [_id for _, _id in completed[:limit]]
+
+    def archive_tasks(self, ids: list[int], deleted: bool = False) -> list[int]:
+        with self._store.lock:
+            archived_ids = [_id for _id in dict.fromkeys(ids) if _id in self._store.tasks]
+            for _id in archived_ids:
+                self._store.archive_task(self._store.tasks[_id], deleted)
+            return archived_ids
+
+    def delete_archived_tasks(self, ids: list[int], soft: bool = False) -> list[int]:
+        with self._store.lock:
+            deleted_ids = [_id for _id in dict.fromkeys(ids) if _id in self._store.archived_tasks]
+            for _id in deleted_ids:
+                self._store.remove_archived_task(self._store.archived_tasks[_id], soft)
+            return deleted_ids
+
+    def restore_task(self, snapshot: dict) -> Task:
+        return self._store.get_task(snapshot["id"], include_archived=True)
+
+    @staticmethod
+    def apply_update(task: Task, task_update: TaskUpdate) -> Task:
+        changed = Task(**task.model_dump())
+        set_committed_value(changed, "project", task.project)
+        return SQLTaskOperations.apply_update(changed, task_update)
+
+    create_db_task_object = staticmethod(SQLTaskOperations.create_db_task_object)
+
+
+
+class MemoryChangeOperations(ChangeOperations):
+    """Changes logged by MemoryStore, which keeps only the latest change of every row right away."""
+    def __init__(self, store: MemoryStore):
+        self._store = store
+
+    def get_changes_after(self, since: int, limit: int) -> list[Change]:
+        with self._store.lock:
+            start = bisect_right(self._store.change_seqs, since)
+            changes = []
+            for seq in self._store.change_seqs[start:start + limit]:
+                entity, _id, deleted = self._store.change_entries[seq]
+                change = Change(seq=seq, entity=entity, entity_id=_id, deleted=deleted)
+                if not deleted and entity == Task.__tablename__:
+                    change.task = self._store.tasks[_id]
+                elif not deleted:
+                    change.project = self._store.projects[_id]
+                changes.append(change)
+            return changes
+
+    def get_change_bounds(self) -> tuple[int, int]:
+        return self._store.compacted_seq, self._store.last_seq
+
+    def compact_changes(self, keep: int) -> int:
+        with self._store.lock:
+            return self._store.compact_changes(keep)
+
+
+def _iter_rows(store: MemoryStore, objects: dict, ids: list[int], batch_size: int) -> Iterator[dict]:
+    """Yield column values of objects in id order, taking store lock once per batch."""
+    last_id = 0
+    while True:
+        with store.lock:
+            start = bisect_right(ids, last_id)
+            batch = [objects[_id].model_dump() for _id in ids[start:start + batch_size]]
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1]["id"]
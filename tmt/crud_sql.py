@@ -1,26 +1,535 @@
-from sqlmodel import Session, select
+import secrets
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import chain
+from threading import Lock
 
-from .crud_base import ProjectOperations, TaskOperations
-from .models import Project, ProjectBase, ProjectUpdate, Task, TaskBase, TaskUpdate
+from sqlalchemy import Delete, Insert, Update, column, event, inspect, literal, literal_column, table, union_all
+from sqlalchemy import select as select_rows  # reads rows even of a single column, unlike select of SQLModel
+from sqlalchemy.orm import Session as ORMSession, aliased, joinedload, make_transient_to_detached, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Session, SQLModel, and_, delete, func, insert, or_, select, tuple_, update
+from sqlmodel.sql.expression import Select, SelectOfScalar
+
+from .crud_base import ChangeOperations, ProjectOperations, TaskOperations
+from .models import (Change, ChangeLog, ChangeLogCompaction, FieldSet, Project, ProjectBase, ProjectOpenDeadline,
+                     ProjectRead, ProjectStats, ProjectTaskStats, ProjectUpdate, Task, TaskArchive, TaskBase,
+                     TaskCompletion, TaskOrder, TaskRead, TaskUpdate)
+from .schema import PROJECT_STATS_REBUILD, TASK_SEARCH_REBUILD, TASK_SEARCH_TABLE
+
+# bm25 weights of matches in title and in description
+TASK_SEARCH_WEIGHTS = (2.0, 1.0)
+
+
+class RowCountCache:
+    """Process-wide row counts per table, seeded with COUNT(*) and kept up to date by create/delete operations.
+
+    Counts are only correct as long as every write goes through operations sharing this cache,
+    so it should stay disabled when several processes write to the same database.
+    """
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, table: str) -> int | None:
+        return self._counts.get(table)
+
+    def set(self, table: str, count: int) -> None:
+        with self._lock:
+            self._counts[table] = count
+
+    def add(self, table: str, delta: int) -> None:
+        with self._lock:
+            if table in self._counts:
+                self._counts[table] += delta
+
+    def invalidate(self, table: str | None = None) -> None:
+        with self._lock:
+            if table is None:
+                self._counts.clear()
+            else:
+                self._counts.pop(table, None)
+
+
+class ChangeVersions:
+    """Process-wide versions of tables and projects, bumped after every commit that changed them.
+
+    Versions are values of one clock increasing with every bump, so the version of several tables is the
+    greatest of their versions. Version of project covers project's row and its tasks, bumping all projects
+    (when it is not known which projects changed) raises the version of every project at once.
+    Epoch differs between processes, so versions can't be mistaken for versions of previous run.
+    Like RowCountCache, versions are correct only when every write goes through operations sharing them.
+    """
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self._clock = 0
+        self._tables: dict[str, int] = {}
+        self._projects: dict[int, int] = {}
+        self._all_projects = 0
+        self._lock = Lock()
+
+    def bump(self, tables: Iterable[str], project_ids: Iterable[int] = (), all_projects: bool = False) -> None:
+        with self._lock:
+            self._clock += 1
+            for table in tables:
+                self._tables[table] = self._clock
+            for project_id in project_ids:
+                self._projects[project_id] = self._clock
+            if all_projects:
+                self._all_projects = self._clock
+
+    def table_version(self, *tables: str) -> int:
+        return max(self._tables.get(table, 0) for table in tables)
+
+    def project_version(self, project_id: int) -> int:
+        return max(self._projects.get(project_id, 0), self._all_projects)
+
+
+@dataclass
+class PendingChanges:
+    """Changes written in session's transaction, published to ChangeVersions when it commits."""
+    versions: ChangeVersions
+    tables: set[str] = field(default_factory=set)
+    project_ids: set[int] = field(default_factory=set)
+    all_projects: bool = False
+
+
+def track_changes(session: Session, change_versions: ChangeVersions | None) -> None:
+    """Publish changes committed through session to change_versions (no-op when it is None).
+
+    Objects flushed by the session are recorded automatically, statements bypassing the unit of work
+    (bulk insert / update / delete) must be recorded with record_changes.
+    """
+    if change_versions is not None and "pending_changes" not in session.info:
+        session.info["pending_changes"] = PendingChanges(change_versions)
+
+
+def record_changes(session: Session, tables: Iterable[str], project_ids: Iterable[int | None] = (),
+                   all_projects: bool = False) -> None:
+    pending: PendingChanges | None = session.info.get("pending_changes")
+    if pending is None:
+        return
+    pending.tables.update(tables)
+    pending.project_ids.update(project_id for project_id in project_ids if project_id is not None)
+    pending.all_projects |= all_projects
+
+
+@event.listens_for(ORMSession, "after_flush")
+def _record_flushed_changes(session: ORMSession, flush_context) -> None:
+    if "pending_changes" not in session.info:
+        return
+    # collections still hold pre-flush state here, attribute history includes previous project_id
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Task):
+            history = inspect(instance).attrs.project_id.history
+            record_changes(session, [Task.__tablename__], chain(history.added, history.unchanged, history.deleted))
+        elif isinstance(instance, Project):
+            tables = [Project.__tablename__]
+            if instance in session.deleted:
+                # tasks of deleted project are detached during flush, without showing up as dirty
+                tables.append(Task.__tablename__)
+            record_changes(session, tables, [instance.id])
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _publish_changes(session: ORMSession) -> None:
+    pending: PendingChanges | None = session.info.get("pending_changes")
+    if pending is not None and (pending.tables or pending.project_ids or pending.all_projects):
+        pending.versions.bump(pending.tables, pending.project_ids, pending.all_projects)
+        session.info["pending_changes"] = PendingChanges(pending.versions)
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _discard_changes(session: ORMSession) -> None:
+    pending: PendingChanges | None = session.info.get("pending_changes")
+    if pending is not None:
+        session.info["pending_changes"] = PendingChanges(pending.versions)
+
+
+def count_rows(session: Session, model: type[SQLModel], row_count_cache: RowCountCache | None = None,
+               where=None) -> int:
+    """Return number of rows in model's table using COUNT(*), served from cache when one is provided.
+    Rows can be limited by where condition, cached count of the table is then the count of those rows."""
+    table = model.__tablename__
+    if row_count_cache is not None:
+        cached = row_count_cache.get(table)
+        if cached is not None:
+            return cached
+
+    statement = select(func.count()).select_from(model)
+    count = session.exec(statement.where(where) if where is not None else statement).one()
+
+    if row_count_cache is not None:
+        row_count_cache.set(table, count)
+    return count
+
+
+def relationship_loaders(model: type[SQLModel], read_model: type[SQLModel] | None, entity=None) -> list:
+    """Return loader options that eagerly load every relationship of model serialized by read_model.
+
+    Many-to-one relationships are joined to the main query, collections are loaded by one extra
+    SELECT ... IN query, so listing costs a fixed number of statements regardless of page size.
+    Options are built for entity (an alias of model) when it is given.
+    """
+    if read_model is None:
+        return []
+
+    options = []
+    for relationship in inspect(model).relationships:
+        if relationship.key not in read_model.model_fields:
+            continue
+        attribute = getattr(model if entity is None else entity, relationship.key)
+        options.append(selectinload(attribute) if relationship.uselist else joinedload(attribute))
+    return options
+
+
+def detached_instance(model: type[SQLModel], snapshot: dict) -> SQLModel:
+    """Build instance in detached state (as if loaded by already closed session) from snapshot values.
+
+    Relationship values in snapshot are restored recursively and marked as loaded, so merging the result
+    into a session with load=False neither queries the database nor flushes anything.
+    """
+    relationships = inspect(model).relationships
+    instance = model(**{key: value for key, value in snapshot.items() if key not in relationships})
+    make_transient_to_detached(instance)
+
+    for key, value in snapshot.items():
+        if key not in relationships:
+            continue
+        target = relationships[key].mapper.class_
+        if relationships[key].uselist:
+            value = [detached_instance(target, item) for item in value]
+        elif value is not None:
+            value = detached_instance(target, value)
+        set_committed_value(instance, key, value)
+    return instance
+
+
+def iter_rows(session: Session, model: type[SQLModel], batch_size: int) -> Iterator[dict]:
+    """Stream column values of model's table as dicts, without building ORM objects or loading whole table."""
+    table = model.__table__
+    result = session.exec(
+        select(*table.columns).order_by(*table.primary_key.columns).execution_options(yield_per=batch_size)
+    )
+    for row in result:
+        yield row._asdict()
+
+
+def deadline_range_statement(before: date | None, after: date | None, completed: bool | None,
+                             project_id: int | None, limit: int | None,
+                             statement: Select | None = None, task=Task) -> SelectOfScalar[Task]:
+    """SELECT of tasks in deadline range, served by range scan of deadline index, or of composite index
+    starting with completed / project_id when filtered by them. Order matches index order, so there is no sort.
+
+    statement selecting tasks can be passed to filter it instead of plain SELECT of Task,
+    task is the entity it selects (Task or ALL_TASKS).
+    """
+    statement = (select(task) if statement is None else statement).where(task.deadline != None)
+    if after is not None:
+        statement = statement.where(task.deadline >= after)
+    if before is not None:
+        statement = statement.where(task.deadline <= before)
+    if completed is not None:
+        statement = statement.where(task.completed == completed)
+    if project_id is not None:
+        statement = statement.where(task.project_id == project_id)
+    return statement.order_by(task.deadline, task.id).limit(limit)
+
+
+TASK_COLUMNS = (Task.title, Task.desc, Task.deadline, Task.completed, Task.project_id, Task.id)
+PROJECT_COLUMNS = (Project.title, Project.deadline, Project.id)
+
+# tasks followed by archived tasks that were not soft deleted, read as Task. Ordered reads of the union are merged
+# from ordered scans of both tables by SQLite, conditions are pushed down to each of them
+ALL_TASKS = aliased(Task, union_all(
+    select(*TASK_COLUMNS),
+    select(*(getattr(TaskArchive, column.key) for column in TASK_COLUMNS)).where(TaskArchive.deleted == False),
+).subquery("all_task"))
+
+
+def task_entity(include_archived: bool) -> type[Task]:
+    return ALL_TASKS if include_archived else Task
+
+
+def completed_task_ids_statement(completed_before: date, limit: int) -> Select:
+    """SELECT of ids of tasks completed before completed_before, read from ix_taskcompletion_completed_on."""
+    return (select(TaskCompletion.task_id).where(TaskCompletion.completed_on < completed_before)
+            .order_by(TaskCompletion.completed_on, TaskCompletion.task_id).limit(limit))
+
+
+def archive_statements(ids: list[int], deleted: bool) -> tuple[Insert, Delete]:
+    """INSERT copying tasks with ids to archive and DELETE of the tasks returning (id, project_id) of every task.
+    Triggers of task table handle the DELETE like any other, so archived tasks leave stats, search and change log
+    as deleted, stats triggers of archive then count them again unless they were soft deleted."""
+    copied = select(*TASK_COLUMNS, literal(date.today()), literal(deleted)).where(Task.id.in_(ids))
+    columns = [column.key for column in TASK_COLUMNS] + ["archived_on", "deleted"]
+    return (insert(TaskArchive).from_select(columns, copied),
+            delete(Task).where(Task.id.in_(ids)).returning(Task.id, Task.project_id))
+
+
+def delete_archived_statement(ids: list[int], soft: bool) -> Update | Delete:
+    """DELETE of archived tasks with ids, or with soft UPDATE marking them deleted, returning (id, project_id) of every
+    task. Stats triggers of archive stop counting them either way."""
+    found = TaskArchive.id.in_(ids), TaskArchive.deleted == False
+    statement = update(TaskArchive).where(*found).values(deleted=True) if soft else delete(TaskArchive).where(*found)
+    return statement.returning(TaskArchive.id, TaskArchive.project_id)
+
+
+def count_archived(moved: list[tuple[int, int | None]], deleted: bool,
+                   row_count_cache: RowCountCache | None) -> None:
+    """Move counts of tasks returned by archive_statements from task table to archive."""
+    if row_count_cache is not None:
+        row_count_cache.add(Task.__tablename__, -len(moved))
+        if not deleted:
+            row_count_cache.add(TaskArchive.__tablename__, len(moved))
+
+
+class RowDict(dict):
+    """Column values of one row read without ORM, readable as attributes so services handle it like model."""
+    __slots__ = ()
+
+    def __getattr__(self, name: str):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def selected_columns(columns: tuple, field_set: FieldSet | None) -> tuple:
+    """Columns named by field_set in order of columns (all of them without field_set), id stays the last one."""
+    if field_set is None:
+        return columns
+    return tuple(column for column in columns if column.key in field_set.columns)
+
+
+def task_rows_statement(task=Task, columns: tuple = TASK_COLUMNS, with_project: bool = True) -> Select:
+    """SELECT of task columns followed by columns of task's project, joined in the same query only with_project."""
+    selected = (getattr(task, column.key) for column in columns)
+    if not with_project:
+        return select_rows(*selected)
+    return select(*selected, *PROJECT_COLUMNS).outerjoin(Project, task.project_id == Project.id)
+
+
+def task_row_dicts(rows: Iterable[tuple], columns: tuple = TASK_COLUMNS, with_project: bool = True) -> list[RowDict]:
+    """Build task dicts shaped like TaskRead (limited to columns) from rows of task_rows_statement."""
+    task_keys = [column.key for column in columns]
+    project_keys = [column.key for column in PROJECT_COLUMNS]
+    width = len(columns)
+    tasks = []
+    for row in rows:
+        task = RowDict(zip(task_keys, row[:width]))
+        if with_project:
+            task["project"] = RowDict(zip(project_keys, row[width:])) if row[-1] is not None else None
+        tasks.append(task)
+    return tasks
+
+
+def project_row_dicts(session: Session, rows: Iterable[tuple], columns: tuple = PROJECT_COLUMNS,
+                      with_tasks: bool = True) -> list[RowDict]:
+    """Build project dicts shaped like ProjectRead (limited to columns) from rows of columns ending with id,
+    tasks of all projects are read by one extra SELECT ... IN query only with_tasks."""
+    project_keys = [column.key for column in columns]
+    task_keys = [column.key for column in TASK_COLUMNS]
+    projects = {row[-1]: RowDict(zip(project_keys, row)) for row in rows}
+    if not with_tasks:
+        return list(projects.values())
+    for project in projects.values():
+        project["tasks"] = []
+    if projects:
+        for row in session.exec(select(*TASK_COLUMNS).where(Task.project_id.in_(projects)).order_by(Task.id)):
+            projects[row[4]]["tasks"].append(RowDict(zip(task_keys, row)))
+    return list(projects.values())
+
+
+def max_deadlines_statement(project_ids: list[int]) -> Select:
+    """SELECT of (project id, latest task deadline) pairs. MAX over index ix_task_project_id_deadline is a single
+    index seek per project, so it doesn't read tasks of the project."""
+    latest = select(func.max(Task.deadline)).where(Task.project_id == Project.id).scalar_subquery()
+    return select(Project.id, latest).where(Project.id.in_(project_ids))
+
+
+# SQLite limits depth of expression tree, deadline conditions of more projects are split into several statements
+DEADLINE_CONDITIONS_PER_STATEMENT = 200
+
+
+def titles_after_deadline_statements(deadlines: dict[int, date], limit: int) -> Iterator[Select]:
+    """SELECTs of (project id, title) of up to limit tasks per project with deadline later than given deadline.
+    Every condition is a range scan of ix_task_project_id_deadline reading only the offending tasks."""
+    items = list(deadlines.items())
+    for start in range(0, len(items), DEADLINE_CONDITIONS_PER_STATEMENT):
+        conditions = [and_(Task.project_id == project_id, Task.deadline > deadline)
+                      for project_id, deadline in items[start:start + DEADLINE_CONDITIONS_PER_STATEMENT]]
+        rank = func.row_number().over(partition_by=Task.project_id, order_by=(Task.deadline.desc(), Task.id.desc()))
+        offending = select(Task.project_id, Task.title, rank.label("rank")).where(or_(*conditions)).subquery()
+        yield (select(offending.c.project_id, offending.c.title).where(offending.c.rank <= limit)
+               .order_by(offending.c.project_id, offending.c.rank))
+
+
+def group_titles(rows: Iterator[tuple[int, str]]) -> dict[int, list[str]]:
+    titles = {}
+    for project_id, title in rows:
+        titles.setdefault(project_id, []).append(title)
+    return titles
+
+
+def match_expression(terms: list[str]) -> str:
+    """FTS5 query matching every term, terms are quoted so they are never read as query syntax."""
+    return " ".join(f'"{term.removesuffix("*")}"' + ("*" if term.endswith("*") else "") for term in terms)
+
+
+SEARCH_TABLE = table(TASK_SEARCH_TABLE, column("rowid"))
+
+
+def search_statement(terms: list[str], limit: int, project_id: int | None, after: tuple[float, int] | None,
+                     min_id: int = 0, max_id: int | None = None) -> Select:
+    """SELECT of tasks matched by full-text index with their bm25 rank (lower is better), ordered by (rank, id).
+    Index yields matching rowids (from min_id to max_id, so only those are ranked), tasks are then read by primary
+    key."""
+    rank = func.bm25(literal_column(TASK_SEARCH_TABLE), *TASK_SEARCH_WEIGHTS)
+    statement = (
+        select(Task, rank)
+        .select_from(SEARCH_TABLE)
+        .join(Task, Task.id == SEARCH_TABLE.c.rowid)
+        .where(literal_column(TASK_SEARCH_TABLE).match(match_expression(terms)))
+    )
+    if min_id:
+        statement = statement.where(SEARCH_TABLE.c.rowid >= min_id)
+    if max_id is not None:
+        statement = statement.where(SEARCH_TABLE.c.rowid <= max_id)
+    if project_id is not None:
+        statement = statement.where(Task.project_id == project_id)
+    if after is not None:
+        after_rank, after_id = after
+        statement = statement.where(or_(rank > after_rank, and_(rank == after_rank, Task.id > after_id)))
+    return statement.order_by(rank, Task.id).limit(limit)
+
+
+def search_ids_statement(terms: list[str], project_id: int | None) -> Select:
+    """SELECT of ids of matching tasks from the highest one, read from index without ranking."""
+    statement = select(SEARCH_TABLE.c.rowid).where(literal_column(TASK_SEARCH_TABLE).match(match_expression(terms)))
+    if project_id is not None:
+        statement = statement.join(Task, Task.id == SEARCH_TABLE.c.rowid).where(Task.project_id == project_id)
+    return statement.order_by(SEARCH_TABLE.c.rowid.desc())
+
+
+def search_window_statements(terms: list[str], max_matches: int, project_id: int | None) -> tuple[Select, Select]:
+    """SELECTs of id of the first matching task left out of max_matches ones with the highest ids, and of the highest
+    id."""
+    statement = search_ids_statement(terms, project_id)
+    return statement.offset(max_matches).limit(1), statement.limit(1)
+
+
+def project_stats_statement(today: date) -> Select:
+    """SELECT of project ids with their task counts read from summary tables by primary key. Overdue tasks are
+    summed over counts per deadline before today, so no statement reads task rows."""
+    overdue = (
+        select(func.coalesce(func.sum(ProjectOpenDeadline.open_tasks), 0))
+        .where(ProjectOpenDeadline.project_id == Project.id, ProjectOpenDeadline.deadline < today)
+        .scalar_subquery()
+    )
+    earliest = select(func.min(ProjectOpenDeadline.deadline)).where(ProjectOpenDeadline.project_id == Project.id)
+    return (
+        select(Project.id, func.coalesce(ProjectTaskStats.total, 0), func.coalesce(ProjectTaskStats.completed, 0),
+               overdue, earliest.scalar_subquery())
+        .outerjoin(ProjectTaskStats, ProjectTaskStats.project_id == Project.id)
+    )
+
+
+def superseded_change() -> Select:
+    """EXISTS of later change of the same row as ChangeLog entry of enclosing statement."""
+    later = aliased(ChangeLog)
+    return select(later.seq).where(later.entity == ChangeLog.entity, later.entity_id == ChangeLog.entity_id,
+                                   later.seq > ChangeLog.seq).exists()
+
+
+def changes_statement(since: int, limit: int) -> Select:
+    """SELECT of the latest changes of rows after since with current task / project, found by ix_changelog_entity."""
+    return (
+        select(ChangeLog, Task, Project)
+        .outerjoin(Task, and_(ChangeLog.entity == Task.__tablename__, Task.id == ChangeLog.entity_id))
+        .outerjoin(Project, and_(ChangeLog.entity == Project.__tablename__, Project.id == ChangeLog.entity_id))
+        .where(ChangeLog.seq > since, ~superseded_change())
+        .order_by(ChangeLog.seq)
+        .limit(limit)
+    )
+
+
+def project_stats(rows: Iterable[tuple]) -> list[ProjectStats]:
+    return [ProjectStats(project_id=_id, total=total, completed=completed, open=total - completed, overdue=overdue,
+                         earliest_open_deadline=earliest) for _id, total, completed, overdue, earliest in rows]
 
 
 class SQLProjectOperations(ProjectOperations):
-    def __init__(self, session: Session):
+    """With as_rows, listed projects are dicts built from column tuples (see project_row_dicts), not ORM objects.
+    With field_set, listed projects and projects read by id are such dicts holding only its columns,
+    tasks are read only when it expands them."""
+    def __init__(self, session: Session, row_count_cache: RowCountCache | None = None,
+                 read_model: type[SQLModel] | None = ProjectRead, change_versions: ChangeVersions | None = None,
+                 as_rows: bool = False, field_set: FieldSet | None = None):
         self._session = session
+        self._row_count_cache = row_count_cache
+        self._load_options = relationship_loaders(Project, read_model)
+        self._as_rows = as_rows or field_set is not None
+        self._field_set = field_set
+        self._columns = selected_columns(PROJECT_COLUMNS, field_set)
+        self._with_tasks = field_set is None or "tasks" in field_set.expand
+        track_changes(session, change_versions)
+
+    def _select(self) -> SelectOfScalar[Project]:
+        return select_rows(*self._columns) if self._as_rows else select(Project).options(*self._load_options)
+
+    def _list(self, statement: SelectOfScalar[Project]) -> list[Project]:
+        if self._as_rows:
+            return project_row_dicts(self._session, self._session.exec(statement), self._columns, self._with_tasks)
+        return self._session.exec(statement).all()
 
     def get_projects_count(self) -> int:
-        return len(self._session.exec(select(Project)).all())
+        return count_rows(self._session, Project, self._row_count_cache)
 
     def get_projects(self, offset: int, limit: int) -> list[Project]:
-        projects = self._session.exec(select(Project).offset(offset).limit(limit)).all()
-        return projects
+        return self._list(self._select().order_by(Project.id).offset(offset).limit(limit))
+
+    def get_projects_after(self, limit: int, after_id: int) -> list[Project]:
+        return self._list(self._select().where(Project.id > after_id).order_by(Project.id).limit(limit))
+
+    def iter_projects(self, batch_size: int) -> Iterator[dict]:
+        yield from iter_rows(self._session, Project, batch_size)
 
     def get_project_by_id(self, _id: int) -> Project:
+        if self._field_set is not None:
+            projects = self._list(self._select().where(Project.id == _id))
+            return projects[0] if projects else None
         return self._session.get(Project, _id)
 
+    def get_projects_by_ids(self, ids: list[int], with_tasks: bool = False) -> list[Project]:
+        statement = select(Project).where(Project.id.in_(ids))
+        if with_tasks:
+            statement = statement.options(selectinload(Project.tasks))
+        return self._session.exec(statement).all()
+
+    def get_deadlines(self, ids: list[int]) -> dict[int, date]:
+        return dict(self._session.exec(select(Project.id, Project.deadline).where(Project.id.in_(ids))).all())
+
+    def get_project_stats(self, _id: int, today: date) -> ProjectStats | None:
+        stats = project_stats(self._session.exec(project_stats_statement(today).where(Project.id == _id)))
+        return stats[0] if stats else None
+
+    def get_projects_stats_after(self, limit: int, after_id: int, today: date) -> list[ProjectStats]:
+        statement = project_stats_statement(today).where(Project.id > after_id).order_by(Project.id).limit(limit)
+        return project_stats(self._session.exec(statement))
+
+    def rebuild_project_stats(self) -> None:
+        connection = self._session.connection()
+        for statement in PROJECT_STATS_REBUILD:
+            connection.exec_driver_sql(statement)
+        self._session.commit()
+
     def create_project(self, project: Project) -> Project:
         self._session.add(project)
         self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Project.__tablename__, 1)
         self._session.refresh(project)
         return project
 
@@ -33,6 +542,40 @@ class SQLProjectOperations(ProjectOperations):
     def delete_project(self, project: Project) -> None:
         self._session.delete(project)
         self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Project.__tablename__, -1)
+
+    def create_projects(self, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        # sort_by_parameter_order would fall back to one INSERT per row on SQLite, instead rely on
+        # INTEGER PRIMARY KEY values being assigned in ascending order as rows are inserted
+        ids = sorted(self._session.exec(insert(Project).returning(Project.id), params=rows).scalars())
+        record_changes(self._session, [Project.__tablename__], ids)
+        self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Project.__tablename__, len(ids))
+        return ids
+
+    def update_projects(self, rows: list[dict]) -> None:
+        if rows:
+            # ORM bulk UPDATE by primary key, sent as single executemany
+            self._session.exec(update(Project), params=rows)
+            record_changes(self._session, [Project.__tablename__], [row["id"] for row in rows])
+        self._session.commit()
+
+    def delete_projects(self, ids: list[int]) -> list[int]:
+        # same as delete_project, which nulls project_id of project's tasks through relationship
+        self._session.exec(update(Task).where(Task.project_id.in_(ids)).values(project_id=None))
+        deleted_ids = self._session.exec(delete(Project).where(Project.id.in_(ids)).returning(Project.id)).scalars().all()
+        record_changes(self._session, [Project.__tablename__, Task.__tablename__], deleted_ids)
+        self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Project.__tablename__, -len(deleted_ids))
+        return deleted_ids
+
+    def restore_project(self, snapshot: dict) -> Project:
+        return self._session.merge(detached_instance(Project, snapshot), load=False)
 
     @staticmethod
     def apply_update(project: Project, project_update: ProjectUpdate) -> Project:
@@ -46,29 +589,142 @@ class SQLProjectOperations(ProjectOperations):
         return Project(title=project.title, deadline=project.deadline) # ensure type validation
 
 class SQLTaskOperations(TaskOperations):
-    def __init__(self, session: Session):
+    """With as_rows, listed tasks are dicts built from column tuples (see task_row_dicts), not ORM objects.
+    With field_set, listed tasks and tasks read by id are such dicts holding only its columns,
+    project is joined only when it expands it."""
+    def __init__(self, session: Session, row_count_cache: RowCountCache | None = None,
+                 read_model: type[SQLModel] | None = TaskRead, change_versions: ChangeVersions | None = None,
+                 as_rows: bool = False, field_set: FieldSet | None = None):
         self._session = session
+        self._row_count_cache = row_count_cache
+        self._load_options = relationship_loaders(Task, read_model)
+        self._archived_load_options = relationship_loaders(Task, read_model, ALL_TASKS)
+        self._as_rows = as_rows or field_set is not None
+        self._field_set = field_set
+        self._columns = selected_columns(TASK_COLUMNS, field_set)
+        self._with_project = field_set is None or "project" in field_set.expand
+        track_changes(session, change_versions)
+
+    def _select(self, task=Task) -> SelectOfScalar[Task]:
+        if self._as_rows:
+            return task_rows_statement(task, self._columns, self._with_project)
+        return select(task).options(*(self._archived_load_options if task is ALL_TASKS else self._load_options))
+
+    def _list(self, statement: SelectOfScalar[Task]) -> list[Task]:
+        if self._as_rows:
+            return task_row_dicts(self._session.exec(statement), self._columns, self._with_project)
+        return self._session.exec(statement).all()
+
+    def get_tasks_count(self, include_archived: bool = False) -> int:
+        count = count_rows(self._session, Task, self._row_count_cache)
+        if include_archived:
+            count += count_rows(self._session, TaskArchive, self._row_count_cache, where=TaskArchive.deleted == False)
+        return count
 
-    def get_tasks_count(self) -> int:
-        return len(self._session.exec(select(Task)).all())
+    def get_task_by_id(self, _id: int, include_archived: bool = False) -> Task:
+        if self._field_set is not None:
+            task = task_entity(include_archived)
+            tasks = self._list(self._select(task).where(task.id == _id))
+            return tasks[0] if tasks else None
+        task = self._session.get(Task, _id, options=self._load_options)
+        if task is None and include_archived:
+            statement = select(ALL_TASKS).options(*self._archived_load_options).where(ALL_TASKS.id == _id)
+            return self._session.exec(statement).first()
+        return task
 
-    def get_task_by_id(self, _id: int) -> Task:
-        return self._session.get(Task, _id)
+    def get_tasks_by_ids(self, ids: list[int]) -> list[Task]:
+        return self._session.exec(select(Task).where(Task.id.in_(ids))).all()
 
     def get_tasks_by_project_id_except_ids(self, project_id: int, task_ids: list[int]) -> list[Task]:
         return self._session.exec(select(Task).where(Task.project_id == project_id, Task.id.not_in(task_ids))).all()
 
-    def get_tasks(self, offset: int, limit: int) -> list[Task]:
-        tasks = self._session.exec(select(Task).offset(offset).limit(limit)).all()
-        return tasks
+    def get_tasks(self, offset: int, limit: int, order_by: TaskOrder = "id",
+                  include_archived: bool = False) -> list[Task]:
+        task = task_entity(include_archived)
+        statement = self._select(task)
+        if order_by == "deadline":
+            statement = statement.order_by(task.deadline.is_(None), task.deadline, task.id)
+        else:
+            statement = statement.order_by(task.id)
+        return self._list(statement.offset(offset).limit(limit))
+
+    def get_tasks_after(self, limit: int, after_id: int, after_deadline: date | None,
+                        order_by: TaskOrder = "id", include_archived: bool = False) -> list[Task]:
+        task = task_entity(include_archived)
+        statement = self._select(task)
+        if order_by == "id":
+            return self._list(statement.where(task.id > after_id).order_by(task.id).limit(limit))
+
+        tasks = []
+        if after_deadline is not None:
+            # range scan over deadline index, (deadline, id) pairs are unique as index entries end with rowid
+            tasks = self._list(
+                statement
+                .where(tuple_(task.deadline, task.id) > tuple_(after_deadline, after_id))
+                .order_by(task.deadline, task.id)
+                .limit(limit)
+            )
+            if len(tasks) == limit:
+                return tasks
+            after_id = 0  # tasks with deadline are exhausted, continue with tasks without deadline
+
+        return tasks + self._list(
+            statement.where(task.deadline == None, task.id > after_id).order_by(task.id).limit(limit - len(tasks))
+        )
+
+    def iter_tasks(self, batch_size: int) -> Iterator[dict]:
+        yield from iter_rows(self._session, Task, batch_size)
 
-    def get_tasks_with_deadlines(self) -> list[Task]:
-        tasks = self._session.exec(select(Task).where(Task.deadline != None))
-        return tasks
+    def get_tasks_with_deadlines(self, before: date | None = None, after: date | None = None,
+                                 completed: bool | None = None, project_id: int | None = None,
+                                 limit: int | None = None, include_archived: bool = False) -> list[Task]:
+        task = task_entity(include_archived)
+        return self._list(deadline_range_statement(before, after, completed, project_id, limit, self._select(task),
+                                                   task))
+
+    def get_max_deadlines(self, project_ids: list[int]) -> dict[int, date]:
+        rows = self._session.exec(max_deadlines_statement(project_ids))
+        return {project_id: deadline for project_id, deadline in rows if deadline is not None}
+
+    def get_titles_after_deadline(self, deadlines: dict[int, date], limit: int) -> dict[int, list[str]]:
+        return group_titles(row for statement in titles_after_deadline_statements(deadlines, limit)
+                            for row in self._session.exec(statement))
+
+    def search_tasks(self, terms: list[str], limit: int, project_id: int | None = None,
+                     after: tuple[float, int] | None = None, min_id: int = 0,
+                     max_id: int | None = None) -> list[tuple[Task, float]]:
+        statement = search_statement(terms, limit, project_id, after, min_id, max_id).options(*self._load_options)
+        return [(task, rank) for task, rank in self._session.exec(statement)]
+
+    def get_search_window(self, terms: list[str], max_matches: int,
+                          project_id: int | None = None) -> tuple[int, int]:
+        min_statement, max_statement = search_window_statements(terms, max_matches, project_id)
+        left_out_id = self._session.exec(min_statement).first()
+        return left_out_id + 1 if left_out_id else 0, self._session.exec(max_statement).first() or 0
+
+    def rebuild_search_index(self) -> None:
+        """Reindex text of all tasks, for databases whose index drifted from task rows."""
+        self._session.connection().exec_driver_sql(TASK_SEARCH_REBUILD)
+        self._session.commit()
+
+    def assign_tasks_to_project(self, project_id: int, task_ids: list[int]) -> list[int]:
+        self._session.exec(
+            update(Task).where(Task.project_id == project_id, Task.id.not_in(task_ids)).values(project_id=None)
+        )
+        # reassigned tasks can come from any project
+        record_changes(self._session, [Task.__tablename__], all_projects=True)
+        if not task_ids:
+            return []
+        assigned_ids = set(self._session.exec(
+            update(Task).where(Task.id.in_(task_ids)).values(project_id=project_id).returning(Task.id)
+        ).scalars())
+        return [task_id for task_id in task_ids if task_id not in assigned_ids]
 
     def create_task(self, task: Task) -> Task:
         self._session.add(task)
         self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Task.__tablename__, 1)
         self._session.refresh(task)
         return task
 
@@ -81,6 +737,58 @@ class SQLTaskOperations(TaskOperations):
     def delete_task(self, task: Task) -> None:
         self._session.delete(task)
         self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Task.__tablename__, -1)
+
+    def create_tasks(self, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        ids = sorted(self._session.exec(insert(Task).returning(Task.id), params=rows).scalars())
+        record_changes(self._session, [Task.__tablename__], (row.get("project_id") for row in rows))
+        self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Task.__tablename__, len(ids))
+        return ids
+
+    def update_tasks(self, rows: list[dict]) -> None:
+        if rows:
+            # ORM bulk UPDATE by primary key, sent as single executemany
+            self._session.exec(update(Task), params=rows)
+            # previous projects of the tasks are not known here
+            record_changes(self._session, [Task.__tablename__], all_projects=True)
+        self._session.commit()
+
+    def delete_tasks(self, ids: list[int]) -> list[int]:
+        deleted = self._session.exec(delete(Task).where(Task.id.in_(ids)).returning(Task.id, Task.project_id)).all()
+        deleted_ids = [_id for _id, _ in deleted]
+        record_changes(self._session, [Task.__tablename__], (project_id for _, project_id in deleted))
+        self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Task.__tablename__, -len(deleted_ids))
+        return deleted_ids
+
+    def get_completed_task_ids(self, completed_before: date, limit: int) -> list[int]:
+        return self._session.exec(completed_task_ids_statement(completed_before, limit)).all()
+
+    def archive_tasks(self, ids: list[int], deleted: bool = False) -> list[int]:
+        copy, remove = archive_statements(ids, deleted)
+        self._session.exec(copy)
+        moved = self._session.exec(remove).all()
+        record_changes(self._session, [Task.__tablename__], (project_id for _, project_id in moved))
+        self._session.commit()
+        count_archived(moved, deleted, self._row_count_cache)
+        return [_id for _id, _ in moved]
+
+    def delete_archived_tasks(self, ids: list[int], soft: bool = False) -> list[int]:
+        deleted = self._session.exec(delete_archived_statement(ids, soft)).all()
+        record_changes(self._session, [Task.__tablename__], (project_id for _, project_id in deleted))
+        self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(TaskArchive.__tablename__, -len(deleted))
+        return [_id for _id, _ in deleted]
+
+    def restore_task(self, snapshot: dict) -> Task:
+        return self._session.merge(detached_instance(Task, snapshot), load=False)
 
     @staticmethod
     def apply_update(task: Task, task_update: TaskUpdate) -> Task:
@@ -91,4 +799,32 @@ class SQLTaskOperations(TaskOperations):
     @staticmethod
     def create_db_task_object(task: TaskBase) -> Task:
         return Task(title=task.title, desc=task.desc, deadline=task.deadline,
-                    completed=task.completed, project_id=task.project_id) # ensure type validation
\ No newline at end of file
+                    completed=task.completed, project_id=task.project_id) # ensure type validation
+
+
+class SQLChangeOperations(ChangeOperations):
+    """Change log appended by schema.CHANGE_LOG_TRIGGERS, so it covers every write of tasks and projects."""
+    def __init__(self, session: Session):
+        self._session = session
+
+    def get_changes_after(self, since: int, limit: int) -> list[Change]:
+        return [Change(seq=entry.seq, entity=entry.entity, entity_id=entry.entity_id, deleted=entry.deleted,
+                       task=None if entry.deleted else task, project=None if entry.deleted else project)
+                for entry, task, project in self._session.exec(changes_statement(since, limit))]
+
+    def get_change_bounds(self) -> tuple[int, int]:
+        compaction = self._session.get(ChangeLogCompaction, 1)
+        compacted_seq = compaction.compacted_seq if compaction is not None else 0
+        last_seq = self._session.exec(select(func.max(ChangeLog.seq))).one()
+        return compacted_seq, max(compacted_seq, last_seq or 0)
+
+    def compact_changes(self, keep: int) -> int:
+        removed = self._session.exec(delete(ChangeLog).where(superseded_change())).rowcount
+        horizon = self._session.exec(
+            select(ChangeLog.seq).order_by(ChangeLog.seq.desc()).offset(keep).limit(1)
+        ).first()
+        if horizon is not None:
+            removed += self._session.exec(delete(ChangeLog).where(ChangeLog.seq <= horizon)).rowcount
+            self._session.merge(ChangeLogCompaction(id=1, compacted_seq=horizon))
+        self._session.commit()
+        return removed
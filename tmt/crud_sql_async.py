@@ -0,0 +1,341 @@
+from collections.abc import AsyncIterator
+from datetime import date
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import SQLModel, delete, func, insert, select, tuple_, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .crud_base import AsyncProjectOperations, AsyncTaskOperations
+from .crud_sql import (ALL_TASKS, ChangeVersions, RowCountCache, SQLProjectOperations, SQLTaskOperations,
+                       archive_statements, completed_task_ids_statement, count_archived, deadline_range_statement,
+                       delete_archived_statement, detached_instance, group_titles, max_deadlines_statement,
+                       project_stats, project_stats_statement, record_changes, relationship_loaders, search_window_statements,
+                       search_statement, task_entity, titles_after_deadline_statements, track_changes)
+from .models import Project, ProjectRead, ProjectStats, Task, TaskArchive, TaskOrder, TaskRead
+from .schema import PROJECT_STATS_REBUILD
+
+
+async def count_rows_async(session: AsyncSession, model: type[SQLModel],
+                           row_count_cache: RowCountCache | None = None, where=None) -> int:
+    """Async counterpart of crud_sql.count_rows."""
+    table = model.__tablename__
+    if row_count_cache is not None:
+        cached = row_count_cache.get(table)
+        if cached is not None:
+            return cached
+
+    statement = select(func.count()).select_from(model)
+    count = (await session.exec(statement.where(where) if where is not None else statement)).one()
+
+    if row_count_cache is not None:
+        row_count_cache.set(table, count)
+    return count
+
+
+async def iter_rows_async(session: AsyncSession, model: type[SQLModel], batch_size: int) -> AsyncIterator[dict]:
+    """Async counterpart of crud_sql.iter_rows."""
+    table = model.__table__
+    result = await session.stream(
+        select(*table.columns).order_by(*table.primary_key.columns).execution_options(yield_per=batch_size)
+    )
+    async for row in result:
+        yield row._asdict()
+
+
+class AsyncSQLProjectOperations(AsyncProjectOperations):
+    """AsyncProjectOperations implemented over AsyncSession.
+
+    Relationships serialized by read_model are always loaded eagerly, lazy loading is not possible in async code.
+    """
+    def __init__(self, session: AsyncSession, row_count_cache: RowCountCache | None = None,
+                 read_model: type[SQLModel] | None = ProjectRead, change_versions: ChangeVersions | None = None):
+        self._session = session
+        self._row_count_cache = row_count_cache
+        self._load_options = relationship_loaders(Project, read_model)
+        track_changes(session.sync_session, change_versions)
+
+    async def get_projects_count(self) -> int:
+        return await count_rows_async(self._session, Project, self._row_count_cache)
+
+    async def get_projects(self, offset: int, limit: int) -> list[Project]:
+        projects = await self._session.exec(
+            select(Project).options(*self._load_options).order_by(Project.id).offset(offset).limit(limit)
+        )
+        return projects.all()
+
+    async def get_projects_after(self, limit: int, after_id: int) -> list[Project]:
+        projects = await self._session.exec(
+            select(Project).options(*self._load_options).where(Project.id > after_id).order_by(Project.id).limit(limit)
+        )
+        return projects.all()
+
+    async def iter_projects(self, batch_size: int) -> AsyncIterator[dict]:
+        async for row in iter_rows_async(self._session, Project, batch_size):
+            yield row
+
+    async def get_project_by_id(self, _id: int) -> Project:
+        return await self._session.get(Project, _id, options=self._load_options)
+
+    async def get_projects_by_ids(self, ids: list[int], with_tasks: bool = False) -> list[Project]:
+        statement = select(Project).where(Project.id.in_(ids))
+        if with_tasks:
+            statement = statement.options(selectinload(Project.tasks))
+        return (await self._session.exec(statement)).all()
+
+    async def get_deadlines(self, ids: list[int]) -> dict[int, date]:
+        return dict((await self._session.exec(select(Project.id, Project.deadline).where(Project.id.in_(ids)))).all())
+
+    async def get_project_stats(self, _id: int, today: date) -> ProjectStats | None:
+        stats = project_stats(await self._session.exec(project_stats_statement(today).where(Project.id == _id)))
+        return stats[0] if stats else None
+
+    async def get_projects_stats_after(self, limit: int, after_id: int, today: date) -> list[ProjectStats]:
+        statement = project_stats_statement(today).where(Project.id > after_id).order_by(Project.id).limit(limit)
+        return project_stats(await self._session.exec(statement))
+
+    async def rebuild_project_stats(self) -> None:
+        connection = await self._session.connection()
+        for statement in PROJECT_STATS_REBUILD:
+            await connection.exec_driver_sql(statement)
+        await self._session.commit()
+
+    async def create_project(self, project: Project) -> Project:
+        self._session.add(project)
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Project.__tablename__, 1)
+        return await self._reload(project)
+
+    async def update_project(self, project: Project) -> Project:
+        self._session.add(project)
+        await self._session.commit()
+        return await self._reload(project)
+
+    async def delete_project(self, project: Project) -> None:
+        await self._session.delete(project)
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Project.__tablename__, -1)
+
+    async def create_projects(self, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        ids = sorted((await self._session.exec(insert(Project).returning(Project.id), params=rows)).scalars())
+        record_changes(self._session.sync_session, [Project.__tablename__], ids)
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Project.__tablename__, len(ids))
+        return ids
+
+    async def update_projects(self, rows: list[dict]) -> None:
+        if rows:
+            await self._session.exec(update(Project), params=rows)
+            record_changes(self._session.sync_session, [Project.__tablename__], [row["id"] for row in rows])
+        await self._session.commit()
+
+    async def delete_projects(self, ids: list[int]) -> list[int]:
+        await self._session.exec(update(Task).where(Task.project_id.in_(ids)).values(project_id=None))
+        deleted_ids = (await self._session.exec(
+            delete(Project).where(Project.id.in_(ids)).returning(Project.id)
+        )).scalars().all()
+        record_changes(self._session.sync_session, [Project.__tablename__, Task.__tablename__], deleted_ids)
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Project.__tablename__, -len(deleted_ids))
+        return deleted_ids
+
+    async def restore_project(self, snapshot: dict) -> Project:
+        return await self._session.merge(detached_instance(Project, snapshot), load=False)
+
+    async def _reload(self, project: Project) -> Project:
+        return await self._session.get(Project, project.id, options=self._load_options, populate_existing=True)
+
+    apply_update = staticmethod(SQLProjectOperations.apply_update)
+    get_db_project_object = staticmethod(SQLProjectOperations.get_db_project_object)
+
+
+class AsyncSQLTaskOperations(AsyncTaskOperations):
+    """AsyncTaskOperations implemented over AsyncSession.
+
+    Relationships serialized by read_model are always loaded eagerly, lazy loading is not possible in async code.
+    """
+    def __init__(self, session: AsyncSession, row_count_cache: RowCountCache | None = None,
+                 read_model: type[SQLModel] | None = TaskRead, change_versions: ChangeVersions | None = None):
+        self._session = session
+        self._row_count_cache = row_count_cache
+        self._load_options = relationship_loaders(Task, read_model)
+        self._archived_load_options = relationship_loaders(Task, read_model, ALL_TASKS)
+        track_changes(session.sync_session, change_versions)
+
+    def _select(self, task=Task):
+        return select(task).options(*(self._archived_load_options if task is ALL_TASKS else self._load_options))
+
+    async def get_tasks_count(self, include_archived: bool = False) -> int:
+        count = await count_rows_async(self._session, Task, self._row_count_cache)
+        if include_archived:
+            count += await count_rows_async(self._session, TaskArchive, self._row_count_cache,
+                                            where=TaskArchive.deleted == False)
+        return count
+
+    async def get_task_by_id(self, _id: int, include_archived: bool = False) -> Task:
+        task = await self._session.get(Task, _id, options=self._load_options)
+        if task is None and include_archived:
+            return (await self._session.exec(self._select(ALL_TASKS).where(ALL_TASKS.id == _id))).first()
+        return task
+
+    async def get_tasks_by_ids(self, ids: list[int]) -> list[Task]:
+        return (await self._session.exec(select(Task).where(Task.id.in_(ids)))).all()
+
+    async def get_tasks(self, offset: int, limit: int, order_by: TaskOrder = "id",
+                        include_archived: bool = False) -> list[Task]:
+        task = task_entity(include_archived)
+        statement = self._select(task)
+        if order_by == "deadline":
+            statement = statement.order_by(task.deadline.is_(None), task.deadline, task.id)
+        else:
+            statement = statement.order_by(task.id)
+        tasks = await self._session.exec(statement.offset(offset).limit(limit))
+        return tasks.all()
+
+    async def get_tasks_after(self, limit: int, after_id: int, after_deadline: date | None,
+                              order_by: TaskOrder = "id", include_archived: bool = False) -> list[Task]:
+        task = task_entity(include_archived)
+        statement = self._select(task)
+        if order_by == "id":
+            tasks = await self._session.exec(statement.where(task.id > after_id).order_by(task.id).limit(limit))
+            return tasks.all()
+
+        tasks = []
+        if after_deadline is not None:
+            tasks = (await self._session.exec(
+                statement
+                .where(tuple_(task.deadline, task.id) > tuple_(after_deadline, after_id))
+                .order_by(task.deadline, task.id)
+                .limit(limit)
+            )).all()
+            if len(tasks) == limit:
+                return tasks
+            after_id = 0  # tasks with deadline are exhausted, continue with tasks without deadline
+
+        return tasks + (await self._session.exec(
+            statement.where(task.deadline == None, task.id > after_id).order_by(task.id).limit(limit - len(tasks))
+        )).all()
+
+    async def iter_tasks(self, batch_size: int) -> AsyncIterator[dict]:
+        async for row in iter_rows_async(self._session, Task, batch_size):
+            yield row
+
+    async def get_tasks_with_deadlines(self, before: date | None = None, after: date | None = None,
+                                       completed: bool | None = None, project_id: int | None = None,
+                                       limit: int | None = None, include_archived: bool = False) -> list[Task]:
+        task = task_entity(include_archived)
+        statement = deadline_range_statement(before, after, completed, project_id, limit, self._select(task), task)
+        return (await self._session.exec(statement)).all()
+
+    async def get_max_deadlines(self, project_ids: list[int]) -> dict[int, date]:
+        rows = await self._session.exec(max_deadlines_statement(project_ids))
+        return {project_id: deadline for project_id, deadline in rows if deadline is not None}
+
+    async def get_titles_after_deadline(self, deadlines: dict[int, date], limit: int) -> dict[int, list[str]]:
+        rows = []
+        for statement in titles_after_deadline_statements(deadlines, limit):
+            rows.extend(await self._session.exec(statement))
+        return group_titles(rows)
+
+    async def search_tasks(self, terms: list[str], limit: int, project_id: int | None = None,
+                           after: tuple[float, int] | None = None, min_id: int = 0,
+                           max_id: int | None = None) -> list[tuple[Task, float]]:
+        statement = search_statement(terms, limit, project_id, after, min_id, max_id).options(*self._load_options)
+        return [(task, rank) for task, rank in await self._session.exec(statement)]
+
+    async def get_search_window(self, terms: list[str], max_matches: int,
+                                project_id: int | None = None) -> tuple[int, int]:
+        min_statement, max_statement = search_window_statements(terms, max_matches, project_id)
+        left_out_id = (await self._session.exec(min_statement)).first()
+        return left_out_id + 1 if left_out_id else 0, (await self._session.exec(max_statement)).first() or 0
+
+    async def assign_tasks_to_project(self, project_id: int, task_ids: list[int]) -> list[int]:
+        await self._session.exec(
+            update(Task).where(Task.project_id == project_id, Task.id.not_in(task_ids)).values(project_id=None)
+        )
+        record_changes(self._session.sync_session, [Task.__tablename__], all_projects=True)
+        if not task_ids:
+            return []
+        assigned_ids = set((await self._session.exec(
+            update(Task).where(Task.id.in_(task_ids)).values(project_id=project_id).returning(Task.id)
+        )).scalars())
+        return [task_id for task_id in task_ids if task_id not in assigned_ids]
+
+    async def create_task(self, task: Task) -> Task:
+        self._session.add(task)
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Task.__tablename__, 1)
+        return await self._reload(task)
+
+    async def update_task(self, task: Task) -> Task:
+        self._session.add(task)
+        await self._session.commit()
+        return await self._reload(task)
+
+    async def delete_task(self, task: Task) -> None:
+        await self._session.delete(task)
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Task.__tablename__, -1)
+
+    async def create_tasks(self, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        ids = sorted((await self._session.exec(insert(Task).returning(Task.id), params=rows)).scalars())
+        record_changes(self._session.sync_session, [Task.__tablename__], (row.get("project_id") for row in rows))
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Task.__tablename__, len(ids))
+        return ids
+
+    async def update_tasks(self, rows: list[dict]) -> None:
+        if rows:
+            await self._session.exec(update(Task), params=rows)
+            record_changes(self._session.sync_session, [Task.__tablename__], all_projects=True)
+        await self._session.commit()
+
+    async def delete_tasks(self, ids: list[int]) -> list[int]:
+        deleted = (await self._session.exec(
+            delete(Task).where(Task.id.in_(ids)).returning(Task.id, Task.project_id)
+        )).all()
+        deleted_ids = [_id for _id, _ in deleted]
+        record_changes(self._session.sync_session, [Task.__tablename__], (project_id for _, project_id in deleted))
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(Task.__tablename__, -len(deleted_ids))
+        return deleted_ids
+
+    async def get_completed_task_ids(self, completed_before: date, limit: int) -> list[int]:
+        return (await self._session.exec(completed_task_ids_statement(completed_before, limit))).all()
+
+    async def archive_tasks(self, ids: list[int], deleted: bool = False) -> list[int]:
+        copy, remove = archive_statements(ids, deleted)
+        await self._session.exec(copy)
+        moved = (await self._session.exec(remove)).all()
+        record_changes(self._session.sync_session, [Task.__tablename__], (project_id for _, project_id in moved))
+        await self._session.commit()
+        count_archived(moved, deleted, self._row_count_cache)
+        return [_id for _id, _ in moved]
+
+    async def delete_archived_tasks(self, ids: list[int], soft: bool = False) -> list[int]:
+        deleted = (await self._session.exec(delete_archived_statement(ids, soft))).all()
+        record_changes(self._session.sync_session, [Task.__tablename__], (project_id for _, project_id in deleted))
+        await self._session.commit()
+        if self._row_count_cache is not None:
+            self._row_count_cache.add(TaskArchive.__tablename__, -len(deleted))
+        return [_id for _id, _ in deleted]
+
+    async def restore_task(self, snapshot: dict) -> Task:
+        return await self._session.merge(detached_instance(Task, snapshot), load=False)
+
+    async def _reload(self, task: Task) -> Task:
+        return await self._session.get(Task, task.id, options=self._load_options, populate_existing=True)
+
+    apply_update = staticmethod(SQLTaskOperations.apply_update)
+    create_db_task_object = staticmethod(SQLTaskOperations.create_db_task_object)
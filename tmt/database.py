@@ -1,15 +1,143 @@
-from sqlmodel import create_engine, Session, SQLModel
+import os
+from dataclasses import dataclass, fields
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .schema import create_schema
 
 # Database URL
 SQLALCHEMY_DATABASE_URL = "sqlite:///./db/task_management_tool.sqlite"
+SQLALCHEMY_READ_DATABASE_URL = "sqlite:///file:./db/task_management_tool.sqlite?mode=ro&uri=true"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./db/task_management_tool.sqlite"
+
+
+def env_flag(name: str) -> bool:
+    """Read boolean environment variable, "1", "true" and "yes" (any case) enable it."""
+    return os.getenv(name, "false").lower() in ("1", "true", "yes")
+
+
+def env_config[T](cls: type[T], prefix: str) -> T:
+    """Create settings dataclass, every field set by <prefix><FIELD> environment variable is converted to its type."""
+    overrides = {}
+    for field in fields(cls):
+        name = f"{prefix}{field.name.upper()}"
+        if (value := os.getenv(name)) is not None:
+            overrides[field.name] = env_flag(name) if field.type is bool else field.type(value)
+    return cls(**overrides)
+
+
+# Keep row counts in process memory instead of running COUNT(*) for every listed page.
+# Enable only when this process is the single writer of the database.
+ROW_COUNT_CACHE_ENABLED = env_flag("TMT_ROW_COUNT_CACHE")
+
+# Serve ETags of list and item routes from per-table / per-project change versions kept in process memory,
+# so polls of unchanged data get 304 without a query. Enable only when this process is the single writer.
+ETAGS_ENABLED = env_flag("TMT_ETAGS")
+
+# Serve list routes from dicts built out of row tuples, serialized without response_model validation
+# (by orjson when installed). Used only by SQL backend without operations cache.
+FAST_SERIALIZATION_ENABLED = env_flag("TMT_FAST_SERIALIZATION")
+
+# Storage used by API: "sqlite" (default) or "memory" for ephemeral deployments, data is lost on restart
+STORAGE_BACKEND = os.getenv("TMT_STORAGE", "sqlite").lower()
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """SQLite connection settings, every field can be overridden by TMT_SQLITE_<FIELD> environment variable."""
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024  # bytes
+    cache_size: int = -64 * 1024  # negative value is size in KiB
+    busy_timeout: int = 5000  # ms
+    read_pool_size: int = 8
+    write_pool_timeout: float = 30.0  # seconds to wait for the writer connection
+
+    @classmethod
+    def from_env(cls) -> "EngineProfile":
+        return env_config(cls, "TMT_SQLITE_")
+
+    def apply(self, dbapi_connection, read_only: bool = False) -> None:
+        """Set pragmas on new connection, journal mode is persistent and is changed by writer only."""
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={self.synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        cursor.close()
+
+
+engine_profile = EngineProfile.from_env()
 
-# Create the SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Create the SQLAlchemy engines, mutations share single writer connection so they queue in the pool
+# instead of failing on SQLite lock, reads use separate pool of read-only connections (concurrent in WAL mode)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False},
+                       pool_size=1, max_overflow=0, pool_timeout=engine_profile.write_pool_timeout)
+read_engine = create_engine(SQLALCHEMY_READ_DATABASE_URL, connect_args={"check_same_thread": False},
+                            pool_size=engine_profile.read_pool_size, max_overflow=0)
+
+@event.listens_for(engine, "connect")
+def _configure_write_connection(dbapi_connection, connection_record):
+    engine_profile.apply(dbapi_connection)
+
+@event.listens_for(read_engine, "connect")
+def _configure_read_connection(dbapi_connection, connection_record):
+    engine_profile.apply(dbapi_connection, read_only=True)
 
 def get_sqlite_db():
     with Session(engine) as session:
         yield session
 
+def get_sqlite_read_db():
+    with Session(read_engine) as session:
+        yield session
+
 def create_db():
-    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        create_schema(connection)
+
+
+# Async engine used by tmt.main_async application
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _configure_async_connection(dbapi_connection, connection_record):
+    engine_profile.apply(dbapi_connection)
+
+async def get_sqlite_async_db():
+    # objects are not expired on commit, so reading them afterwards doesn't need implicit IO
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+async def create_db_async():
+    async with async_engine.begin() as connection:
+        await connection.run_sync(create_schema)
+
+
+class QueryCounter:
+    """Count SQL statements executed through engine while used as context manager.
+
+    with QueryCounter(engine) as counter:
+        ...
+    counter.count
+    """
+    def __init__(self, bind: Engine):
+        self._bind = bind
+        self.count = 0
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self._bind, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self._bind, "before_cursor_execute", self._on_execute)
+
 
@@ -1,52 +1,353 @@
+import asyncio
+import json
+import time
+from datetime import date
+from collections.abc import AsyncIterator, Iterable, Iterator
 from typing import Annotated
-from fastapi import FastAPI, HTTPException, Depends, Query
-from sqlmodel import Session
+from fastapi import Body, FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, SQLModel
 
-from .crud_sql import SQLProjectOperations, SQLTaskOperations
-from .models import Project, ProjectBase, ProjectRead, ProjectUpdate, Task, TaskBase, TaskRead, TaskUpdate
-from .database import get_sqlite_db, create_db
-from .services import ProjectService, TaskService
+from .archive_tasks import ArchiveConfig, ArchiveJob
+from .crud_cache import CacheConfig, CachedProjectOperations, CachedTaskOperations, OperationsCache
+from .crud_base import ProjectOperations, TaskOperations
+from .crud_memory import MemoryChangeOperations, MemoryProjectOperations, MemoryStore, MemoryTaskOperations
+from .crud_sql import ChangeVersions, RowCountCache, SQLChangeOperations, SQLProjectOperations, SQLTaskOperations
+from .models import (BatchItemResult, Change, FieldSet, Project, ProjectBase, ProjectBatchUpdate, ProjectRead,
+                     ProjectStats, ProjectUpdate, Task, TaskBase, TaskBatchUpdate, TaskOrder, TaskRead, TaskUpdate)
+from .database import (ETAGS_ENABLED, FAST_SERIALIZATION_ENABLED, ROW_COUNT_CACHE_ENABLED, STORAGE_BACKEND,
+                       async_engine, engine, get_sqlite_db, get_sqlite_read_db, create_db, read_engine)
+from .metrics import PROMETHEUS_CONTENT_TYPE, MetricsConfig, MetricsMiddleware, instrument_engine, render_metrics
+from .serialization import PROJECT_ROWS, SPARSE_ROWS, TASK_ROWS, RowsResponse
+from .services import ChangeService, ChangesUnavailableError, Page, ProjectService, TaskService, parse_field_set
 
 
 SQLiteSessionDep = Annotated[Session, Depends(get_sqlite_db)]
+SQLiteReadSessionDep = Annotated[Session, Depends(get_sqlite_read_db)]
+
+row_count_cache = RowCountCache() if ROW_COUNT_CACHE_ENABLED else None
+change_versions = ChangeVersions() if ETAGS_ENABLED else None
+memory_store = MemoryStore(change_versions) if STORAGE_BACKEND == "memory" else None
+
+cache_config = CacheConfig.from_env()
+operations_cache = OperationsCache(cache_config) if cache_config.enabled else None
+# list routes serve row dicts read by SQL operations, memory backend and operations cache hold model instances
+fast_serialization = FAST_SERIALIZATION_ENABLED and memory_store is None and operations_cache is None
+
+def get_operations(session: Session, as_rows: bool = False, project_fields: FieldSet | None = None,
+                   task_fields: FieldSet | None = None) -> tuple[ProjectOperations, TaskOperations]:
+    """Field sets are pushed down to SQL operations, unless operations cache holding whole objects is enabled."""
+    if operations_cache is not None:
+        project_fields = task_fields = None
+    if memory_store is not None:
+        project_ops, task_ops = MemoryProjectOperations(memory_store), MemoryTaskOperations(memory_store)
+    else:
+        project_ops = SQLProjectOperations(session, row_count_cache, change_versions=change_versions, as_rows=as_rows,
+                                           field_set=project_fields)
+        task_ops = SQLTaskOperations(session, row_count_cache, change_versions=change_versions, as_rows=as_rows,
+                                     field_set=task_fields)
+    if operations_cache is not None:
+        return CachedProjectOperations(project_ops, operations_cache), CachedTaskOperations(task_ops, operations_cache)
+    return project_ops, task_ops
 
 def get_project_service(session: SQLiteSessionDep) -> ProjectService:
-    project_ops = SQLProjectOperations(session)
-    task_ops = SQLTaskOperations(session)
+    project_ops, task_ops = get_operations(session)
     return ProjectService(project_ops, task_ops)
 
 def get_task_service(session: SQLiteSessionDep) -> TaskService:
-    task_ops = SQLTaskOperations(session)
-    project_ops = SQLProjectOperations(session)
+    project_ops, task_ops = get_operations(session)
+    return TaskService(task_ops, project_ops)
+
+def get_project_read_service(session: SQLiteReadSessionDep) -> ProjectService:
+    project_ops, task_ops = get_operations(session, as_rows=fast_serialization)
+    return ProjectService(project_ops, task_ops)
+
+def get_task_read_service(session: SQLiteReadSessionDep) -> TaskService:
+    project_ops, task_ops = get_operations(session, as_rows=fast_serialization)
+    return TaskService(task_ops, project_ops)
+
+def requested_fields(model: type[SQLModel], fields: str | None, expand: str | None,
+                     required: tuple[str, ...] = ("id",)) -> FieldSet | None:
+    try:
+        return parse_field_set(model, fields, expand, required)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# fields= and expand= take comma separated names, id is always returned
+def task_fields(fields: str | None = None, expand: str | None = None) -> FieldSet | None:
+    return requested_fields(Task, fields, expand)
+
+def listed_task_fields(fields: str | None = None, expand: str | None = None,
+                       order_by: TaskOrder = "id") -> FieldSet | None:
+    """Next cursor of tasks ordered by deadline is built from it, so deadline is returned too."""
+    return requested_fields(Task, fields, expand, ("id", "deadline") if order_by == "deadline" else ("id",))
+
+def project_fields(fields: str | None = None, expand: str | None = None) -> FieldSet | None:
+    return requested_fields(Project, fields, expand)
+
+TaskFieldsDep = Annotated[FieldSet | None, Depends(task_fields)]
+ListedTaskFieldsDep = Annotated[FieldSet | None, Depends(listed_task_fields)]
+ProjectFieldsDep = Annotated[FieldSet | None, Depends(project_fields)]
+
+def get_task_view_service(session: SQLiteReadSessionDep, field_set: TaskFieldsDep) -> TaskService:
+    project_ops, task_ops = get_operations(session, as_rows=fast_serialization, task_fields=field_set)
     return TaskService(task_ops, project_ops)
 
+def get_task_list_service(session: SQLiteReadSessionDep, field_set: ListedTaskFieldsDep) -> TaskService:
+    project_ops, task_ops = get_operations(session, as_rows=fast_serialization, task_fields=field_set)
+    return TaskService(task_ops, project_ops)
+
+def get_project_view_service(session: SQLiteReadSessionDep, field_set: ProjectFieldsDep) -> ProjectService:
+    project_ops, task_ops = get_operations(session, as_rows=fast_serialization, project_fields=field_set)
+    return ProjectService(project_ops, task_ops)
+
+def get_change_service(session: SQLiteReadSessionDep) -> ChangeService:
+    if memory_store is not None:
+        return ChangeService(MemoryChangeOperations(memory_store))
+    return ChangeService(SQLChangeOperations(session))
+
+archive_config = ArchiveConfig.from_env()
+
+def soft_delete(archive: bool | None = None) -> bool:
+    """archive= of task delete routes, TMT_ARCHIVE_SOFT_DELETE when omitted."""
+    return archive if archive is not None else archive_config.soft_delete
+
+SoftDeleteDep = Annotated[bool, Depends(soft_delete)]
+
+def archive_completed_tasks() -> int:
+    """Run archiving job with operations of requests, so caches see the archived tasks."""
+    with Session(engine) as session:
+        project_ops, task_ops = get_operations(session)
+        return TaskService(task_ops, project_ops).archive_completed_tasks(archive_config.completed_days,
+                                                                          batch_size=archive_config.batch_size)
+
+archive_job = ArchiveJob(archive_completed_tasks, archive_config.interval_s) if archive_config.interval_s > 0 else None
+
 ProjectServiceDep = Annotated[ProjectService, Depends(get_project_service)]
 TaskServiceDep = Annotated[TaskService, Depends(get_task_service)]
+# services for GET routes, backed by read-only connection pool
+ProjectReadServiceDep = Annotated[ProjectService, Depends(get_project_read_service)]
+TaskReadServiceDep = Annotated[TaskService, Depends(get_task_read_service)]
+# services for GET routes serving fields= / expand= views
+TaskViewServiceDep = Annotated[TaskService, Depends(get_task_view_service)]
+TaskListServiceDep = Annotated[TaskService, Depends(get_task_list_service)]
+ProjectViewServiceDep = Annotated[ProjectService, Depends(get_project_view_service)]
+ChangeServiceDep = Annotated[ChangeService, Depends(get_change_service)]
+
+# change stream polls change log, sends comment line to keep idle connection open and ends after
+# CHANGE_STREAM_SECONDS, so clients reconnect with Last-Event-ID
+CHANGE_POLL_SECONDS = 1.0
+CHANGE_HEARTBEAT_SECONDS = 15.0
+CHANGE_STREAM_SECONDS = 300.0
+CHANGE_STREAM_BATCH = 500
+
+metrics_config = MetricsConfig.from_env()
+if metrics_config.enabled:
+    for instrumented_engine in (engine, read_engine, async_engine.sync_engine):
+        instrument_engine(instrumented_engine)
 
 tmt = FastAPI()
+if metrics_config.enabled:
+    tmt.add_middleware(MetricsMiddleware, config=metrics_config)
+
+
+def set_page_headers(response: Response, page: Page) -> None:
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.truncated:
+        response.headers["X-Truncated"] = "true"
+
+
+def list_response(items: list, adapter: TypeAdapter, response: Response) -> list | Response:
+    """Serialize row dicts of fast serialization path right away with headers set on response,
+    return model instances of the standard path to be validated by response_model."""
+    if not fast_serialization:
+        return items
+    return RowsResponse(items, adapter, headers=response.headers)
+
+
+def view_response(content: list | SQLModel, read_model: type[SQLModel], field_set: FieldSet,
+                  response: Response) -> Response:
+    """Serialize items (or item) limited to field_set. Row dicts read by SQL operations hold only its fields,
+    model instances of memory backend and operations cache are trimmed here."""
+    include = {*field_set.columns, *field_set.expand}
+
+    def view(item) -> dict:
+        return item if isinstance(item, dict) else read_model.model_validate(item).model_dump(include=include)
+
+    rows = [view(item) for item in content] if isinstance(content, list) else view(content)
+    return RowsResponse(rows, SPARSE_ROWS, headers=response.headers)
+
+
+def deadline_day(within_days: int | None) -> date | None:
+    """Day tasks within_days from today were found on, part of their ETag."""
+    return date.today() if within_days is not None else None
+
+
+def not_modified(request: Request, response: Response, project_id: int | None = None,
+                 day: date | None = None) -> Response | None:
+    """Set ETag of data served by GET route, return 304 response when If-None-Match already holds it.
+
+    Tasks are served with their project and projects with their tasks, so version of data without project_id
+    covers both tables. day is part of ETag of results depending on today's date.
+    """
+    if change_versions is None:
+        return None
+    if project_id is None:
+        version = change_versions.table_version(Task.__tablename__, Project.__tablename__)
+    else:
+        version = change_versions.project_version(project_id)
+    etag = f'"{change_versions.epoch}-{version}{f"-{day}" if day is not None else ""}"'
+    response.headers["ETag"] = etag
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is None:
+        return None
+    if if_none_match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def ndjson_response(rows: Iterable[dict], session: Session, chunk_rows: int = 500) -> StreamingResponse:
+    def stream() -> Iterator[bytes]:
+        # session dependency can exit before the body is streamed, closed session reconnects and is closed here
+        with session:
+            lines = []
+            for row in rows:
+                lines.append(json.dumps(row, default=str))
+                if len(lines) == chunk_rows:
+                    yield ("\n".join(lines) + "\n").encode()
+                    lines = []
+            if lines:
+                yield ("\n".join(lines) + "\n").encode()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def change_events(change_service: ChangeService, session: Session, since: int) -> StreamingResponse:
+    """Server-Sent Events of changes after since, every event holds seq as its id."""
+    def read_changes(after: int) -> Page[Change]:
+        try:
+            return change_service.get_changes(since=after, limit=CHANGE_STREAM_BATCH)
+        finally:
+            # connection and read snapshot are released between polls, closed session reconnects
+            session.close()
+
+    async def stream() -> AsyncIterator[bytes]:
+        last_seq = since
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < CHANGE_STREAM_SECONDS:
+            try:
+                page = await run_in_threadpool(read_changes, last_seq)
+            except ChangesUnavailableError as e:
+                yield f"event: gone\ndata: {json.dumps(str(e))}\n\n".encode()
+                return
+            for change in page.items:
+                yield f"id: {change.seq}\nevent: change\ndata: {change.model_dump_json()}\n\n".encode()
+                last_seq, last_sent = change.seq, time.monotonic()
+            if page.next_cursor is None:
+                if time.monotonic() - last_sent >= CHANGE_HEARTBEAT_SECONDS:
+                    yield b": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                await asyncio.sleep(CHANGE_POLL_SECONDS)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @tmt.on_event("startup")
 def on_startup():
-    create_db()
+    if memory_store is None:
+        create_db()
+    if archive_job is not None:
+        archive_job.start()
+
+
+@tmt.on_event("shutdown")
+def on_shutdown():
+    if archive_job is not None:
+        archive_job.stop()
 
 
 ### TASKS
 
 
 @tmt.get("/tasks", response_model=list[TaskRead], status_code=200)
-def get_tasks(task_service: TaskServiceDep, limit: Annotated[int, Query(le=100)] = 100, offset: int = 0) -> list[Task]:
+def get_tasks(task_service: TaskListServiceDep, field_set: ListedTaskFieldsDep, request: Request, response: Response,
+              limit: Annotated[int, Query(le=100)] = 100, offset: int = 0, cursor: str | None = None,
+              order_by: TaskOrder = "id", include_archived: bool = False) -> list[Task]:
+    if (unchanged := not_modified(request, response)) is not None:
+        return unchanged
     try:
-        return task_service.get_paginated_tasks(limit=limit, offset=offset)
+        page = task_service.get_paginated_tasks(limit=limit, offset=offset, cursor=cursor, order_by=order_by,
+                                                include_archived=include_archived)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    if field_set is not None:
+        return view_response(page.items, TaskRead, field_set, response)
+    return list_response(page.items, TASK_ROWS, response)
 
 @tmt.get("/tasks/deadlines", response_model=list[TaskRead], status_code=200)
-def get_tasks_with_deadline(task_service: TaskServiceDep) -> list[Task]:
+def get_tasks_with_deadline(task_service: TaskViewServiceDep, field_set: TaskFieldsDep, request: Request,
+                            response: Response,
+                            before: date | None = None, after: date | None = None,
+                            within_days: Annotated[int | None, Query(ge=0)] = None, completed: bool | None = None,
+                            project_id: int | None = None, limit: Annotated[int | None, Query(ge=1)] = None,
+                            include_archived: bool = False) -> list[Task]:
+    """Tasks with deadline ordered by deadline, before / after bounds are inclusive."""
+    if (unchanged := not_modified(request, response, project_id=project_id, day=deadline_day(within_days))) is not None:
+        return unchanged
+    try:
+        tasks = task_service.get_tasks_with_deadline(before=before, after=after, within_days=within_days,
+                                                     completed=completed, project_id=project_id, limit=limit,
+                                                     include_archived=include_archived)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if field_set is not None:
+        return view_response(tasks, TaskRead, field_set, response)
+    return list_response(tasks, TASK_ROWS, response)
+
+
+@tmt.get("/tasks/overdue", response_model=list[TaskRead], status_code=200)
+def get_overdue_tasks(task_service: TaskReadServiceDep, request: Request, response: Response,
+                      limit: Annotated[int, Query(ge=1, le=100)] = 100, project_id: int | None = None) -> list[Task]:
+    if (unchanged := not_modified(request, response, project_id=project_id, day=date.today())) is not None:
+        return unchanged
+    return list_response(task_service.get_overdue_tasks(limit=limit, project_id=project_id), TASK_ROWS, response)
+
+
+@tmt.get("/tasks/upcoming", response_model=list[TaskRead], status_code=200)
+def get_upcoming_tasks(task_service: TaskReadServiceDep, request: Request, response: Response,
+                       n: Annotated[int, Query(ge=1, le=100)] = 10, project_id: int | None = None) -> list[Task]:
+    if (unchanged := not_modified(request, response, project_id=project_id, day=date.today())) is not None:
+        return unchanged
+    return list_response(task_service.get_upcoming_tasks(n=n, project_id=project_id), TASK_ROWS, response)
+
+
+@tmt.get("/tasks/search", response_model=list[TaskRead], status_code=200)
+def search_tasks(task_service: TaskReadServiceDep, request: Request, response: Response,
+                 q: Annotated[str, Query(min_length=1, max_length=200)],
+                 limit: Annotated[int, Query(ge=1, le=100)] = 20, project_id: int | None = None,
+                 cursor: str | None = None) -> list[Task]:
+    """Tasks holding every word of q in title or description ranked by BM25, word* matches a prefix."""
+    if (unchanged := not_modified(request, response, project_id=project_id)) is not None:
+        return unchanged
     try:
-        return task_service.get_tasks_with_deadline()
+        page = task_service.search_tasks(q=q, limit=limit, project_id=project_id, cursor=cursor)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
+
+
+@tmt.get("/tasks/export", response_class=StreamingResponse, status_code=200)
+def export_tasks(task_service: TaskReadServiceDep, session: SQLiteReadSessionDep) -> StreamingResponse:
+    """Stream all tasks as newline delimited JSON."""
+    return ndjson_response(task_service.export_tasks(), session)
 
 
 @tmt.post("/tasks", response_model=TaskRead, status_code=201)
@@ -57,6 +358,46 @@ def create_task(task: TaskBase, task_service: TaskServiceDep) -> Task:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# batch routes are registered before /tasks/{_id}, which would match "batch" as _id
+@tmt.post("/tasks/batch", response_model=list[BatchItemResult], status_code=200)
+def create_tasks(tasks: list[TaskBase], task_service: TaskServiceDep) -> list[BatchItemResult]:
+    """Create many tasks in one transaction, result of every item holds its id or validation error."""
+    try:
+        return task_service.create_tasks(tasks=tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@tmt.patch("/tasks/batch", response_model=list[BatchItemResult], status_code=200)
+def update_tasks(task_updates: list[TaskBatchUpdate], task_service: TaskServiceDep) -> list[BatchItemResult]:
+    """Update many tasks identified by id in one transaction, only provided fields are changed."""
+    try:
+        return task_service.update_tasks(task_updates=task_updates)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@tmt.delete("/tasks/batch", response_model=list[BatchItemResult], status_code=200)
+def delete_tasks(task_ids: Annotated[list[int], Body()], task_service: TaskServiceDep) -> list[BatchItemResult]:
+    """Delete many tasks in one transaction."""
+    try:
+        return task_service.delete_tasks(task_ids=task_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@tmt.get("/tasks/{_id}", response_model=TaskRead, status_code=200)
+def get_task(_id: int, task_service: TaskViewServiceDep, field_set: TaskFieldsDep, request: Request,
+             response: Response, include_archived: bool = False) -> Task:
+    if (unchanged := not_modified(request, response)) is not None:
+        return unchanged
+    try:
+        task = task_service.get_task(task_id=_id, include_archived=include_archived)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return view_response(task, TaskRead, field_set, response) if field_set is not None else task
+
+
 @tmt.put("/tasks/{_id}", response_model=TaskRead, status_code=200)
 def update_task(_id: int, task_update: TaskUpdate, task_service: TaskServiceDep) -> Task:
     try:
@@ -66,9 +407,10 @@ def update_task(_id: int, task_update: TaskUpdate, task_service: TaskServiceDep)
 
 
 @tmt.delete("/tasks/{_id}", status_code=204)
-def delete_task(_id: int, task_service: TaskServiceDep) -> None:
+def delete_task(_id: int, task_service: TaskServiceDep, archive: SoftDeleteDep) -> None:
+    """Delete task, with archive (TMT_ARCHIVE_SOFT_DELETE by default) keep it in archive marked as deleted."""
     try:
-        task_service.delete_task(task_id=_id)
+        task_service.delete_task(task_id=_id, archive=archive)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -77,11 +419,41 @@ def delete_task(_id: int, task_service: TaskServiceDep) -> None:
 
 
 @tmt.get("/projects", response_model=list[ProjectRead], status_code=200)
-def get_projects(project_service: ProjectServiceDep, limit: Annotated[int, Query(le=100)] = 100, offset: int = 0) -> list[Project]:
+def get_projects(project_service: ProjectViewServiceDep, field_set: ProjectFieldsDep, request: Request,
+                 response: Response, limit: Annotated[int, Query(le=100)] = 100, offset: int = 0,
+                 cursor: str | None = None) -> list[Project]:
+    if (unchanged := not_modified(request, response)) is not None:
+        return unchanged
     try:
-        return project_service.get_paginated_projects(limit=limit, offset=offset)
+        page = project_service.get_paginated_projects(limit=limit, offset=offset, cursor=cursor)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    if field_set is not None:
+        return view_response(page.items, ProjectRead, field_set, response)
+    return list_response(page.items, PROJECT_ROWS, response)
+
+
+# registered before /projects/{_id}, which would match "stats" as _id
+@tmt.get("/projects/stats", response_model=list[ProjectStats], status_code=200)
+def get_projects_stats(project_service: ProjectReadServiceDep, request: Request, response: Response,
+                       limit: Annotated[int, Query(ge=1, le=100)] = 100,
+                       cursor: str | None = None) -> list[ProjectStats]:
+    """Task counts of projects ordered by project id, paginated by cursor."""
+    if (unchanged := not_modified(request, response, day=date.today())) is not None:
+        return unchanged
+    try:
+        page = project_service.get_paginated_project_stats(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
+
+
+@tmt.get("/projects/export", response_class=StreamingResponse, status_code=200)
+def export_projects(project_service: ProjectReadServiceDep, session: SQLiteReadSessionDep) -> StreamingResponse:
+    """Stream all projects as newline delimited JSON."""
+    return ndjson_response(project_service.export_projects(), session)
 
 
 @tmt.post("/projects", response_model=ProjectRead, status_code=201)
@@ -92,6 +464,58 @@ def create_project(project: ProjectBase, project_service: ProjectServiceDep) ->
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@tmt.post("/projects/batch", response_model=list[BatchItemResult], status_code=200)
+def create_projects(projects: list[ProjectBase], project_service: ProjectServiceDep) -> list[BatchItemResult]:
+    """Create many projects in one transaction, result of every item holds its id or validation error."""
+    try:
+        return project_service.create_projects(projects=projects)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@tmt.patch("/projects/batch", response_model=list[BatchItemResult], status_code=200)
+def update_projects(project_updates: list[ProjectBatchUpdate],
+                    project_service: ProjectServiceDep) -> list[BatchItemResult]:
+    """Update many projects identified by id in one transaction, only provided fields are changed."""
+    try:
+        return project_service.update_projects(project_updates=project_updates)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@tmt.delete("/projects/batch", response_model=list[BatchItemResult], status_code=200)
+def delete_projects(project_ids: Annotated[list[int], Body()],
+                    project_service: ProjectServiceDep) -> list[BatchItemResult]:
+    """Delete many projects in one transaction, their tasks stay without project."""
+    try:
+        return project_service.delete_projects(project_ids=project_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@tmt.get("/projects/{_id}", response_model=ProjectRead, status_code=200)
+def get_project(_id: int, project_service: ProjectViewServiceDep, field_set: ProjectFieldsDep, request: Request,
+                response: Response) -> Project:
+    if (unchanged := not_modified(request, response, project_id=_id)) is not None:
+        return unchanged
+    try:
+        project = project_service.get_project(project_id=_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return view_response(project, ProjectRead, field_set, response) if field_set is not None else project
+
+
+@tmt.get("/projects/{_id}/stats", response_model=ProjectStats, status_code=200)
+def get_project_stats(_id: int, project_service: ProjectReadServiceDep, request: Request,
+                      response: Response) -> ProjectStats:
+    if (unchanged := not_modified(request, response, project_id=_id, day=date.today())) is not None:
+        return unchanged
+    try:
+        return project_service.get_project_stats(project_id=_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @tmt.put("/projects/{_id}", response_model=ProjectRead, status_code=200)
 def update_project(_id: int, project_update: ProjectUpdate, project_service: ProjectServiceDep) -> Project:
     try:
@@ -106,3 +530,64 @@ def delete_project(_id: int, project_service: ProjectServiceDep) -> None:
         project_service.delete_project(project_id=_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+### CHANGES
+
+
+@tmt.get("/changes", response_model=list[Change], status_code=200)
+def get_changes(change_service: ChangeServiceDep, response: Response, since: Annotated[int, Query(ge=0)] = 0,
+                limit: Annotated[int, Query(ge=1, le=1000)] = 100) -> list[Change]:
+    """Latest change of every task and project changed after seq since, ordered by seq, deleted rows as tombstones.
+    X-Last-Seq holds seq of the latest change, 410 means changes after since were compacted.
+
+    X-Last-Seq is read before the page, so every change up to it was committed by then and following it never skips
+    a change, even when a write lands between both reads (the page may then hold changes past X-Last-Seq)."""
+    last_seq = change_service.get_last_seq()
+    try:
+        page = change_service.get_changes(since=since, limit=limit)
+    except ChangesUnavailableError as e:
+        raise HTTPException(status_code=410, detail=str(e), headers={"X-Last-Seq": str(last_seq)})
+    set_page_headers(response, page)
+    response.headers["X-Last-Seq"] = str(last_seq)
+    return page.items
+
+
+@tmt.get("/changes/stream", response_class=StreamingResponse, status_code=200)
+def stream_changes(change_service: ChangeServiceDep, session: SQLiteReadSessionDep, request: Request,
+                   since: Annotated[int | None, Query(ge=0)] = None) -> StreamingResponse:
+    """Stream changes after since (changes from now on without it) as Server-Sent Events,
+    Last-Event-ID of reconnecting client takes precedence over since."""
+    last_event_id = request.headers.get("Last-Event-ID")
+    if last_event_id is not None:
+        if not last_event_id.isdigit():
+            raise HTTPException(status_code=400, detail=f"Provided Last-Event-ID {last_event_id} is invalid.")
+        since = int(last_event_id)
+    try:
+        if since is None:
+            # read before the first poll, so changes committed while the stream starts are sent too
+            since = change_service.get_last_seq()
+        change_service.verify_since(since)
+    except ChangesUnavailableError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    return change_events(change_service, session, since)
+
+
+### CACHE
+
+
+@tmt.get("/cache/stats", status_code=200)
+def get_cache_stats() -> dict:
+    """Hit / miss statistics of operations cache (enabled with TMT_CACHE_ENABLED)."""
+    if operations_cache is None:
+        raise HTTPException(status_code=404, detail="Operations cache is disabled.")
+    return operations_cache.stats()
+
+
+@tmt.get("/metrics", response_class=PlainTextResponse, status_code=200)
+def get_metrics() -> PlainTextResponse:
+    """Request and SQL histograms in Prometheus text format (disabled with TMT_METRICS_ENABLED=false)."""
+    if not metrics_config.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
@@ -0,0 +1,263 @@
+"""Application serving the task and project routes with async def handlers over aiosqlite.
+
+Start it instead of tmt/main.py to use the async backend:
+
+    uv run fastapi run tmt/main_async.py --app app
+
+Routes not implemented here are served by the sync application mounted at the root. Validation, paging and
+request parameters are the helpers of tmt/services.py and tmt/main.py, only storage access is async here.
+"""
+import json
+from datetime import date
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Annotated
+from fastapi import Body, FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .crud_sql_async import AsyncSQLProjectOperations, AsyncSQLTaskOperations
+from .models import (BatchItemResult, Project, ProjectBase, ProjectBatchUpdate, ProjectRead, ProjectUpdate, Task,
+                     TaskBase, TaskBatchUpdate, TaskOrder, TaskRead, TaskUpdate)
+from .database import get_sqlite_async_db, create_db_async
+from .main import (SoftDeleteDep, change_versions, deadline_day, metrics_config, not_modified, row_count_cache,
+                   set_page_headers, tmt as sync_app)
+from .metrics import MetricsMiddleware
+from .services_async import AsyncProjectService, AsyncTaskService
+
+
+SQLiteAsyncSessionDep = Annotated[AsyncSession, Depends(get_sqlite_async_db)]
+
+def get_project_service(session: SQLiteAsyncSessionDep) -> AsyncProjectService:
+    project_ops = AsyncSQLProjectOperations(session, row_count_cache, change_versions=change_versions)
+    task_ops = AsyncSQLTaskOperations(session, row_count_cache, change_versions=change_versions)
+    return AsyncProjectService(project_ops, task_ops)
+
+def get_task_service(session: SQLiteAsyncSessionDep) -> AsyncTaskService:
+    task_ops = AsyncSQLTaskOperations(session, row_count_cache, change_versions=change_versions)
+    project_ops = AsyncSQLProjectOperations(session, row_count_cache, change_versions=change_versions)
+    return AsyncTaskService(task_ops, project_ops)
+
+ProjectServiceDep = Annotated[AsyncProjectService, Depends(get_project_service)]
+TaskServiceDep = Annotated[AsyncTaskService, Depends(get_task_service)]
+
+app = FastAPI()
+if metrics_config.enabled:
+    # requests forwarded to the mounted sync application are measured here only once
+    app.add_middleware(MetricsMiddleware, config=metrics_config)
+
+
+def ndjson_response(rows: AsyncIterable[dict], session: AsyncSession, chunk_rows: int = 500) -> StreamingResponse:
+    async def stream() -> AsyncIterator[bytes]:
+        # session dependency can exit before the body is streamed, closed session reconnects and is closed here
+        async with session:
+            lines = []
+            async for row in rows:
+                lines.append(json.dumps(row, default=str))
+                if len(lines) == chunk_rows:
+                    yield ("\n".join(lines) + "\n").encode()
+                    lines = []
+            if lines:
+                yield ("\n".join(lines) + "\n").encode()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# Starlette doesn't run startup and shutdown hooks of mounted applications, the sync one is started here
+@app.on_event("startup")
+async def on_startup():
+    await create_db_async()
+    await sync_app.router.startup()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await sync_app.router.shutdown()
+
+
+### TASKS
+
+
+@app.get("/tasks", response_model=list[TaskRead], status_code=200)
+async def get_tasks(task_service: TaskServiceDep, request: Request, response: Response,
+                    limit: Annotated[int, Query(le=100)] = 100, offset: int = 0, cursor: str | None = None,
+                    order_by: TaskOrder = "id", include_archived: bool = False) -> list[Task]:
+    if (unchanged := not_modified(request, response)) is not None:
+        return unchanged
+    try:
+        page = await task_service.get_paginated_tasks(limit=limit, offset=offset, cursor=cursor, order_by=order_by,
+                                                      include_archived=include_archived)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
+
+@app.get("/tasks/deadlines", response_model=list[TaskRead], status_code=200)
+async def get_tasks_with_deadline(task_service: TaskServiceDep, request: Request, response: Response,
+                                  before: date | None = None, after: date | None = None,
+                                  within_days: Annotated[int | None, Query(ge=0)] = None, completed: bool | None = None,
+                                  project_id: int | None = None, limit: Annotated[int | None, Query(ge=1)] = None,
+                                  include_archived: bool = False) -> list[Task]:
+    """Tasks with deadline ordered by deadline, before / after bounds are inclusive."""
+    if (unchanged := not_modified(request, response, project_id=project_id, day=deadline_day(within_days))) is not None:
+        return unchanged
+    try:
+        return await task_service.get_tasks_with_deadline(before=before, after=after, within_days=within_days,
+                                                           completed=completed, project_id=project_id, limit=limit,
+                                                           include_archived=include_archived)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/tasks/overdue", response_model=list[TaskRead], status_code=200)
+async def get_overdue_tasks(task_service: TaskServiceDep, request: Request, response: Response,
+                            limit: Annotated[int, Query(ge=1, le=100)] = 100,
+                            project_id: int | None = None) -> list[Task]:
+    if (unchanged := not_modified(request, response, project_id=project_id, day=date.today())) is not None:
+        return unchanged
+    return await task_service.get_overdue_tasks(limit=limit, project_id=project_id)
+
+
+@app.get("/tasks/upcoming", response_model=list[TaskRead], status_code=200)
+async def get_upcoming_tasks(task_service: TaskServiceDep, request: Request, response: Response,
+                             n: Annotated[int, Query(ge=1, le=100)] = 10, project_id: int | None = None) -> list[Task]:
+    if (unchanged := not_modified(request, response, project_id=project_id, day=date.today())) is not None:
+        return unchanged
+    return await task_service.get_upcoming_tasks(n=n, project_id=project_id)
+
+
+@app.get("/tasks/export", response_class=StreamingResponse, status_code=200)
+async def export_tasks(task_service: TaskServiceDep, session: SQLiteAsyncSessionDep) -> StreamingResponse:
+    """Stream all tasks as newline delimited JSON."""
+    return ndjson_response(task_service.export_tasks(), session)
+
+
+@app.post("/tasks", response_model=TaskRead, status_code=201)
+async def create_task(task: TaskBase, task_service: TaskServiceDep) -> Task:
+    try:
+        return await task_service.create_task(task=task)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# batch routes are registered before /tasks/{_id}, which would match "batch" as _id
+@app.post("/tasks/batch", response_model=list[BatchItemResult], status_code=200)
+async def create_tasks(tasks: list[TaskBase], task_service: TaskServiceDep) -> list[BatchItemResult]:
+    """Create many tasks in one transaction, result of every item holds its id or validation error."""
+    try:
+        return await task_service.create_tasks(tasks=tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.patch("/tasks/batch", response_model=list[BatchItemResult], status_code=200)
+async def update_tasks(task_updates: list[TaskBatchUpdate], task_service: TaskServiceDep) -> list[BatchItemResult]:
+    """Update many tasks identified by id in one transaction, only provided fields are changed."""
+    try:
+        return await task_service.update_tasks(task_updates=task_updates)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/tasks/batch", response_model=list[BatchItemResult], status_code=200)
+async def delete_tasks(task_ids: Annotated[list[int], Body()], task_service: TaskServiceDep) -> list[BatchItemResult]:
+    """Delete many tasks in one transaction."""
+    try:
+        return await task_service.delete_tasks(task_ids=task_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.put("/tasks/{_id}", response_model=TaskRead, status_code=200)
+async def update_task(_id: int, task_update: TaskUpdate, task_service: TaskServiceDep) -> Task:
+    try:
+        return await task_service.update_task(task_id=_id, task_update=task_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/tasks/{_id}", status_code=204)
+async def delete_task(_id: int, task_service: TaskServiceDep, archive: SoftDeleteDep) -> None:
+    try:
+        await task_service.delete_task(task_id=_id, archive=archive)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+### PROJECTS
+
+
+@app.get("/projects", response_model=list[ProjectRead], status_code=200)
+async def get_projects(project_service: ProjectServiceDep, request: Request, response: Response,
+                       limit: Annotated[int, Query(le=100)] = 100, offset: int = 0,
+                       cursor: str | None = None) -> list[Project]:
+    if (unchanged := not_modified(request, response)) is not None:
+        return unchanged
+    try:
+        page = await project_service.get_paginated_projects(limit=limit, offset=offset, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
+
+
+@app.get("/projects/export", response_class=StreamingResponse, status_code=200)
+async def export_projects(project_service: ProjectServiceDep, session: SQLiteAsyncSessionDep) -> StreamingResponse:
+    """Stream all projects as newline delimited JSON."""
+    return ndjson_response(project_service.export_projects(), session)
+
+
+@app.post("/projects", response_model=ProjectRead, status_code=201)
+async def create_project(project: ProjectBase, project_service: ProjectServiceDep) -> Project:
+    try:
+        return await project_service.create_project(project=project)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/projects/batch", response_model=list[BatchItemResult], status_code=200)
+async def create_projects(projects: list[ProjectBase], project_service: ProjectServiceDep) -> list[BatchItemResult]:
+    """Create many projects in one transaction, result of every item holds its id or validation error."""
+    try:
+        return await project_service.create_projects(projects=projects)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.patch("/projects/batch", response_model=list[BatchItemResult], status_code=200)
+async def update_projects(project_updates: list[ProjectBatchUpdate],
+                          project_service: ProjectServiceDep) -> list[BatchItemResult]:
+    """Update many projects identified by id in one transaction, only provided fields are changed."""
+    try:
+        return await project_service.update_projects(project_updates=project_updates)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/projects/batch", response_model=list[BatchItemResult], status_code=200)
+async def delete_projects(project_ids: Annotated[list[int], Body()],
+                          project_service: ProjectServiceDep) -> list[BatchItemResult]:
+    """Delete many projects in one transaction, their tasks stay without project."""
+    try:
+        return await project_service.delete_projects(project_ids=project_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.put("/projects/{_id}", response_model=ProjectRead, status_code=200)
+async def update_project(_id: int, project_update: ProjectUpdate, project_service: ProjectServiceDep) -> Project:
+    try:
+        return await project_service.update_project(project_id=_id, project_update=project_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/projects/{_id}", status_code=204)
+async def delete_project(_id: int, project_service: ProjectServiceDep) -> None:
+    try:
+        await project_service.delete_project(project_id=_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# everything else is served by sync routes
+app.mount("/", sync_app)
@@ -0,0 +1,329 @@
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from .database import env_config
+
+log = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500, 1000)
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    """Instrumentation settings, every field can be overridden by TMT_METRICS_<FIELD> environment variable."""
+    enabled: bool = True
+    slow_request_ms: float = 0  # log statements of requests slower than this, 0 disables the log
+    profiling_enabled: bool = False  # allow X-Profile request header to return call tree instead of response
+    profile_interval: float = 0.001  # seconds between profiler samples
+
+    @classmethod
+    def from_env(cls) -> "MetricsConfig":
+        return env_config(cls, "TMT_METRICS_")
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram with fixed label names, rendered in text exposition format."""
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float], labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._buckets = tuple(sorted(buckets))
+        # label values -> (observations per bucket, not cumulative, sum, count)
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self._buckets), 0.0, 0]
+            if index < len(self._buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total, count) for key, (counts, total, count) in self._series.items())
+        for key, counts, total, count in series:
+            labels = "".join(f'{name}="{_escape(value)}",' for name, value in zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self._buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}le="+Inf"}} {count}')
+            labels = f"{{{labels.rstrip(',')}}}" if labels else ""
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram("tmt_request_duration_seconds", "Time to handle request, response body included.",
+                             LATENCY_BUCKETS, ("method", "route", "status"))
+REQUEST_SQL_STATEMENTS = Histogram("tmt_request_sql_statements", "SQL statements executed by request.",
+                                   COUNT_BUCKETS, ("method", "route"))
+REQUEST_SQL_DURATION = Histogram("tmt_request_sql_duration_seconds", "Time spent executing SQL statements by request.",
+                                 LATENCY_BUCKETS, ("method", "route"))
+REQUEST_LAZY_LOADS = Histogram("tmt_request_lazy_loads", "Relationships lazy loaded by request.",
+                               COUNT_BUCKETS, ("method", "route"))
+REQUEST_COMMIT_DURATION = Histogram("tmt_request_commit_duration_seconds",
+                                    "Time spent in COMMIT (including fsync) by request.",
+                                    LATENCY_BUCKETS, ("method", "route"))
+SQL_STATEMENT_DURATION = Histogram("tmt_sql_statement_duration_seconds", "Duration of single SQL statement.",
+                                   LATENCY_BUCKETS, ("statement",))
+COMMIT_DURATION = Histogram("tmt_commit_duration_seconds", "Duration of single COMMIT, including fsync.",
+                            LATENCY_BUCKETS)
+
+HISTOGRAMS = [REQUEST_DURATION, REQUEST_SQL_STATEMENTS, REQUEST_SQL_DURATION, REQUEST_LAZY_LOADS,
+              REQUEST_COMMIT_DURATION, SQL_STATEMENT_DURATION, COMMIT_DURATION]
+
+
+def render_metrics() -> str:
+    return "\n".join(line for histogram in HISTOGRAMS for line in histogram.render()) + "\n"
+
+
+@dataclass
+class RequestStats:
+    """SQL activity of one request, collected by engine and session event hooks."""
+    statements: int = 0
+    sql_seconds: float = 0.0
+    commit_seconds: float = 0.0
+    lazy_loads: int = 0
+    # (statement, seconds) of every statement, kept only when slow request log is enabled
+    statement_log: list[tuple[str, float]] | None = None
+
+
+# set by MetricsMiddleware for the duration of request, copied into threadpool running sync routes
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+_commit_started: ContextVar[float | None] = ContextVar("commit_started", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    SQL_STATEMENT_DURATION.observe(elapsed, statement=statement.lstrip().split(None, 1)[0].upper())
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += elapsed
+        if stats.statement_log is not None:
+            stats.statement_log.append((statement, elapsed))
+
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def _on_commit(conn) -> None:
+    _commit_started.set(time.perf_counter())
+
+
+def _after_commit(session: Session) -> None:
+    # ConnectionEvents.commit fires right before DBAPI commit, Session.after_commit right after it
+    started = _commit_started.get()
+    if started is None:
+        return
+    _commit_started.set(None)
+    elapsed = time.perf_counter() - started
+    COMMIT_DURATION.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.commit_seconds += elapsed
+
+
+def _do_orm_execute(orm_execute_state: ORMExecuteState) -> None:
+    stats = current_request.get()
+    if stats is not None and orm_execute_state.is_relationship_load:
+        stats.lazy_loads += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record statement and commit durations of engine (pass AsyncEngine.sync_engine for async engines)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    event.listen(engine, "commit", _on_commit)
+    if not event.contains(Session, "after_commit", _after_commit):
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
+
+
+def route_label(scope: dict) -> str:
+    """Path template of matched route, so ids don't create new series. Unmatched paths share one label."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class CallTreeProfiler:
+    """Sampling profiler aggregating stacks of every thread into call tree, used as context manager.
+
+    Only stacks running code of given packages are kept, starting at their first frame from those packages,
+    so idle event loop and threadpool threads are ignored. Concurrent requests show up in the tree as well,
+    profile requests on otherwise idle instance.
+    """
+    def __init__(self, interval: float = 0.001, packages: tuple[str, ...] = ("tmt", "fastapi")):
+        self._interval = interval
+        self._packages = packages
+        self._tree: dict = {"count": 0, "children": {}}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "CallTreeProfiler":
+        # sampler needs the GIL, busy request threads would release it only every 5 ms by default
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self._interval))
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self._interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._add(frame)
+
+    def _add(self, frame) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(frame)
+            frame = frame.f_back
+        stack.reverse()
+        start = next((i for i, frame in enumerate(stack)
+                      if frame.f_globals.get("__name__", "").split(".")[0] in self._packages), None)
+        if start is None:
+            return
+
+        node = self._tree
+        node["count"] += 1
+        for frame in stack[start:]:
+            name = f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+            node = node["children"].setdefault(name, {"count": 0, "children": {}})
+            node["count"] += 1
+
+    def report(self, min_share: float = 0.01) -> str:
+        """Call tree with share of samples of every function, branches below min_share are left out."""
+        total = self._tree["count"]
+        lines = [f"{total} samples every {self._interval * 1000:g} ms"]
+
+        def walk(node: dict, depth: int) -> None:
+            for name, child in sorted(node["children"].items(), key=lambda item: -item[1]["count"]):
+                if child["count"] / total < min_share:
+                    continue
+                lines.append(f"{child['count'] / total:6.1%} {'  ' * depth}{name}")
+                walk(child, depth + 1)
+
+        if total:
+            walk(self._tree, 0)
+        return "\n".join(lines) + "\n"
+
+
+@dataclass
+class _ResponseCapture:
+    status: int = 500
+    messages: list[dict] = field(default_factory=list)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request histograms, slow request log and optional profiling.
+
+    Nested applications (sync application mounted in the async one) are measured only once, by outer middleware.
+    """
+    def __init__(self, app, config: MetricsConfig):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or current_request.get() is not None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.config.profiling_enabled and any(name == b"x-profile" for name, _ in scope["headers"]):
+            await self._profile(scope, receive, send)
+            return
+
+        stats = RequestStats(statement_log=[] if self.config.slow_request_ms else None)
+        token = current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request.reset(token)
+            self._record(scope, stats, status, time.perf_counter() - start)
+
+    def _record(self, scope: dict, stats: RequestStats, status: int, elapsed: float) -> None:
+        method, route = scope["method"], route_label(scope)
+        REQUEST_DURATION.observe(elapsed, method=method, route=route, status=str(status))
+        REQUEST_SQL_STATEMENTS.observe(stats.statements, method=method, route=route)
+        REQUEST_SQL_DURATION.observe(stats.sql_seconds, method=method, route=route)
+        REQUEST_LAZY_LOADS.observe(stats.lazy_loads, method=method, route=route)
+        REQUEST_COMMIT_DURATION.observe(stats.commit_seconds, method=method, route=route)
+
+        if self.config.slow_request_ms and elapsed * 1000 >= self.config.slow_request_ms:
+            statements = "\n".join(f"  {seconds * 1000:8.2f} ms  {' '.join(statement.split())}"
+                                   for statement, seconds in stats.statement_log)
+            log.warning(f"Slow request {method} {scope['path']} took {elapsed * 1000:.1f} ms "
+                        f"(SQL {stats.sql_seconds * 1000:.1f} ms in {stats.statements} statements, "
+                        f"commit {stats.commit_seconds * 1000:.1f} ms, {stats.lazy_loads} lazy loads):\n{statements}")
+
+    async def _profile(self, scope, receive, send) -> None:
+        """Handle request with profiler running and respond with call tree instead of application's response."""
+        capture = _ResponseCapture()
+
+        async def capture_send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                capture.status = message["status"]
+            capture.messages.append(message)
+
+        with CallTreeProfiler(interval=self.config.profile_interval) as profiler:
+            await self.app(scope, receive, capture_send)
+
+        body = profiler.report().encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-profiled-status", str(capture.status).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
@@ -1,5 +1,19 @@
+from dataclasses import dataclass
 from datetime import date
-from sqlmodel import Field, Session, SQLModel, select, Relationship
+from typing import Literal
+
+from sqlmodel import Field, Index, Session, SQLModel, select, Relationship
+
+
+TaskOrder = Literal["id", "deadline"]
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    """Sparse view of read model requested by fields= and expand=, names of its columns to return
+    and of its relationships to embed."""
+    columns: tuple[str, ...]
+    expand: tuple[str, ...] = ()
 
 
 class ProjectBase(SQLModel):
@@ -28,6 +42,12 @@ class ProjectUpdate(ProjectBase):
     tasks_ids: list[int] | None = None
 
 
+class ProjectBatchUpdate(ProjectBase):
+    id: int
+    title: str | None = None
+    deadline: date | None = None
+
+
 class Project(ProjectBase, table=True):
     id: int = Field(default=None, primary_key=True)
     tasks: list["Task"] = Relationship(back_populates="project")
@@ -61,7 +81,101 @@ class TaskUpdate(TaskBase):
     completed: bool | None = None
 
 
+class TaskBatchUpdate(TaskUpdate):
+    id: int
+
+
 class Task(TaskBase, table=True):
+    # deadline range scans filtered by completed or project_id, entries end with rowid so they are also ordered by id.
+    # AUTOINCREMENT, so ids of archived tasks are never given to new tasks
+    __table_args__ = (
+        Index("ix_task_completed_deadline", "completed", "deadline"),
+        Index("ix_task_project_id_deadline", "project_id", "deadline"),
+        {"sqlite_autoincrement": True},
+    )
+
     id: int = Field(default=None, primary_key=True)
 
     project: Project | None = Relationship(back_populates="tasks")
+
+
+class TaskArchive(TaskBase, table=True):
+    """Task moved out of task table, with the same id. Completed tasks are archived after a while by
+    archive_tasks job, deleted marks tasks removed by soft delete, which are kept but never read."""
+    __table_args__ = (
+        Index("ix_taskarchive_completed_deadline", "completed", "deadline"),
+        Index("ix_taskarchive_project_id_deadline", "project_id", "deadline"),
+    )
+
+    id: int = Field(primary_key=True)
+    archived_on: date
+    deleted: bool = False
+
+
+class TaskCompletion(SQLModel, table=True):
+    """Day task was completed, maintained by schema.TASK_COMPLETION_TRIGGERS, so tasks completed long ago are found
+    without scanning tasks."""
+    __table_args__ = (Index("ix_taskcompletion_completed_on", "completed_on", "task_id"),)
+
+    task_id: int = Field(primary_key=True)
+    completed_on: date
+
+
+class ProjectTaskStats(SQLModel, table=True):
+    """Task counts of project, maintained by schema.PROJECT_STATS_TRIGGERS in the transaction changing tasks."""
+    project_id: int = Field(primary_key=True)
+    total: int = 0
+    completed: int = 0
+
+
+class ProjectOpenDeadline(SQLModel, table=True):
+    """Number of not completed tasks of project due on deadline, maintained like ProjectTaskStats."""
+    project_id: int = Field(primary_key=True)
+    deadline: date = Field(primary_key=True)
+    open_tasks: int = 0
+
+
+class ProjectStats(SQLModel):
+    project_id: int
+    total: int = 0
+    completed: int = 0
+    open: int = 0
+    overdue: int = 0
+    earliest_open_deadline: date | None = None
+
+
+class ChangeLog(SQLModel, table=True):
+    """Change of task or project row appended by schema.CHANGE_LOG_TRIGGERS, deleted marks tombstone of removed row.
+    Seq is AUTOINCREMENT, so it is never reused after compaction removed the latest changes."""
+    __table_args__ = (
+        Index("ix_changelog_entity", "entity", "entity_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq: int = Field(default=None, primary_key=True)
+    entity: str
+    entity_id: int
+    deleted: bool = False
+
+
+class ChangeLogCompaction(SQLModel, table=True):
+    """Single row holding seq up to which changes were removed by compaction."""
+    id: int = Field(default=1, primary_key=True)
+    compacted_seq: int = 0
+
+
+class Change(SQLModel):
+    """Latest change of row, holding current task or project unless the row was deleted."""
+    seq: int
+    entity: str
+    entity_id: int
+    deleted: bool = False
+    task: Task | None = None
+    project: Project | None = None
+
+
+class BatchItemResult(SQLModel):
+    """Outcome of one item of batch request, items with error were not written."""
+    index: int
+    id: int | None = None
+    error: str | None = None
@@ -0,0 +1,19 @@
+"""Reindex titles and descriptions of all tasks in the full-text search index, for databases whose index
+drifted from task rows (e.g. tasks written with the search triggers dropped).
+
+    uv run python -m tmt.rebuild_search
+"""
+from sqlmodel import Session
+
+from .crud_sql import SQLTaskOperations
+from .database import create_db, engine
+
+
+def main() -> None:
+    create_db()
+    with Session(engine) as session:
+        SQLTaskOperations(session).rebuild_search_index()
+
+
+if __name__ == "__main__":
+    main()
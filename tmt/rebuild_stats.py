@@ -0,0 +1,20 @@
+"""Recount task statistics of all projects from their tasks, for recovery when the summary tables drifted
+(e.g. after the database was written by a tool with the stats triggers dropped).
+
+    uv run python -m tmt.rebuild_stats
+"""
+from sqlmodel import Session
+
+from .crud_sql import SQLProjectOperations, SQLTaskOperations
+from .database import create_db, engine
+from .services import ProjectService
+
+
+def main() -> None:
+    create_db()
+    with Session(engine) as session:
+        ProjectService(SQLProjectOperations(session), SQLTaskOperations(session)).rebuild_project_stats()
+
+
+if __name__ == "__main__":
+    main()
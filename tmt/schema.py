@@ -0,0 +1,193 @@
+"""Schema of tmt.models tables in SQLite: triggers maintaining derived tables, and migrations of existing databases.
+
+Listeners run after every SQLModel.metadata.create_all, in the order they are registered here: the migration
+first, so triggers dropped with rebuilt tables are created again.
+"""
+from sqlalchemy import Connection, event
+from sqlalchemy.schema import CreateTable
+from sqlmodel import SQLModel
+
+from .models import ChangeLog, ProjectTaskStats, Task, TaskCompletion
+
+
+def create_schema(connection: Connection) -> None:
+    """Create missing tables, and indexes added to models after their tables were created."""
+    SQLModel.metadata.create_all(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# task table created before archive had no AUTOINCREMENT, so SQLite gave the id of the latest task to a new task
+# once the former was archived, and archiving the new one then collided with it. Table is rebuilt with AUTOINCREMENT,
+# ids continue after the highest id of both tables. Dropped indexes and triggers of task are created again
+# by the listeners that follow.
+_TASK_REBUILT = "task_autoincrement"
+TASK_AUTOINCREMENT_SEED = [
+    "DELETE FROM sqlite_sequence WHERE name = 'task'",
+    """INSERT INTO sqlite_sequence (name, seq)
+    SELECT 'task', COALESCE(MAX(id), 0) FROM (SELECT id FROM task UNION ALL SELECT id FROM taskarchive)""",
+]
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _migrate_task_autoincrement(metadata, connection, **kwargs) -> None:
+    sql = connection.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'task'").scalar()
+    if "AUTOINCREMENT" in sql.upper():
+        return
+    columns = ", ".join(f'"{column.name}"' for column in Task.__table__.columns)
+    ddl = str(CreateTable(Task.__table__).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(ddl.replace("CREATE TABLE task ", f"CREATE TABLE {_TASK_REBUILT} ", 1))
+    connection.exec_driver_sql(f"INSERT INTO {_TASK_REBUILT} ({columns}) SELECT {columns} FROM task")
+    connection.exec_driver_sql("DROP TABLE task")
+    # triggers of other tables still name task, legacy rename doesn't check them while it is missing
+    connection.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+    connection.exec_driver_sql(f"ALTER TABLE {_TASK_REBUILT} RENAME TO task")
+    connection.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+    for index in Task.__table__.indexes:
+        index.create(connection)
+    for statement in TASK_AUTOINCREMENT_SEED:
+        connection.exec_driver_sql(statement)
+
+
+# task counted in stats of its project, NEW / OLD row of task
+_ADD_TASK_STATS = """
+    INSERT INTO projecttaskstats (project_id, total, completed)
+    SELECT NEW.project_id, 1, NEW.completed WHERE NEW.project_id IS NOT NULL
+    ON CONFLICT (project_id) DO UPDATE SET total = total + 1, completed = completed + excluded.completed;
+    INSERT INTO projectopendeadline (project_id, deadline, open_tasks)
+    SELECT NEW.project_id, NEW.deadline, 1
+    WHERE NEW.project_id IS NOT NULL AND NEW.deadline IS NOT NULL AND NOT NEW.completed
+    ON CONFLICT (project_id, deadline) DO UPDATE SET open_tasks = open_tasks + 1;"""
+_REMOVE_TASK_STATS = """
+    UPDATE projecttaskstats SET total = total - 1, completed = completed - OLD.completed
+    WHERE project_id = OLD.project_id;
+    UPDATE projectopendeadline SET open_tasks = open_tasks - 1
+    WHERE project_id = OLD.project_id AND deadline = OLD.deadline AND NOT OLD.completed;
+    DELETE FROM projectopendeadline WHERE project_id = OLD.project_id AND deadline = OLD.deadline AND open_tasks = 0;"""
+
+# every write of tasks (ORM or bulk, sync or async) updates project stats in its own transaction
+PROJECT_STATS_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS task_stats_insert AFTER INSERT ON task BEGIN {_ADD_TASK_STATS} END",
+    f"""CREATE TRIGGER IF NOT EXISTS task_stats_update AFTER UPDATE OF project_id, completed, deadline ON task
+    BEGIN {_REMOVE_TASK_STATS} {_ADD_TASK_STATS} END""",
+    f"CREATE TRIGGER IF NOT EXISTS task_stats_delete AFTER DELETE ON task BEGIN {_REMOVE_TASK_STATS} END",
+    # archived tasks still count in stats of their project, soft deleted ones don't
+    f"""CREATE TRIGGER IF NOT EXISTS taskarchive_stats_insert AFTER INSERT ON taskarchive WHEN NOT NEW.deleted
+    BEGIN {_ADD_TASK_STATS} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS taskarchive_stats_soft_delete AFTER UPDATE OF deleted ON taskarchive
+    WHEN NEW.deleted AND NOT OLD.deleted BEGIN {_REMOVE_TASK_STATS} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS taskarchive_stats_delete AFTER DELETE ON taskarchive WHEN NOT OLD.deleted
+    BEGIN {_REMOVE_TASK_STATS} END""",
+    """CREATE TRIGGER IF NOT EXISTS project_stats_delete AFTER DELETE ON project BEGIN
+    DELETE FROM projecttaskstats WHERE project_id = OLD.id;
+    DELETE FROM projectopendeadline WHERE project_id = OLD.id; END""",
+    # like tasks, archived tasks of deleted project lose their project_id
+    """CREATE TRIGGER IF NOT EXISTS project_archive_delete AFTER DELETE ON project BEGIN
+    UPDATE taskarchive SET project_id = NULL WHERE project_id = OLD.id; END""",
+]
+
+# recount stats of all projects from tasks
+PROJECT_STATS_REBUILD = [
+    "DELETE FROM projecttaskstats",
+    "DELETE FROM projectopendeadline",
+    """INSERT INTO projecttaskstats (project_id, total, completed)
+    SELECT project_id, COUNT(*), SUM(completed) FROM (
+        SELECT project_id, completed FROM task
+        UNION ALL SELECT project_id, completed FROM taskarchive WHERE NOT deleted
+    ) WHERE project_id IS NOT NULL GROUP BY project_id""",
+    """INSERT INTO projectopendeadline (project_id, deadline, open_tasks)
+    SELECT project_id, deadline, COUNT(*) FROM (
+        SELECT project_id, deadline, completed FROM task
+        UNION ALL SELECT project_id, deadline, completed FROM taskarchive WHERE NOT deleted
+    ) WHERE project_id IS NOT NULL AND deadline IS NOT NULL AND NOT completed GROUP BY project_id, deadline""",
+]
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _create_project_stats_triggers(metadata, connection, tables=(), **kwargs) -> None:
+    for statement in PROJECT_STATS_TRIGGERS:
+        connection.exec_driver_sql(statement)
+    # stats table added to existing database starts with counts of existing tasks
+    if ProjectTaskStats.__table__ in tables:
+        for statement in PROJECT_STATS_REBUILD:
+            connection.exec_driver_sql(statement)
+
+
+# day of completion of every completed task, a task completed again gets a new day. Days are local like date.today()
+_TASK_COMPLETED = "INSERT OR REPLACE INTO taskcompletion (task_id, completed_on) VALUES (NEW.id, date('now', 'localtime'));"
+TASK_COMPLETION_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS task_completion_insert AFTER INSERT ON task WHEN NEW.completed
+    BEGIN {_TASK_COMPLETED} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS task_completion_complete AFTER UPDATE OF completed ON task
+    WHEN NEW.completed AND NOT OLD.completed BEGIN {_TASK_COMPLETED} END""",
+    """CREATE TRIGGER IF NOT EXISTS task_completion_reopen AFTER UPDATE OF completed ON task
+    WHEN OLD.completed AND NOT NEW.completed BEGIN DELETE FROM taskcompletion WHERE task_id = OLD.id; END""",
+    """CREATE TRIGGER IF NOT EXISTS task_completion_delete AFTER DELETE ON task BEGIN
+    DELETE FROM taskcompletion WHERE task_id = OLD.id; END""",
+]
+# completion table added to existing database counts age of completed tasks from today
+TASK_COMPLETION_SEED = """INSERT INTO taskcompletion (task_id, completed_on)
+    SELECT id, date('now', 'localtime') FROM task WHERE completed"""
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _create_task_completion_triggers(metadata, connection, tables=(), **kwargs) -> None:
+    for statement in TASK_COMPLETION_TRIGGERS:
+        connection.exec_driver_sql(statement)
+    if TaskCompletion.__table__ in tables:
+        connection.exec_driver_sql(TASK_COMPLETION_SEED)
+
+
+# full-text index of task titles and descriptions, external content table reading text from task rows,
+# prefix indexes serve short prefix queries
+TASK_SEARCH_TABLE = "task_fts"
+TASK_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS task_fts
+    USING fts5(title, "desc", content='task', content_rowid='id', prefix='2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task BEGIN
+    INSERT INTO task_fts (rowid, title, "desc") VALUES (NEW.id, NEW.title, NEW."desc"); END""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_delete AFTER DELETE ON task BEGIN
+    INSERT INTO task_fts (task_fts, rowid, title, "desc") VALUES ('delete', OLD.id, OLD.title, OLD."desc"); END""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_update AFTER UPDATE OF title, "desc" ON task BEGIN
+    INSERT INTO task_fts (task_fts, rowid, title, "desc") VALUES ('delete', OLD.id, OLD.title, OLD."desc");
+    INSERT INTO task_fts (rowid, title, "desc") VALUES (NEW.id, NEW.title, NEW."desc"); END""",
+]
+# reindex all tasks
+TASK_SEARCH_REBUILD = "INSERT INTO task_fts (task_fts) VALUES ('rebuild')"
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _create_task_search_index(metadata, connection, **kwargs) -> None:
+    exists = connection.exec_driver_sql(
+        f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{TASK_SEARCH_TABLE}'"
+    ).first()
+    for statement in TASK_SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    # index added to existing database starts with existing tasks
+    if exists is None:
+        connection.exec_driver_sql(TASK_SEARCH_REBUILD)
+
+
+# every write of tasks and projects (ORM or bulk, sync or async) appends to change log in its own transaction
+CHANGE_LOG_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {entity}_changelog_{operation} AFTER {operation.upper()} ON {entity} BEGIN
+    INSERT INTO changelog (entity, entity_id, deleted) VALUES ('{entity}', {row}.id, {int(operation == "delete")}); END"""
+    for entity in ("project", "task")
+    for operation, row in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD"))
+]
+
+# change log added to existing database starts with a change of every existing row
+CHANGE_LOG_SEED = [
+    "INSERT INTO changelog (entity, entity_id, deleted) SELECT 'project', id, 0 FROM project ORDER BY id",
+    "INSERT INTO changelog (entity, entity_id, deleted) SELECT 'task', id, 0 FROM task ORDER BY id",
+]
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _create_change_log_triggers(metadata, connection, tables=(), **kwargs) -> None:
+    for statement in CHANGE_LOG_TRIGGERS:
+        connection.exec_driver_sql(statement)
+    if ChangeLog.__table__ in tables:
+        for statement in CHANGE_LOG_SEED:
+            connection.exec_driver_sql(statement)
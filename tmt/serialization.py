@@ -0,0 +1,60 @@
+"""Fast serialization path of list routes, enabled by TMT_FAST_SERIALIZATION.
+
+Listed rows are dicts built from column tuples by SQL operations (see crud_sql.RowDict), so they are written
+straight to JSON: by orjson when it is installed (optional extra fast), otherwise by serializers of TypeAdapters
+compiled once here.
+Either way response_model validation and the conversion to jsonable values are skipped.
+Views limited by fields= / expand= are always written this way, they don't match response_model.
+"""
+from collections.abc import Mapping
+from datetime import date
+from typing import Any, TypedDict
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # optional, TypeAdapter serializers are used without it
+    orjson = None
+
+
+class ProjectColumns(TypedDict):
+    title: str
+    deadline: date
+    id: int
+
+
+class TaskColumns(TypedDict):
+    title: str
+    desc: str
+    deadline: date | None
+    completed: bool
+    project_id: int | None
+    id: int
+
+
+class TaskRow(TaskColumns):
+    project: ProjectColumns | None
+
+
+class ProjectRow(ProjectColumns):
+    tasks: list[TaskColumns]
+
+
+TASK_ROWS = TypeAdapter(list[TaskRow])
+PROJECT_ROWS = TypeAdapter(list[ProjectRow])
+# rows of fields= / expand= views, any subset of the above, serialized by types of their values
+SPARSE_ROWS = TypeAdapter(Any)
+
+
+class RowsResponse(JSONResponse):
+    """JSON response of row dicts matching adapter's type, which is not validated."""
+    def __init__(self, rows: list[dict], adapter: TypeAdapter, headers: Mapping[str, str] | None = None):
+        self._adapter = adapter
+        super().__init__(rows, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return self._adapter.dump_json(content)
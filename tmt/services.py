@@ -1,20 +1,303 @@
-from .crud_sql import SQLProjectOperations, SQLTaskOperations
-from .models import Project, ProjectBase, ProjectUpdate, Task, TaskBase, TaskUpdate
+import base64
+import binascii
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+
+from .crud_sql import SQLChangeOperations, SQLProjectOperations, SQLTaskOperations
+from .models import (BatchItemResult, Change, FieldSet, Project, ProjectBase, ProjectBatchUpdate, ProjectStats,
+                     ProjectUpdate, Task, TaskBase, TaskBatchUpdate, TaskOrder, TaskUpdate)
 
 import logging
 
 log = logging.getLogger(__name__)
 
+EXPORT_BATCH_SIZE = 1000
+# upper bound of items in one batch request, keeps IN (...) lists below SQLite's bound parameter limit
+MAX_BATCH_SIZE = 10000
+# titles of tasks listed in error of project deadline that is shorter than deadlines of its tasks
+MAX_REPORTED_TASKS = 10
+# tasks moved to archive by one transaction of archive_completed_tasks, so writers are never blocked for long
+ARCHIVE_BATCH_SIZE = 1000
+# search ranks only this many matching tasks with the highest ids, so query words held by most tasks
+# don't make every request rank the whole table, pages of such search are marked truncated
+MAX_RANKED_MATCHES = 10000
+
+
+class ChangesUnavailableError(ValueError):
+    """Changes following requested seq are no longer (or not yet) in change log, all rows must be read again."""
+
+
+@dataclass
+class Page[T]:
+    """Single page of listed objects. Total is known only in offset mode, next_cursor only when more objects may
+    follow, truncated is set when some matching objects are left out of listing altogether."""
+    items: list[T]
+    total: int | None = None
+    next_cursor: str | None = None
+    truncated: bool = False
+
+
+def dump_cursor(payload: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def load_cursor(cursor: str) -> dict:
+    return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+
+def encode_cursor(order_by: str, last_id: int, last_deadline: date | None = None) -> str:
+    """Encode position of the last listed object into opaque cursor."""
+    payload = {"o": order_by, "id": last_id}
+    if order_by == "deadline":
+        payload["d"] = last_deadline.isoformat() if last_deadline else None
+    return dump_cursor(payload)
+
+
+def decode_cursor(cursor: str, order_by: str) -> tuple[int, date | None]:
+    """Decode cursor created by encode_cursor into (last_id, last_deadline)."""
+    try:
+        payload = load_cursor(cursor)
+        last_id = int(payload["id"])
+        last_deadline = date.fromisoformat(payload["d"]) if payload.get("d") else None
+        cursor_order = payload["o"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        raise ValueError(f"Provided cursor {cursor} is invalid.")
+
+    if cursor_order != order_by:
+        raise ValueError(f"Provided cursor was created for ordering by {cursor_order}, not {order_by}.")
+    return last_id, last_deadline
+
+
+def cursor_position(cursor: str, offset: int, order_by: str) -> tuple[int, date | None]:
+    """Position of the last object of previous page decoded from cursor, which can't be combined with offset."""
+    if offset:
+        raise ValueError("Offset can't be combined with cursor.")
+    return decode_cursor(cursor, order_by)
+
+
+def verify_offset(offset: int, total: int, name: str) -> None:
+    if offset > total:
+        raise ValueError(f"Offset {offset} exceeds total number of {name} {total}.")
+
+
+def set_next_cursor[T](page: Page[T], limit: int, order_by: str = "id") -> Page[T]:
+    """Point next_cursor of full page after its last object, whose deadline is read for deadline ordering only
+    (sparse rows hold it just then)."""
+    if page.items and len(page.items) == limit:
+        last = page.items[-1]
+        page.next_cursor = encode_cursor(order_by, last.id, last.deadline if order_by == "deadline" else None)
+    return page
+
+
+def existing[T: SQLModel](instance: T | None, model: type[T], _id: int) -> T:
+    """Object read by id, which must exist."""
+    if instance is None:
+        raise ValueError(f"{model.__name__} with id {_id} does not exist.")
+    return instance
+
+
+def warn_missing_tasks(task_ids: list[int]) -> None:
+    for task_id in task_ids:
+        log.warning(f"Provided task_id {task_id} points to non-existent task.")
+
+
+def split_names(value: str, allowed: list[str], parameter: str) -> list[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    for name in names:
+        if name not in allowed:
+            raise ValueError(f"Provided {parameter} {name} is not one of {', '.join(allowed)}.")
+    return names
+
+
+def parse_field_set(model: type[SQLModel], fields: str | None, expand: str | None,
+                    required: tuple[str, ...] = ("id",)) -> FieldSet | None:
+    """FieldSet of comma separated columns (fields) and relationships (expand) of model, None when both are omitted.
+    Required columns are always returned, relationships are embedded without expand only when fields are omitted."""
+    if fields is None and expand is None:
+        return None
+    mapper = inspect(model)
+    columns = [attribute.key for attribute in mapper.column_attrs]
+    relationships = [relationship.key for relationship in mapper.relationships]
+    requested = split_names(fields, columns, "field") if fields is not None else columns
+    if expand is not None:
+        expanded = split_names(expand, relationships, "expand")
+    else:
+        expanded = relationships if fields is None else []
+    return FieldSet(columns=tuple(column for column in columns if column in requested or column in required),
+                    expand=tuple(expanded))
+
+
+def search_terms(q: str) -> list[str]:
+    """Lowercase words of search query, word ending with * matches words starting with it."""
+    return [term.lower() for term in re.findall(r"\w+\*?", q)]
+
+
+def encode_search_cursor(terms: list[str], last_rank: float, last_id: int, min_id: int, max_id: int) -> str:
+    """Encode position of the last found task, together with terms and lowest and highest id of tasks ranked
+    by the first page, so following pages rank the same tasks."""
+    return dump_cursor({"o": "rank", "q": terms, "r": last_rank, "id": last_id, "m": min_id, "x": max_id})
+
+
+def decode_search_cursor(cursor: str, terms: list[str]) -> tuple[float, int, int, int]:
+    """Decode cursor created by encode_search_cursor into (last_rank, last_id, min_id, max_id)."""
+    try:
+        payload = load_cursor(cursor)
+        position = float(payload["r"]), int(payload["id"]), int(payload["m"]), int(payload["x"])
+        cursor_terms = payload["q"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        raise ValueError(f"Provided cursor {cursor} is invalid.")
+
+    if cursor_terms != terms:
+        raise ValueError("Provided cursor was created for another search query.")
+    return position
+
+
+def deadline_range(before: date | None, after: date | None,
+                   within_days: int | None) -> tuple[date | None, date | None] | None:
+    """Return inclusive (before, after) bounds narrowed to next within_days days, None when the range is empty."""
+    if before is not None and after is not None and after > before:
+        raise ValueError(f"Provided after {after} is later than before {before}.")
+    if within_days is not None:
+        if within_days < 0:
+            raise ValueError(f"Provided within_days {within_days} is negative.")
+        today = date.today()
+        horizon = today + timedelta(days=within_days)
+        before = min(before, horizon) if before is not None else horizon
+        after = max(after, today) if after is not None else today
+        if after > before:
+            return None
+    return before, after
+
+
+def start_batch(items: list) -> list[BatchItemResult]:
+    """Check batch size and return empty result for every item."""
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch contains {len(items)} items, at most {MAX_BATCH_SIZE} are allowed.")
+    return [BatchItemResult(index=index) for index in range(len(items))]
+
+
+def merge_batch_updates(model: type[SQLModel], updates: list, existing: dict[int, SQLModel],
+                        results: list[BatchItemResult]) -> list[dict | None]:
+    """Return column values of existing object with changes applied for every update, objects stay untouched.
+
+    Updates of missing or repeated ids get None and error in their result.
+    """
+    changed = []
+    seen_ids = set()
+    for update, result in zip(updates, results):
+        result.id = update.id
+        if update.id in seen_ids:
+            result.error = f"{model.__name__} with id {update.id} is repeated in batch."
+        elif update.id not in existing:
+            result.error = f"{model.__name__} with id {update.id} does not exist."
+        seen_ids.add(update.id)
+
+        if result.error is not None:
+            changed.append(None)
+            continue
+        changed.append(existing[update.id].model_dump() | update.model_dump(exclude_unset=True))
+    return changed
+
+
+def verify_batch[T](items: list[T], results: list[BatchItemResult], verify: Callable[[T], None]) -> list[T]:
+    """Verify items without error, store ValueError raised by verify in item's result. Return items that passed."""
+    valid = []
+    for item, result in zip(items, results):
+        if result.error is not None:
+            continue
+        try:
+            verify(item)
+        except ValueError as e:
+            result.error = str(e)
+            continue
+        valid.append(item)
+    return valid
+
+
+def set_created_ids(results: list[BatchItemResult], ids: list[int]) -> None:
+    """Assign ids returned by insert to results of items that were written, in order."""
+    for result, _id in zip((result for result in results if result.error is None), ids):
+        result.id = _id
+
+
+def set_deleted_ids(results: list[BatchItemResult], model: type[SQLModel], ids: list[int],
+                    deleted_ids: Iterable[int]) -> None:
+    deleted_ids = set(deleted_ids)
+    for result, _id in zip(results, ids):
+        result.id = _id
+        if _id not in deleted_ids:
+            result.error = f"{model.__name__} with id {_id} does not exist."
+
+
+def referenced_project_ids(rows: Iterable[dict | None]) -> list[int]:
+    return list({row["project_id"] for row in rows if row is not None and row["project_id"] is not None})
+
+
+def project_deadlines(rows: Iterable[dict | None]) -> dict[int, date]:
+    """New deadlines of project rows that can be compared with deadlines of their tasks."""
+    return {row["id"]: row["deadline"] for row in rows if row is not None and row["deadline"] is not None}
+
+
+def deadline_conflicts(deadlines: dict[int, date], max_deadlines: dict[int, date]) -> dict[int, date]:
+    """New project deadlines that are earlier than the latest deadline of tasks of the project."""
+    return {project_id: deadline for project_id, deadline in deadlines.items()
+            if project_id in max_deadlines and deadline < max_deadlines[project_id]}
+
+
+def deadline_conflict_errors(conflicts: dict[int, date], titles: dict[int, list[str]]) -> dict[int, str]:
+    """Error for every conflicting project, titles hold up to MAX_REPORTED_TASKS + 1 titles of offending tasks."""
+    errors = {}
+    for project_id, deadline in conflicts.items():
+        offending = titles.get(project_id, [])
+        more = " and more" if len(offending) > MAX_REPORTED_TASKS else ""
+        errors[project_id] = (f"Provided deadline {deadline} is shorter than deadline for tasks "
+                              f"{offending[:MAX_REPORTED_TASKS]}{more}.")
+    return errors
+
+
 class ProjectService:
     def __init__(self, project_ops: SQLProjectOperations, task_ops: SQLTaskOperations):
         self._task_ops = task_ops
         self._project_ops = project_ops
 
-    def get_paginated_projects(self, limit: int, offset: int) -> list[Project]:
-        total_projects = self._project_ops.get_projects_count()
-        if offset > total_projects:
-            raise ValueError(f"Offset {offset} exceeds total number of projects {total_projects}.")
-        return self._project_ops.get_projects(limit=limit, offset=offset)
+    def get_paginated_projects(self, limit: int, offset: int, cursor: str | None = None) -> Page[Project]:
+        if cursor is not None:
+            last_id, _ = cursor_position(cursor, offset, "id")
+            page = Page(items=self._project_ops.get_projects_after(limit=limit, after_id=last_id))
+        else:
+            total_projects = self._project_ops.get_projects_count()
+            verify_offset(offset, total_projects, "projects")
+            page = Page(items=self._project_ops.get_projects(limit=limit, offset=offset), total=total_projects)
+        return set_next_cursor(page, limit)
+
+    def export_projects(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+        return self._project_ops.iter_projects(batch_size=batch_size)
+
+    def get_project(self, project_id: int) -> Project:
+        return existing(self._project_ops.get_project_by_id(project_id), Project, project_id)
+
+    def get_project_stats(self, project_id: int) -> ProjectStats:
+        stats = self._project_ops.get_project_stats(project_id, today=date.today())
+        if stats is None:
+            raise ValueError(f"Project with id {project_id} does not exist.")
+        return stats
+
+    def get_paginated_project_stats(self, limit: int, cursor: str | None = None) -> Page[ProjectStats]:
+        """Stats of projects ordered by project id, paginated by cursor only."""
+        last_id = decode_cursor(cursor, "id")[0] if cursor is not None else 0
+        page = Page(items=self._project_ops.get_projects_stats_after(limit=limit, after_id=last_id, today=date.today()))
+        if page.items and len(page.items) == limit:
+            page.next_cursor = encode_cursor("id", page.items[-1].project_id)
+        return page
+
+    def rebuild_project_stats(self) -> None:
+        self._project_ops.rebuild_project_stats()
 
     def create_project(self, project: ProjectBase) -> Project:
         db_project = self._project_ops.get_db_project_object(project)
@@ -22,7 +305,7 @@ class ProjectService:
         return self._project_ops.create_project(db_project)
 
     def delete_project(self, project_id: int) -> None:
-        project = self._project_ops.get_project_by_id(project_id)
+        project = existing(self._project_ops.get_project_by_id(project_id), Project, project_id)
 
         if project.tasks:
             # TODO: prevent this or stay with log?
@@ -30,49 +313,73 @@ class ProjectService:
         return self._project_ops.delete_project(project)
 
     def update_project(self, project_id: int, project_update: ProjectUpdate) -> Project:
-        project = self._project_ops.get_project_by_id(project_id)
-        if not project:
-            raise ValueError(f"Project with id {project_id} does not exist.")
+        project = existing(self._project_ops.get_project_by_id(project_id), Project, project_id)
 
         project = self._project_ops.apply_update(project=project, project_update=project_update)
 
         self.verify_project_before_posting(project)
 
         if project_update.tasks_ids is not None:
-            tasks = self._task_ops.get_tasks_by_project_id_except_ids(project_id, project_update.tasks_ids)
-
-            # remove connection from previously assigned tasks
-            for task in tasks:
-                task.project_id = None
-                self._task_ops.update_task(task)
-
-            for task_id in project_update.tasks_ids:
-                task = self._task_ops.get_task_by_id(task_id)
-
-                if not task:
-                    # can't stop here as it can lead to updating data only partially
-                    log.warning(f"Provided task_id {task_id} points to non-existent task.")
-                    continue
-                task.project_id = project_id
-                self._task_ops.update_task(task)
-
+            # tasks are reassigned without commit, so they are saved in one transaction together with project
+            warn_missing_tasks(self._task_ops.assign_tasks_to_project(project_id, project_update.tasks_ids))
 
         return self._project_ops.update_project(project=project)
 
+    def create_projects(self, projects: list[ProjectBase]) -> list[BatchItemResult]:
+        """Create valid projects in one transaction, invalid ones are reported in their results."""
+        results = start_batch(projects)
+        valid = verify_batch(projects, results, self.verify_project)
+        set_created_ids(results, self._project_ops.create_projects([project.model_dump() for project in valid]))
+        return results
+
+    def update_projects(self, project_updates: list[ProjectBatchUpdate]) -> list[BatchItemResult]:
+        """Update valid projects in one transaction, invalid ones are reported in their results."""
+        results = start_batch(project_updates)
+        projects = self._project_ops.get_projects_by_ids([update.id for update in project_updates])
+        existing = {project.id: project for project in projects}
+        rows = merge_batch_updates(Project, project_updates, existing, results)
+        deadline_errors = self.get_deadline_errors(project_deadlines(rows))
+        # rows hold already validated values, building table models for checks only would dominate the request
+        valid = verify_batch(rows, results, lambda row: self.verify_project(ProjectBase.model_construct(**row),
+                                                                            deadline_errors.get(row["id"])))
+        self._project_ops.update_projects(valid)
+        return results
+
+    def delete_projects(self, project_ids: list[int]) -> list[BatchItemResult]:
+        """Delete existing projects in one transaction, their tasks stay without project."""
+        results = start_batch(project_ids)
+        set_deleted_ids(results, Project, project_ids, self._project_ops.delete_projects(project_ids))
+        return results
+
+    def get_deadline_errors(self, deadlines: dict[int, date]) -> dict[int, str]:
+        """Error for every project whose new deadline is shorter than deadline of some of its tasks.
+
+        Checked with aggregate queries, tasks of the projects are not loaded.
+        """
+        conflicts = deadline_conflicts(deadlines, self._task_ops.get_max_deadlines(list(deadlines)))
+        if not conflicts:
+            return {}
+        titles = self._task_ops.get_titles_after_deadline(conflicts, limit=MAX_REPORTED_TASKS + 1)
+        return deadline_conflict_errors(conflicts, titles)
+
+    def verify_project_before_posting(self, project: Project) -> None:
+        """Ensure project's deadline is valid, required fields are filled and its tasks don't end after it."""
+        deadline_errors = {}
+        if project.id is not None and project.deadline is not None:
+            deadline_errors = self.get_deadline_errors({project.id: project.deadline})
+        self.verify_project(project, deadline_errors.get(project.id))
+
     @staticmethod
-    def verify_project_before_posting(project: Project) -> None:
-        """Ensure project's deadline is valid and required fields are filled."""
+    def verify_project(project: ProjectBase, deadline_error: str | None = None) -> None:
+        """Checks of verify_project_before_posting, deadline_error is the error found for tasks of the project."""
         if not project.is_deadline_valid():
             raise ValueError(f"New deadline {project.deadline} is in the past.")
 
         if not project.are_required_filled():
             raise ValueError(f"Make sure title and deadline are not null / empty.")
 
-        if project.tasks is not None:
-            tasks_with_longer_deadline = [_task.title for _task in project.tasks if project.deadline < _task.deadline]
-            if any(tasks_with_longer_deadline):
-                raise ValueError(f"Provided deadline {project.deadline} is shorter than deadline for tasks "
-                                 f"{tasks_with_longer_deadline}.")
+        if deadline_error is not None:
+            raise ValueError(deadline_error)
 
 
 class TaskService:
@@ -80,14 +387,74 @@ class TaskService:
         self._task_ops = task_ops
         self._project_ops = project_ops
 
-    def get_paginated_tasks(self, limit: int, offset: int) -> list[Task]:
-        total_tasks = self._task_ops.get_tasks_count()
-        if offset > total_tasks:
-            raise ValueError(f"Offset {offset} exceeds total number of tasks {total_tasks}.")
-        return self._task_ops.get_tasks(limit=limit, offset=offset)
-
-    def get_tasks_with_deadline(self) -> list[Task]:
-        return self._task_ops.get_tasks_with_deadlines()
+    def get_paginated_tasks(self, limit: int, offset: int, cursor: str | None = None,
+                            order_by: TaskOrder = "id", include_archived: bool = False) -> Page[Task]:
+        if cursor is not None:
+            last_id, last_deadline = cursor_position(cursor, offset, order_by)
+            page = Page(items=self._task_ops.get_tasks_after(limit=limit, after_id=last_id,
+                                                             after_deadline=last_deadline, order_by=order_by,
+                                                             include_archived=include_archived))
+        else:
+            total_tasks = self._task_ops.get_tasks_count(include_archived=include_archived)
+            verify_offset(offset, total_tasks, "tasks")
+            page = Page(items=self._task_ops.get_tasks(limit=limit, offset=offset, order_by=order_by,
+                                                       include_archived=include_archived), total=total_tasks)
+        return set_next_cursor(page, limit, order_by)
+
+    def get_tasks_with_deadline(self, before: date | None = None, after: date | None = None,
+                                within_days: int | None = None, completed: bool | None = None,
+                                project_id: int | None = None, limit: int | None = None,
+                                include_archived: bool = False) -> list[Task]:
+        bounds = deadline_range(before, after, within_days)
+        if bounds is None:
+            return []
+        before, after = bounds
+        return self._task_ops.get_tasks_with_deadlines(before=before, after=after, completed=completed,
+                                                       project_id=project_id, limit=limit,
+                                                       include_archived=include_archived)
+
+    def get_overdue_tasks(self, limit: int, project_id: int | None = None) -> list[Task]:
+        """Not completed tasks with deadline in the past, the most overdue first."""
+        return self._task_ops.get_tasks_with_deadlines(before=date.today() - timedelta(days=1), completed=False,
+                                                       project_id=project_id, limit=limit)
+
+    def get_upcoming_tasks(self, n: int, project_id: int | None = None) -> list[Task]:
+        """Next n not completed tasks due today or later."""
+        return self._task_ops.get_tasks_with_deadlines(after=date.today(), completed=False,
+                                                       project_id=project_id, limit=n)
+
+    def search_tasks(self, q: str, limit: int, project_id: int | None = None,
+                     cursor: str | None = None) -> Page[Task]:
+        """Tasks holding every word of q in title or description, the most relevant first.
+
+        First page fixes the id range of ranked tasks: when more than MAX_RANKED_MATCHES tasks match, only that many
+        with the highest ids are ranked and the page is truncated, tasks created later are left to the next search.
+        Ranks still follow index statistics, so tasks updated or deleted between pages may shift others by a few
+        places.
+        """
+        terms = search_terms(q)
+        if not terms:
+            raise ValueError(f"Provided query {q!r} has no words to search for.")
+        if cursor is not None:
+            last_rank, last_id, min_id, max_id = decode_search_cursor(cursor, terms)
+            after = last_rank, last_id
+        else:
+            after = None
+            min_id, max_id = self._task_ops.get_search_window(terms, MAX_RANKED_MATCHES, project_id=project_id)
+        found = self._task_ops.search_tasks(terms, limit=limit, project_id=project_id, after=after, min_id=min_id,
+                                            max_id=max_id)
+
+        page = Page(items=[task for task, _ in found], truncated=min_id > 0)
+        if found and len(found) == limit:
+            last_task, last_rank = found[-1]
+            page.next_cursor = encode_search_cursor(terms, last_rank, last_task.id, min_id, max_id)
+        return page
+
+    def export_tasks(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+        return self._task_ops.iter_tasks(batch_size=batch_size)
+
+    def get_task(self, task_id: int, include_archived: bool = False) -> Task:
+        return existing(self._task_ops.get_task_by_id(task_id, include_archived=include_archived), Task, task_id)
 
     def create_task(self, task: TaskBase) -> Task:
         db_task = self._task_ops.create_db_task_object(task)
@@ -95,10 +462,7 @@ class TaskService:
         return self._task_ops.create_task(db_task)
 
     def update_task(self, task_id: int, task_update: TaskUpdate) -> Task:
-        task = self._task_ops.get_task_by_id(task_id)
-
-        if not task:
-            raise ValueError(f"Task with id {task_id} does not exist.")
+        task = existing(self._task_ops.get_task_by_id(task_id), Task, task_id)
 
         task = self._task_ops.apply_update(task=task, task_update=task_update)
 
@@ -106,27 +470,118 @@ class TaskService:
 
         return self._task_ops.update_task(task=task)
 
-    def delete_task(self, task_id: int) -> None:
+    def delete_task(self, task_id: int, archive: bool = False) -> None:
+        """Delete task, or with archive soft delete it: task is moved to archive marked as deleted.
+        Archived task is deleted from archive, or marked as deleted there."""
         task = self._task_ops.get_task_by_id(task_id)
-        if not task:
-            raise ValueError(f"Task with id {task_id} does not exist.")
-
+        if task is None:
+            if not self._task_ops.delete_archived_tasks([task_id], soft=archive):
+                raise ValueError(f"Task with id {task_id} does not exist.")
+            return
+
+        if archive:
+            self._task_ops.archive_tasks([task_id], deleted=True)
+            return
         if task.project:
-            # TODO: prevent this, add 'deleted' field in Task for 'safe delete' or stay with log?
             log.warning(f"Deleting task {task_id} that is connected to project {task.project_id}")
         return self._task_ops.delete_task(task)
 
+    def archive_completed_tasks(self, completed_days: int, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        """Move tasks completed more than completed_days ago to archive, batch_size tasks per transaction.
+        Return number of archived tasks."""
+        if completed_days < 0:
+            raise ValueError(f"Provided completed_days {completed_days} is negative.")
+        completed_before = date.today() - timedelta(days=completed_days)
+        archived = 0
+        while ids := self._task_ops.get_completed_task_ids(completed_before, limit=batch_size):
+            archived_ids = self._task_ops.archive_tasks(ids)
+            if not archived_ids:
+                break
+            archived += len(archived_ids)
+        log.info(f"Archived {archived} tasks completed before {completed_before}")
+        return archived
+
+    def create_tasks(self, tasks: list[TaskBase]) -> list[BatchItemResult]:
+        """Create valid tasks in one transaction, invalid ones are reported in their results.
+
+        Deadlines of every project referenced by the batch are loaded once.
+        """
+        results = start_batch(tasks)
+        deadlines = self._project_ops.get_deadlines(referenced_project_ids(task.model_dump() for task in tasks))
+        valid = verify_batch(tasks, results, lambda task: self.verify_task(task, deadlines))
+        set_created_ids(results, self._task_ops.create_tasks([task.model_dump() for task in valid]))
+        return results
+
+    def update_tasks(self, task_updates: list[TaskBatchUpdate]) -> list[BatchItemResult]:
+        """Update valid tasks in one transaction, invalid ones are reported in their results.
+
+        Tasks and deadlines of every project referenced by the batch are loaded once.
+        """
+        results = start_batch(task_updates)
+        existing = {task.id: task for task in self._task_ops.get_tasks_by_ids([update.id for update in task_updates])}
+        rows = merge_batch_updates(Task, task_updates, existing, results)
+        deadlines = self._project_ops.get_deadlines(referenced_project_ids(rows))
+        # rows hold already validated values, building table models for checks only would dominate the request
+        valid = verify_batch(rows, results, lambda row: self.verify_task(TaskBase.model_construct(**row), deadlines))
+        self._task_ops.update_tasks(valid)
+        return results
+
+    def delete_tasks(self, task_ids: list[int]) -> list[BatchItemResult]:
+        """Delete existing tasks in one transaction."""
+        results = start_batch(task_ids)
+        set_deleted_ids(results, Task, task_ids, self._task_ops.delete_tasks(task_ids))
+        return results
+
     def verify_task_before_posting(self, task: Task) -> None:
         """Ensure task's deadline is valid, required fields are filled and project_id is correct."""
+        deadlines = self._project_ops.get_deadlines([task.project_id]) if task.project_id is not None else {}
+        self.verify_task(task, deadlines)
+
+    @staticmethod
+    def verify_task(task: TaskBase, project_deadlines: dict[int, date]) -> None:
+        """Checks of verify_task_before_posting against deadlines of projects (missing when project doesn't exist)."""
         if not task.is_deadline_valid():
             raise ValueError(f"Provided deadline is in the past.")
         if not task.are_required_filled():
             raise ValueError(f"Make sure title and description are not null / empty.")
 
         if task.project_id is not None:
-            project = self._project_ops.get_project_by_id(task.project_id)
-            if not project:
+            if task.project_id not in project_deadlines:
                 raise ValueError(f"Provided project id {task.project_id} points to non-existent project.")
 
-            if task.deadline and project.deadline < task.deadline:
-                raise ValueError(f"Provided deadline {task.deadline} is longer than projects deadline {project.deadline}.")
\ No newline at end of file
+            project_deadline = project_deadlines[task.project_id]
+            if task.deadline and project_deadline < task.deadline:
+                raise ValueError(f"Provided deadline {task.deadline} is longer than projects deadline {project_deadline}.")
+
+
+class ChangeService:
+    def __init__(self, change_ops: SQLChangeOperations):
+        self._change_ops = change_ops
+
+    def get_last_seq(self) -> int:
+        return self._change_ops.get_change_bounds()[1]
+
+    def verify_since(self, since: int) -> None:
+        """Ensure change log holds every change after since."""
+        compacted_seq, last_seq = self._change_ops.get_change_bounds()
+        if since < compacted_seq:
+            raise ChangesUnavailableError(f"Changes up to {compacted_seq} were compacted, read all tasks and projects "
+                                          f"and follow changes since {last_seq}.")
+        if since > last_seq:
+            raise ChangesUnavailableError(f"Provided since {since} is ahead of the latest change {last_seq}.")
+
+    def get_changes(self, since: int, limit: int) -> Page[Change]:
+        """Latest changes of rows changed after since, next_cursor holds since of the following page."""
+        self.verify_since(since)
+        changes = self._change_ops.get_changes_after(since, limit)
+        page = Page(items=changes)
+        if changes and len(changes) == limit:
+            page.next_cursor = str(changes[-1].seq)
+        return page
+
+    def compact_changes(self, keep: int) -> int:
+        if keep < 0:
+            raise ValueError(f"Provided keep {keep} is negative.")
+        removed = self._change_ops.compact_changes(keep)
+        log.info(f"Compacted change log, {removed} changes removed")
+        return removed
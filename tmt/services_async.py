@@ -0,0 +1,198 @@
+from collections.abc import AsyncIterator
+from datetime import date, timedelta
+
+from .crud_sql_async import AsyncSQLProjectOperations, AsyncSQLTaskOperations
+from .models import (BatchItemResult, Project, ProjectBase, ProjectBatchUpdate, ProjectUpdate, Task, TaskBase,
+                     TaskBatchUpdate, TaskOrder, TaskUpdate)
+from .services import (EXPORT_BATCH_SIZE, MAX_REPORTED_TASKS, Page, ProjectService, TaskService, cursor_position,
+                       deadline_conflict_errors, deadline_conflicts, deadline_range, existing, merge_batch_updates,
+                       project_deadlines, referenced_project_ids, set_created_ids, set_deleted_ids, set_next_cursor,
+                       start_batch, verify_batch, verify_offset, warn_missing_tasks)
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class AsyncProjectService:
+    """Async counterpart of services.ProjectService, validation and paging are the helpers of services module,
+    so only reads and writes are awaited here."""
+    def __init__(self, project_ops: AsyncSQLProjectOperations, task_ops: AsyncSQLTaskOperations):
+        self._task_ops = task_ops
+        self._project_ops = project_ops
+
+    async def get_paginated_projects(self, limit: int, offset: int, cursor: str | None = None) -> Page[Project]:
+        if cursor is not None:
+            last_id, _ = cursor_position(cursor, offset, "id")
+            page = Page(items=await self._project_ops.get_projects_after(limit=limit, after_id=last_id))
+        else:
+            total_projects = await self._project_ops.get_projects_count()
+            verify_offset(offset, total_projects, "projects")
+            page = Page(items=await self._project_ops.get_projects(limit=limit, offset=offset), total=total_projects)
+        return set_next_cursor(page, limit)
+
+    def export_projects(self, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[dict]:
+        return self._project_ops.iter_projects(batch_size=batch_size)
+
+    async def create_project(self, project: ProjectBase) -> Project:
+        db_project = self._project_ops.get_db_project_object(project)
+        await self.verify_project_before_posting(db_project)
+        return await self._project_ops.create_project(db_project)
+
+    async def delete_project(self, project_id: int) -> None:
+        project = existing(await self._project_ops.get_project_by_id(project_id), Project, project_id)
+
+        if project.tasks:
+            log.warning(f"Removing project {project_id} that has tasks associated {project.tasks}")
+        return await self._project_ops.delete_project(project)
+
+    async def update_project(self, project_id: int, project_update: ProjectUpdate) -> Project:
+        project = existing(await self._project_ops.get_project_by_id(project_id), Project, project_id)
+
+        project = self._project_ops.apply_update(project=project, project_update=project_update)
+
+        await self.verify_project_before_posting(project)
+
+        if project_update.tasks_ids is not None:
+            # tasks are reassigned without commit, so they are saved in one transaction together with project
+            warn_missing_tasks(await self._task_ops.assign_tasks_to_project(project_id, project_update.tasks_ids))
+
+        return await self._project_ops.update_project(project=project)
+
+    async def create_projects(self, projects: list[ProjectBase]) -> list[BatchItemResult]:
+        results = start_batch(projects)
+        valid = verify_batch(projects, results, self.verify_project)
+        set_created_ids(results, await self._project_ops.create_projects([project.model_dump() for project in valid]))
+        return results
+
+    async def update_projects(self, project_updates: list[ProjectBatchUpdate]) -> list[BatchItemResult]:
+        results = start_batch(project_updates)
+        projects = await self._project_ops.get_projects_by_ids([update.id for update in project_updates])
+        existing = {project.id: project for project in projects}
+        rows = merge_batch_updates(Project, project_updates, existing, results)
+        deadline_errors = await self.get_deadline_errors(project_deadlines(rows))
+        valid = verify_batch(rows, results, lambda row: self.verify_project(ProjectBase.model_construct(**row),
+                                                                            deadline_errors.get(row["id"])))
+        await self._project_ops.update_projects(valid)
+        return results
+
+    async def delete_projects(self, project_ids: list[int]) -> list[BatchItemResult]:
+        results = start_batch(project_ids)
+        set_deleted_ids(results, Project, project_ids, await self._project_ops.delete_projects(project_ids))
+        return results
+
+    async def get_deadline_errors(self, deadlines: dict[int, date]) -> dict[int, str]:
+        conflicts = deadline_conflicts(deadlines, await self._task_ops.get_max_deadlines(list(deadlines)))
+        if not conflicts:
+            return {}
+        titles = await self._task_ops.get_titles_after_deadline(conflicts, limit=MAX_REPORTED_TASKS + 1)
+        return deadline_conflict_errors(conflicts, titles)
+
+    async def verify_project_before_posting(self, project: Project) -> None:
+        deadline_errors = {}
+        if project.id is not None and project.deadline is not None:
+            deadline_errors = await self.get_deadline_errors({project.id: project.deadline})
+        self.verify_project(project, deadline_errors.get(project.id))
+
+    verify_project = staticmethod(ProjectService.verify_project)
+
+
+class AsyncTaskService:
+    """Async counterpart of services.TaskService, sharing its helpers like AsyncProjectService."""
+    def __init__(self, task_ops: AsyncSQLTaskOperations, project_ops: AsyncSQLProjectOperations):
+        self._task_ops = task_ops
+        self._project_ops = project_ops
+
+    async def get_paginated_tasks(self, limit: int, offset: int, cursor: str | None = None,
+                                  order_by: TaskOrder = "id", include_archived: bool = False) -> Page[Task]:
+        if cursor is not None:
+            last_id, last_deadline = cursor_position(cursor, offset, order_by)
+            page = Page(items=await self._task_ops.get_tasks_after(limit=limit, after_id=last_id,
+                                                                   after_deadline=last_deadline, order_by=order_by,
+                                                                   include_archived=include_archived))
+        else:
+            total_tasks = await self._task_ops.get_tasks_count(include_archived=include_archived)
+            verify_offset(offset, total_tasks, "tasks")
+            page = Page(items=await self._task_ops.get_tasks(limit=limit, offset=offset, order_by=order_by,
+                                                             include_archived=include_archived),
+                        total=total_tasks)
+        return set_next_cursor(page, limit, order_by)
+
+    async def get_tasks_with_deadline(self, before: date | None = None, after: date | None = None,
+                                      within_days: int | None = None, completed: bool | None = None,
+                                      project_id: int | None = None, limit: int | None = None,
+                                      include_archived: bool = False) -> list[Task]:
+        bounds = deadline_range(before, after, within_days)
+        if bounds is None:
+            return []
+        before, after = bounds
+        return await self._task_ops.get_tasks_with_deadlines(before=before, after=after, completed=completed,
+                                                             project_id=project_id, limit=limit,
+                                                             include_archived=include_archived)
+
+    async def get_overdue_tasks(self, limit: int, project_id: int | None = None) -> list[Task]:
+        return await self._task_ops.get_tasks_with_deadlines(before=date.today() - timedelta(days=1),
+                                                             completed=False, project_id=project_id, limit=limit)
+
+    async def get_upcoming_tasks(self, n: int, project_id: int | None = None) -> list[Task]:
+        return await self._task_ops.get_tasks_with_deadlines(after=date.today(), completed=False,
+                                                             project_id=project_id, limit=n)
+
+    def export_tasks(self, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[dict]:
+        return self._task_ops.iter_tasks(batch_size=batch_size)
+
+    async def create_task(self, task: TaskBase) -> Task:
+        db_task = self._task_ops.create_db_task_object(task)
+        await self.verify_task_before_posting(db_task)
+        return await self._task_ops.create_task(db_task)
+
+    async def update_task(self, task_id: int, task_update: TaskUpdate) -> Task:
+        task = existing(await self._task_ops.get_task_by_id(task_id), Task, task_id)
+
+        task = self._task_ops.apply_update(task=task, task_update=task_update)
+
+        await self.verify_task_before_posting(task)
+
+        return await self._task_ops.update_task(task=task)
+
+    async def delete_task(self, task_id: int, archive: bool = False) -> None:
+        task = await self._task_ops.get_task_by_id(task_id)
+        if task is None:
+            if not await self._task_ops.delete_archived_tasks([task_id], soft=archive):
+                raise ValueError(f"Task with id {task_id} does not exist.")
+            return
+
+        if archive:
+            await self._task_ops.archive_tasks([task_id], deleted=True)
+            return
+        if task.project:
+            log.warning(f"Deleting task {task_id} that is connected to project {task.project_id}")
+        return await self._task_ops.delete_task(task)
+
+    async def create_tasks(self, tasks: list[TaskBase]) -> list[BatchItemResult]:
+        results = start_batch(tasks)
+        deadlines = await self._project_ops.get_deadlines(referenced_project_ids(task.model_dump() for task in tasks))
+        valid = verify_batch(tasks, results, lambda task: self.verify_task(task, deadlines))
+        set_created_ids(results, await self._task_ops.create_tasks([task.model_dump() for task in valid]))
+        return results
+
+    async def update_tasks(self, task_updates: list[TaskBatchUpdate]) -> list[BatchItemResult]:
+        results = start_batch(task_updates)
+        tasks = await self._task_ops.get_tasks_by_ids([update.id for update in task_updates])
+        rows = merge_batch_updates(Task, task_updates, {task.id: task for task in tasks}, results)
+        deadlines = await self._project_ops.get_deadlines(referenced_project_ids(rows))
+        valid = verify_batch(rows, results, lambda row: self.verify_task(TaskBase.model_construct(**row), deadlines))
+        await self._task_ops.update_tasks(valid)
+        return results
+
+    async def delete_tasks(self, task_ids: list[int]) -> list[BatchItemResult]:
+        results = start_batch(task_ids)
+        set_deleted_ids(results, Task, task_ids, await self._task_ops.delete_tasks(task_ids))
+        return results
+
+    async def verify_task_before_posting(self, task: Task) -> None:
+        """Ensure task's deadline is valid, required fields are filled and project_id is correct."""
+        deadlines = await self._project_ops.get_deadlines([task.project_id]) if task.project_id is not None else {}
+        self.verify_task(task, deadlines)
+
+    verify_task = staticmethod(TaskService.verify_task)